@@ -0,0 +1,9 @@
+# analytics/__init__.py
+
+from .engine import AnalyticsEngine, get_engine, get_entries, load_trade_frame
+from .loader import TradeFrame, load_columns, load_records
+
+__all__ = [
+    'AnalyticsEngine', 'TradeFrame', 'get_engine', 'get_entries', 'load_columns',
+    'load_records', 'load_trade_frame',
+]
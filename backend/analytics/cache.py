@@ -0,0 +1,297 @@
+# analytics/cache.py
+
+"""
+Per-user analytics response cache.
+
+Trades only change through a handful of routes (add / update / delete,
+the imports and batch deletion).  Each of them calls ``bump_data_version``
+inside its transaction, and ``cached_response`` stores analytics responses
+under ``(user, endpoint + query string)`` together with the data version
+they were computed from.  A lookup is a hit only when the stored version
+still matches, so repeat views between writes never touch the trades.
+
+Backends (``ANALYTICS_CACHE``):
+    memory  – in-process LRU, per gunicorn worker (default)
+    sqlite  – shared SQLite file every worker on the host can see
+    none    – caching disabled
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, g, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, UserDataVersion
+
+
+# ─── Data version ────────────────────────────────────────────────────────────
+def data_version(user_id):
+    """Current data version of ``user_id`` (0 if never written)."""
+    version = db.session.execute(
+        select(UserDataVersion.version).where(UserDataVersion.user_id == user_id)
+    ).scalar()
+    return version or 0
+
+
+def bump_data_version(user_id):
+    """
+    Increment the user's data version in the current transaction.
+
+    Call this next to every change to a user's trades, before the commit, so
+    the new version becomes visible together with the new data.
+    """
+    bump = (
+        update(UserDataVersion)
+        .where(UserDataVersion.user_id == user_id)
+        .values(version=UserDataVersion.version + 1, updated_at=datetime.utcnow())
+    )
+    if db.session.execute(bump).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(UserDataVersion(user_id=user_id, version=1))
+    except IntegrityError:
+        # Another request created the row first
+        db.session.execute(bump)
+
+
+# ─── Backends ────────────────────────────────────────────────────────────────
+class NullCache:
+    def get(self, user_id, key, version):
+        return None
+
+    def set(self, user_id, key, version, body):
+        pass
+
+    def clear(self):
+        pass
+
+
+class MemoryCache:
+    """Thread-safe in-process LRU of ``(user_id, key) -> (version, stored_at, body)``."""
+
+    def __init__(self, max_entries=256, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, key, version):
+        with self._lock:
+            item = self._entries.get((user_id, key))
+            if item is None:
+                return None
+            stored_version, stored_at, body = item
+            if stored_version != version or (self.ttl and time.time() - stored_at > self.ttl):
+                del self._entries[(user_id, key)]
+                return None
+            self._entries.move_to_end((user_id, key))
+            return body
+
+    def set(self, user_id, key, version, body):
+        with self._lock:
+            self._entries[(user_id, key)] = (version, time.time(), body)
+            self._entries.move_to_end((user_id, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCache:
+    """
+    Cache shared by all workers through one SQLite file.
+
+    One row per (user_id, key); a newer version simply replaces the row, so
+    stale results never pile up.  The table is trimmed back to
+    ``max_entries`` (least recently stored first) every ``PRUNE_EVERY`` writes.
+    """
+
+    PRUNE_EVERY = 100
+
+    def __init__(self, path, max_entries=5000, ttl=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._writes = 0
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS analytics_cache ('
+                ' user_id INTEGER NOT NULL, key TEXT NOT NULL, version INTEGER NOT NULL,'
+                ' stored_at REAL NOT NULL, body BLOB NOT NULL, PRIMARY KEY (user_id, key))'
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS ix_analytics_cache_stored_at'
+                ' ON analytics_cache (stored_at)'
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=5)
+        return conn
+
+    def get(self, user_id, key, version):
+        row = self._connect().execute(
+            'SELECT stored_at, body FROM analytics_cache'
+            ' WHERE user_id = ? AND key = ? AND version = ?',
+            (user_id, key, version)
+        ).fetchone()
+        if row is None or (self.ttl and time.time() - row[0] > self.ttl):
+            return None
+        return bytes(row[1])
+
+    def set(self, user_id, key, version, body):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO analytics_cache (user_id, key, version, stored_at, body)'
+                    ' VALUES (?, ?, ?, ?, ?)',
+                    (user_id, key, version, time.time(), body)
+                )
+                self._writes += 1
+                if self._writes % self.PRUNE_EVERY == 0:
+                    conn.execute(
+                        'DELETE FROM analytics_cache WHERE rowid IN ('
+                        ' SELECT rowid FROM analytics_cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)',
+                        (self.max_entries,)
+                    )
+        except sqlite3.OperationalError as e:
+            # A locked cache file must never fail the request itself
+            print(f"Analytics cache write skipped: {e}")
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM analytics_cache')
+
+
+def get_cache():
+    """The app's cache backend, created from config on first use."""
+    app = current_app
+    cache = app.extensions.get('analytics_cache')
+    if cache is None:
+        backend = app.config.get('ANALYTICS_CACHE', 'memory')
+        ttl = app.config.get('ANALYTICS_CACHE_TTL')
+        if backend == 'sqlite':
+            path = app.config.get('ANALYTICS_CACHE_PATH') or \
+                os.path.join(app.instance_path, 'analytics_cache.db')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            cache = SQLiteCache(path, app.config.get('ANALYTICS_CACHE_SIZE', 5000), ttl)
+        elif backend == 'memory':
+            cache = MemoryCache(app.config.get('ANALYTICS_CACHE_SIZE', 256), ttl)
+        else:
+            cache = NullCache()
+        app.extensions['analytics_cache'] = cache
+    return cache
+
+
+# ─── View decorators ─────────────────────────────────────────────────────────
+def cache_key():
+    """Endpoint path plus the sorted query string."""
+    args = sorted(request.args.items(multi=True))
+    return request.path + '?' + '&'.join(f'{k}={v}' for k, v in args)
+
+
+def request_data_version(user_id):
+    """``data_version`` read at most once per request."""
+    versions = g.setdefault('data_versions', {})
+    if user_id not in versions:
+        versions[user_id] = data_version(user_id)
+    return versions[user_id]
+
+
+def response_etag(user_id, key, version):
+    """
+    Strong ETag for a user's view of ``key`` at data ``version``.
+
+    The tag also rolls over every ``ANALYTICS_CACHE_TTL`` seconds so results
+    relative to "now" (timeframe=30 …) are revalidated like the cache is.
+    """
+    ttl = current_app.config.get('ANALYTICS_CACHE_TTL')
+    window = int(time.time() // ttl) if ttl else 0
+    return hashlib.sha1(f'{user_id}:{version}:{window}:{key}'.encode()).hexdigest()[:32]
+
+
+def conditional_response(view):
+    """
+    Answer ``If-None-Match`` with 304 from the user's data version alone.
+
+    Place it below ``@jwt_required()``.  The check costs one primary-key
+    read; the view (and its trade queries) only runs when the client's copy
+    is stale.  200 responses carry the ETag plus ``Cache-Control: no-cache``
+    so browsers keep the body and revalidate on every use.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        user_id = int(get_jwt_identity())
+        etag = response_etag(user_id, cache_key(), request_data_version(user_id))
+
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.vary.add('Authorization')
+        return response
+    return wrapper
+
+
+def cached_body(user_id, key, compute):
+    """
+    JSON body stored under ``key`` at the user's current data version, or
+    ``compute()`` (returning ``(body bytes, cacheable)``) stored on a miss.
+    Returns ``(body, hit)``.
+    """
+    cache = get_cache()
+    version = request_data_version(user_id)
+    body = cache.get(user_id, key, version)
+    if body is not None:
+        return body, True
+    body, cacheable = compute()
+    if cacheable:
+        cache.set(user_id, key, version, body)
+    return body, False
+
+
+def cached_response(view):
+    """
+    Serve a JWT-protected JSON GET view from the analytics cache.
+
+    Place it below ``@jwt_required()``.  Only 200 JSON responses are stored;
+    conditional requests are handled as in ``conditional_response``.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        user_id = int(get_jwt_identity())
+        cache = get_cache()
+        key = cache_key()
+        version = request_data_version(user_id)
+
+        body = cache.get(user_id, key, version)
+        if body is not None:
+            response = current_app.response_class(body, mimetype='application/json')
+            response.headers['X-Cache'] = 'HIT'
+            return response
+
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200 and response.mimetype == 'application/json':
+            cache.set(user_id, key, version, response.get_data())
+            response.headers['X-Cache'] = 'MISS'
+        return response
+    return conditional_response(wrapper)
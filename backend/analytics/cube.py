@@ -0,0 +1,236 @@
+# analytics/cube.py
+
+"""
+Aggregate trade cube.
+
+``trade_cube`` holds additive measures (trades, wins, losses, pnl, rr,
+decided_rr, gross profit / loss) per (user, day, symbol, strategy,
+direction, hour).  ``analytics.rollups`` keeps it current on every trade
+change; ``rollup`` sums it up to any subset of ``CUBE_DIMENSIONS`` with one
+GROUP BY over pre-aggregated rows, so breakdown pages no longer scan every
+trade.
+
+The breakdown views (/symbol-analysis, /strategy-analysis, /report-data)
+and the generic /cube endpoint are rendered from rollups here.  Groups come in order of their first
+trading day.
+"""
+
+import math
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from models import db, TradeCube
+from .ledger import trade_day
+
+
+CUBE_DIMENSIONS = ('day', 'symbol', 'strategy', 'direction', 'hour')
+CUBE_MEASURES = ('trades', 'wins', 'losses', 'pnl', 'rr', 'decided_rr', 'gross_profit', 'gross_loss')
+# Dimensions accepted by ?group_by= and as equality filters
+CUBE_FILTERS = ('symbol', 'strategy', 'direction', 'hour')
+
+
+def cube_key(trade):
+    """Normalized dimension tuple of a trade dict (journal_entry column names)."""
+    moment = trade['date'] or trade['created_at']
+    if moment is None:
+        return None
+    return (
+        trade_day(moment),
+        str(trade['symbol'] or '').upper(),
+        str(trade['strategy'] or ''),
+        str(trade['direction'] or '').lower(),
+        moment.hour,
+    )
+
+
+def cube_totals(trades):
+    """``{dimension tuple: [CUBE_MEASURES…]}`` of trade dicts."""
+    totals = {}
+    for trade in trades:
+        key = cube_key(trade)
+        if key is None:
+            continue
+        pnl = float(trade['pnl'] or 0.0)
+        rr = float(trade['rr'] or 0.0)
+        row = totals.get(key)
+        if row is None:
+            row = totals[key] = [0, 0, 0, 0.0, 0.0, 0.0, 0.0, 0.0]
+        row[0] += 1
+        row[3] += pnl
+        row[4] += rr
+        if pnl > 0:
+            row[1] += 1
+            row[5] += rr
+            row[6] += pnl
+        elif pnl < 0:
+            row[2] += 1
+            row[5] += rr
+            row[7] -= pnl
+    return totals
+
+
+# ─── Queries ─────────────────────────────────────────────────────────────────
+def rollup(user_id, group_by=(), *where):
+    """
+    Sum the user's cube over everything but ``group_by``.
+
+    Args:
+        user_id: owner of the trades
+        group_by: dimension names (``CUBE_DIMENSIONS``); empty for the total
+        *where: extra filters on ``TradeCube`` columns
+
+    Returns:
+        list of dicts with the group's dimension values, ``CUBE_MEASURES``
+        and ``first_day`` / ``last_day``, in order of first trading day
+        (then dimension values).
+    """
+    cube = TradeCube.__table__
+    dimensions = [cube.c[name] for name in group_by]
+    first_day = func.min(cube.c.day).label('first_day')
+    rows = db.session.execute(
+        select(
+            *dimensions,
+            *[func.sum(cube.c[name]).label(name) for name in CUBE_MEASURES],
+            first_day,
+            func.max(cube.c.day).label('last_day'),
+        )
+        .where(cube.c.user_id == user_id, *where)
+        .group_by(*dimensions)
+        .having(func.sum(cube.c.trades) > 0)
+        .order_by(first_day, *dimensions)
+    ).all()
+    return [dict(row._mapping) for row in rows]
+
+
+def cube_query(args):
+    """
+    ``(group_by, where)`` for ``rollup`` from request args: ``group_by`` (comma
+    list of ``CUBE_DIMENSIONS``), ``from_date`` / ``to_date`` (YYYY-MM-DD,
+    inclusive) and equality filters on ``CUBE_FILTERS``.  Raises ValueError
+    for invalid values.
+    """
+    group_by = [name.strip() for name in (args.get('group_by') or '').split(',') if name.strip()]
+    unknown = [name for name in group_by if name not in CUBE_DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Unknown group_by dimension(s): {', '.join(unknown)}. "
+                         f"Use any of: {', '.join(CUBE_DIMENSIONS)}")
+
+    where = []
+    for name, compare in (('from_date', TradeCube.day.__ge__), ('to_date', TradeCube.day.__le__)):
+        value = args.get(name)
+        if value:
+            try:
+                where.append(compare(datetime.strptime(value, '%Y-%m-%d').date()))
+            except ValueError:
+                raise ValueError(f'Invalid {name} format. Use YYYY-MM-DD')
+    for name in CUBE_FILTERS:
+        value = args.get(name)
+        if value is None:
+            continue
+        if name == 'hour':
+            try:
+                value = int(value)
+            except ValueError:
+                raise ValueError('hour must be an integer')
+        elif name == 'symbol':
+            value = value.upper()
+        elif name == 'direction':
+            value = value.lower()
+        where.append(getattr(TradeCube, name) == value)
+    return tuple(dict.fromkeys(group_by)), where
+
+
+def _ratio(numerator, denominator):
+    raw = (numerator / denominator) if denominator else (float('inf') if numerator else 0.0)
+    return None if not math.isfinite(raw) else round(raw, 2)
+
+
+def _day_string(day):
+    return day.strftime('%Y-%m-%d') if day is not None else None
+
+
+def _simple_row(key, label, group):
+    total = group['trades']
+    return {
+        key: label,
+        'trades': total,
+        'win_rate': round((group['wins'] / total * 100) if total else 0.0, 1),
+        'avg_rr': round(group['rr'] / total if total else 0.0, 2),
+        'pnl': round(group['pnl'], 2),
+    }
+
+
+def strategy_label(strategy):
+    return strategy or 'Unspecified'
+
+
+# ─── Breakdown views ─────────────────────────────────────────────────────────
+def symbol_breakdown(user_id):
+    """/symbol-analysis: per symbol, win rate and averages over decided trades."""
+    result = []
+    for group in rollup(user_id, ('symbol',), TradeCube.symbol != ''):
+        wins, losses, total = group['wins'], group['losses'], group['trades']
+        result.append({
+            'symbol': group['symbol'],
+            'trades': total,
+            'win_rate': round((wins / (wins + losses) * 100) if (wins + losses) else 0.0, 1),
+            'avg_rr': round(group['decided_rr'] / total if total else 0.0, 2),
+            'pnl': round(group['pnl'], 2),
+            'profit_factor': _ratio(group['gross_profit'], group['gross_loss']),
+            'gross_profit': round(group['gross_profit'], 2),
+            'gross_loss': round(group['gross_loss'], 2),
+            'first_trade_date': _day_string(group['first_day']),
+            'latest_date': _day_string(group['last_day']),
+        })
+    return result
+
+
+def strategy_breakdown(user_id):
+    """/strategy-analysis: per strategy over decided trades (break-even trades not counted)."""
+    result = []
+    for group in rollup(user_id, ('strategy',)):
+        total = group['wins'] + group['losses']
+        result.append({
+            'strategy': strategy_label(group['strategy']),
+            'trades': total,
+            'win_rate': round((group['wins'] / total * 100) if total else 0.0, 1),
+            'avg_rr': round((group['decided_rr'] / total) if total else 0.0, 2),
+            'pnl': round(group['pnl'], 2),
+        })
+    return result
+
+
+def cube_groups(user_id, group_by=(), *where):
+    """``rollup`` rows ready for JSON (days as YYYY-MM-DD, sums rounded)."""
+    groups = rollup(user_id, group_by, *where)
+    for group in groups:
+        for name in ('day', 'first_day', 'last_day'):
+            if name in group:
+                group[name] = _day_string(group[name])
+        for name in ('pnl', 'rr', 'decided_rr', 'gross_profit', 'gross_loss'):
+            group[name] = round(group[name], 2)
+    return groups
+
+
+def report_breakdown(user_id):
+    """Overall totals and per-symbol / per-strategy rows of /report-data."""
+    totals = rollup(user_id)
+    overall = totals[0] if totals else dict.fromkeys(CUBE_MEASURES, 0)
+    total_trades = overall['trades']
+    return {
+        'overall': {
+            'total_trades': total_trades,
+            'total_pnl': round(overall['pnl'], 2),
+            'win_rate': round((overall['wins'] / total_trades * 100) if total_trades else 0.0, 1),
+            'avg_rr': round((overall['rr'] / total_trades) if total_trades else 0.0, 2),
+        },
+        'symbols': [
+            _simple_row('symbol', group['symbol'], group)
+            for group in rollup(user_id, ('symbol',), TradeCube.symbol != '')
+        ],
+        'strategies': [
+            _simple_row('strategy', strategy_label(group['strategy']), group)
+            for group in rollup(user_id, ('strategy',))
+        ],
+    }
@@ -0,0 +1,116 @@
+# analytics/downsample.py
+
+"""
+Series downsampling for chart payloads.
+
+Equity curves and per-tag cumulative PnL series grow with the journal (one
+point per trade or per day), while a chart can only draw a few hundred
+pixels.  Views that return a series accept ``?max_points=N`` and reduce it
+here before rendering JSON:
+
+    lttb    – Largest-Triangle-Three-Buckets (default): keeps the points that
+              preserve the visual shape of the line
+    minmax  – the lowest and highest point of every bucket, so peaks and
+              drawdown troughs are always kept
+
+Both always keep the first and last point and return indices in ascending
+order, so callers can pick the matching labels (dates …) themselves.
+Without ``max_points`` series are returned in full.
+"""
+
+import numpy as np
+from flask import request
+
+
+DOWNSAMPLE_METHODS = ('lttb', 'minmax')
+MIN_POINTS = 3
+
+
+def lttb_indices(y, max_points, x=None):
+    """Indices of the points LTTB keeps out of ``y`` (``x`` defaults to 0..n-1)."""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if max_points >= n or n <= MIN_POINTS:
+        return np.arange(n)
+    x = np.arange(n, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+
+    # Inner points split into max_points - 2 buckets; first and last stay
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        # Average of the next bucket (the last point for the final bucket)
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        if next_start >= next_end:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        # Point forming the largest triangle with the previous pick and that average
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return np.unique(selected)
+
+
+def minmax_indices(y, max_points):
+    """
+    Indices of each bucket's minimum and maximum (plus first and last).
+
+    With room for a single inner point (``max_points`` 3) that is the point
+    furthest from the mean of the first and last.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if max_points >= n or n <= MIN_POINTS:
+        return np.arange(n)
+    buckets = (max_points - 2) // 2
+    if buckets < 1:
+        inner = 1 + int(np.argmax(np.abs(y[1:-1] - (y[0] + y[-1]) / 2)))
+        return np.array([0, inner, n - 1])
+    bucket = np.arange(n) * buckets // n
+    order = np.lexsort((y, bucket))
+    first = np.flatnonzero(np.r_[True, bucket[order][1:] != bucket[order][:-1]])
+    last = np.r_[first[1:], n] - 1
+    return np.unique(np.r_[0, order[first], order[last], n - 1])
+
+
+def downsample_indices(y, max_points, method='lttb', x=None):
+    """Indices to keep for ``max_points`` (None keeps every point)."""
+    if max_points is None:
+        return np.arange(len(y))
+    if method == 'minmax':
+        return minmax_indices(y, max_points)
+    return lttb_indices(y, max_points, x)
+
+
+def downsample_points(points, max_points, method='lttb', value='value'):
+    """Downsample a list of dicts on their ``value`` key."""
+    if max_points is None or len(points) <= max_points:
+        return points
+    y = [point[value] for point in points]
+    return [points[i] for i in downsample_indices(y, max_points, method).tolist()]
+
+
+def downsample_args():
+    """
+    ``(max_points, method)`` from the query string; ``(None, method)`` when
+    ``max_points`` is absent.  Raises ValueError for invalid values.
+    """
+    method = request.args.get('downsample', 'lttb')
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"downsample must be one of: {', '.join(DOWNSAMPLE_METHODS)}")
+    raw = request.args.get('max_points')
+    if raw in (None, ''):
+        return None, method
+    try:
+        max_points = int(raw)
+    except ValueError:
+        raise ValueError('max_points must be an integer')
+    if max_points < MIN_POINTS:
+        raise ValueError(f'max_points must be at least {MIN_POINTS}')
+    return max_points, method
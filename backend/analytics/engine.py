@@ -0,0 +1,390 @@
+# analytics/engine.py
+
+"""
+Single-pass analytics engine.
+
+A user's trades are loaded once into column arrays (``TradeFrame``) and every
+metric and group-by used by /stats is computed from those arrays with NumPy.
+The routes only render JSON from an ``AnalyticsEngine``; they no longer
+re-query the journal or loop over ORM objects themselves.  Breakdowns that
+only need additive totals (/report-data, /symbol-analysis,
+/strategy-analysis) are rolled up from ``trade_cube`` by ``analytics.cube``.
+"""
+
+import math
+
+import numpy as np
+from flask import g, has_app_context
+
+from models import JournalEntry
+from .downsample import downsample_indices
+from .loader import load_columns
+
+
+# Columns the engine needs from journal_entry.  The large JSON blobs
+# (variables / extra_data) are deliberately left out; tag breakdowns come
+# from the normalized trade_variable table instead.
+TRADE_COLUMNS = (
+    'id', 'symbol', 'direction', 'entry_price', 'exit_price', 'quantity',
+    'contract_size', 'instrument_type', 'risk_amount', 'pnl', 'rr',
+    'strategy', 'setup', 'notes', 'date', 'created_at', 'weekday', 'local_hour',
+)
+
+DOW_LABELS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+EMPTY_STATS = {
+    "total_trades": 0,
+    "total_pnl": 0.0,
+    "win_rate": 0.0,
+    "profit_factor": None,
+    "avg_rr": 0.0,
+    "max_drawdown": 0.0,
+    "expectancy": 0.0,
+    "kelly_percentage": 0.0,
+    "sharpe_ratio": 0.0,
+    "sortino_ratio": None,
+    "recovery_factor": None,
+    "avg_win": 0.0,
+    "avg_loss": 0.0,
+    "avg_pnl": 0.0,
+    "max_consecutive_wins": 0,
+    "max_consecutive_losses": 0,
+    "buy_pnl": 0.0,
+    "sell_pnl": 0.0,
+    "win_loss": {"wins": 0, "losses": 0},
+    "best_trade": {"symbol": None, "pnl": 0.0, "date": None, "rr": 0.0},
+    "worst_trade": {"symbol": None, "pnl": 0.0, "date": None, "rr": 0.0},
+    "equity_curve": [],
+    "pnl_by_date": [],
+    "gross_profit": 0.0,
+    "gross_loss": 0.0,
+    "top_symbols": [],
+    "recent_trades": [],
+    "best_day_of_week": {"day": None, "pnl": 0.0},
+    "worst_day_of_week": {"day": None, "pnl": 0.0},
+    "best_hour": {"hour": None, "pnl": 0.0},
+    "worst_hour": {"hour": None, "pnl": 0.0},
+    "max_drawdown_percent": 0.0,
+    "trades": []
+}
+
+
+# ─── Column helpers ──────────────────────────────────────────────────────────
+def day_strings(ts):
+    """'YYYY-MM-DD' labels for a datetime64 array (NaT becomes 'NaT')."""
+    return np.datetime_as_string(ts.astype('datetime64[D]'))
+
+
+def bucket_sums(codes, weights, size):
+    """``np.bincount`` over an integer column loaded as float when it has NULLs (skipped)."""
+    codes = np.asarray(codes, dtype=float)
+    known = ~np.isnan(codes)
+    return np.bincount(codes[known].astype(np.int64), weights=weights[known], minlength=size)
+
+
+def factorize(labels, by=None):
+    """
+    Factorize ``labels`` in first-appearance order.
+
+    Returns (uniques, codes) where ``uniques[codes[i]] == labels[i]``.  Keeping
+    first-appearance order means the rendered lists come out in the same
+    order the old dict-based loops produced.  When ``by`` is given, groups are
+    ordered by their smallest ``by`` value instead (e.g. trade id).
+    """
+    labels = np.asarray(labels)
+    if labels.size == 0:
+        return labels[:0], np.zeros(0, dtype=np.int64)
+    uniq, first, codes = np.unique(labels, return_index=True, return_inverse=True)
+    codes = codes.ravel()
+    if by is not None:
+        first = np.full(uniq.size, np.iinfo(np.int64).max)
+        np.minimum.at(first, codes, np.asarray(by, dtype=np.int64))
+    order = np.argsort(first, kind='stable')
+    remap = np.empty_like(order)
+    remap[order] = np.arange(order.size)
+    return uniq[order], remap[codes]
+
+
+def longest_run(flags):
+    """Length of the longest run of True values in a boolean array."""
+    if not flags.any():
+        return 0
+    edges = np.diff(np.concatenate(([0], flags.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return int((ends - starts).max())
+
+
+def _ratio_or_none(numerator, denominator):
+    raw = (numerator / denominator) if denominator != 0 else (
+        float('inf') if numerator > 0 else 0.0
+    )
+    return None if not math.isfinite(raw) else round(raw, 2)
+
+
+class GroupStats:
+    """Additive per-group measures computed with ``np.bincount``."""
+
+    def __init__(self, codes, size, pnl, rr, mask=None):
+        if mask is not None:
+            codes, pnl, rr = codes[mask], pnl[mask], rr[mask]
+        self.codes = codes
+        self.trades = np.bincount(codes, minlength=size)
+        self.wins = np.bincount(codes, weights=pnl > 0, minlength=size).astype(np.int64)
+        self.losses = np.bincount(codes, weights=pnl < 0, minlength=size).astype(np.int64)
+        self.pnl = np.bincount(codes, weights=pnl, minlength=size)
+        self.rr = np.bincount(codes, weights=rr, minlength=size)
+        self.gross_profit = np.bincount(codes, weights=np.where(pnl > 0, pnl, 0.0), minlength=size)
+        self.gross_loss = np.bincount(codes, weights=np.where(pnl < 0, -pnl, 0.0), minlength=size)
+
+
+def load_trade_frame(user_id, columns=TRADE_COLUMNS):
+    """Load a user's trades (ordered by created_at) into a ``TradeFrame``."""
+    return load_columns(columns, user_id=user_id, order_by=('created_at', 'id'))
+
+
+# ─── Engine ──────────────────────────────────────────────────────────────────
+class AnalyticsEngine:
+    """Computes every journal metric from one ``TradeFrame``."""
+
+    def __init__(self, user_id, frame):
+        self.user_id = user_id
+        self.frame = frame
+        self.n = len(frame)
+
+        pnl = np.nan_to_num(frame['pnl'], nan=0.0)
+        rr = np.nan_to_num(frame['rr'], nan=0.0)
+        self.pnl = pnl
+        self.rr = rr
+        self.is_win = pnl > 0
+        self.is_loss = pnl < 0
+
+        date = frame['date']
+        created = frame['created_at']
+        self.created_at = np.where(np.isnat(created), date, created)
+        self.trade_dt = np.where(np.isnat(date), self.created_at, date)
+        self.trade_day = day_strings(self.trade_dt)
+
+    @classmethod
+    def for_user(cls, user_id):
+        return cls(user_id, load_trade_frame(user_id))
+
+    # ── /stats ──────────────────────────────────────────────────────────────
+    def stats_payload(self, max_points=None, method='lttb'):
+        """
+        The /stats payload; ``max_points`` downsamples ``equity_curve``
+        (drawdown and every other figure still use all trades).
+        """
+        if self.n == 0:
+            return dict(EMPTY_STATS)
+
+        f = self.frame
+        pnl, rr = self.pnl, self.rr
+        total_trades = self.n
+        total_pnl = float(pnl.sum())
+
+        win_count = int(self.is_win.sum())
+        loss_count = int(self.is_loss.sum())
+        break_even_count = total_trades - win_count - loss_count
+
+        decided = total_trades - break_even_count
+        win_rate = (win_count / decided) * 100 if decided else 0.0
+
+        gross_profit = float(pnl[self.is_win].sum())
+        gross_loss = abs(float(pnl[self.is_loss].sum()))
+        profit_factor = _ratio_or_none(gross_profit, gross_loss)
+
+        avg_rr = round(float(rr.sum()) / total_trades, 2)
+
+        # Equity curve (per trade) and drawdown measured from the first point
+        equity = np.round(np.cumsum(pnl), 2)
+        max_dd = float((np.maximum.accumulate(equity) - equity).max())
+        max_drawdown = round(max_dd, 2)
+        trade_day = self.trade_day.tolist()
+        keep = downsample_indices(equity, max_points, method).tolist()
+        equity_curve = [
+            {"date": d, "cumulative_pnl": v}
+            for d, v in zip([trade_day[i] for i in keep], equity[keep].tolist())
+        ]
+
+        # PnL by date (first-appearance order) and by sorted day for Sharpe
+        days, day_codes = factorize(self.trade_day)
+        day_totals = np.bincount(day_codes, weights=pnl, minlength=len(days))
+        pnl_by_date = [[d, v] for d, v in zip(days.tolist(), day_totals.tolist())]
+
+        avg_win_val = (gross_profit / win_count) if win_count else 0.0
+        avg_loss_val = (gross_loss / loss_count) if loss_count else 0.0
+
+        expectancy = round(
+            (avg_win_val * (win_rate / 100)) - (avg_loss_val * (loss_count / total_trades)), 2
+        )
+
+        w = win_rate / 100.0
+        r_ratio = (avg_win_val / avg_loss_val) if avg_loss_val != 0 else float('inf')
+        kelly_raw = (w - ((1 - w) / r_ratio)) * 100 if (avg_loss_val and win_count) else 0.0
+        kelly_percentage = None if not math.isfinite(kelly_raw) else round(kelly_raw, 2)
+
+        mean_pnl = total_pnl / total_trades
+
+        # Sharpe on daily returns against a fixed 10k starting capital
+        sorted_idx = np.argsort(days, kind='stable')
+        daily = day_totals[sorted_idx]
+        initial_capital = 10000.0
+        equity_before = initial_capital + np.concatenate(([0.0], np.cumsum(daily)[:-1]))
+        daily_returns = daily / (equity_before + 1e-8)
+        if daily_returns.size >= 2:
+            stddev = float(daily_returns.std())
+            sharpe_ratio = round((float(daily_returns.mean()) / stddev * (252 ** 0.5)) if stddev != 0 else 0.0, 2)
+        else:
+            sharpe_ratio = 0.0
+
+        # Sortino: downside deviation over per-trade PnL
+        downside_std = math.sqrt(float((pnl[self.is_loss] ** 2).sum()) / total_trades)
+        sortino_ratio = None if downside_std == 0 else round(mean_pnl / downside_std, 2)
+
+        recovery_factor = _ratio_or_none(total_pnl, max_dd)
+
+        max_consec_wins = longest_run(self.is_win)
+        max_consec_losses = longest_run(~self.is_win)
+
+        direction = np.char.lower(f.text('direction'))
+        buy_pnl = float(pnl[direction == 'long'].sum())
+        sell_pnl = float(pnl[direction == 'short'].sum())
+
+        created_day = day_strings(self.created_at).tolist()
+        symbols = f['symbol']
+
+        def _trade_summary(i):
+            return {
+                "symbol": symbols[i],
+                "pnl": float(f['pnl'][i]),
+                "date": created_day[i],
+                "rr": float(f['rr'][i]),
+            }
+
+        best_trade = _trade_summary(int(np.argmax(pnl)))
+        worst_trade = _trade_summary(int(np.argmin(pnl)))
+
+        # Top-performing symbols
+        sym_labels, sym_codes = factorize(f.text('symbol'))
+        sym = GroupStats(sym_codes, len(sym_labels), pnl, rr)
+        order = np.argsort(-sym.pnl, kind='stable')[:6]
+        top_symbols = [
+            [sym_labels[i], {"pnl": float(sym.pnl[i]), "trades": int(sym.trades[i]), "wins": int(sym.wins[i])}]
+            for i in order.tolist()
+        ]
+
+        # Recent trades: newest trade date first, ties keep load order
+        ticks = self.trade_dt.astype(np.int64)
+        recent_idx = np.lexsort((np.arange(self.n), -ticks))[:5]
+        notes = f['notes']
+        recent_trades = [
+            {
+                "symbol": symbols[i],
+                "direction": "Long" if direction[i] == "long" else "Short",
+                "date": trade_day[i],
+                "pnl": float(f['pnl'][i]),
+                "rr": float(f['rr'][i]),
+                "setup": notes[i] or ""
+            }
+            for i in recent_idx.tolist()
+        ]
+
+        # Day-of-week / hour-of-day totals from the precomputed time columns
+        # (trade date in the user's timezone, see analytics.timeparts)
+        dow_totals = bucket_sums(f['weekday'], pnl, 7)
+        hour_totals = bucket_sums(f['local_hour'], pnl, 24)
+        best_dow, worst_dow = int(np.argmax(dow_totals)), int(np.argmin(dow_totals))
+        best_hour, worst_hour = int(np.argmax(hour_totals)), int(np.argmin(hour_totals))
+
+        peak_equity = max(float(equity.max()), 1.0)
+        max_drawdown_percent = round((max_dd / peak_equity) * 100, 2) if peak_equity else 0.0
+
+        return {
+            "total_trades": total_trades,
+            "total_pnl": round(total_pnl, 2),
+            "win_rate": round(win_rate, 2),
+            "profit_factor": profit_factor,
+            "avg_rr": avg_rr,
+            "max_drawdown": max_drawdown,
+            "expectancy": expectancy,
+            "kelly_percentage": kelly_percentage,
+            "sharpe_ratio": sharpe_ratio,
+            "sortino_ratio": sortino_ratio,
+            "recovery_factor": recovery_factor,
+            "avg_win": round(avg_win_val, 2),
+            "avg_loss": round(avg_loss_val, 2),
+            "avg_pnl": round(mean_pnl, 2),
+            "max_consecutive_wins": max_consec_wins,
+            "max_consecutive_losses": max_consec_losses,
+            "buy_pnl": round(buy_pnl, 2),
+            "sell_pnl": round(sell_pnl, 2),
+            "win_loss": {"wins": win_count, "losses": loss_count},
+            "best_trade": best_trade,
+            "worst_trade": worst_trade,
+            "equity_curve": equity_curve,
+            "pnl_by_date": pnl_by_date,
+            "gross_profit": round(gross_profit, 2),
+            "gross_loss": round(gross_loss, 2),
+            "top_symbols": top_symbols,
+            "recent_trades": recent_trades,
+            "best_day_of_week": {"day": DOW_LABELS[best_dow], "pnl": round(float(dow_totals[best_dow]), 2)},
+            "worst_day_of_week": {"day": DOW_LABELS[worst_dow], "pnl": round(float(dow_totals[worst_dow]), 2)},
+            "best_hour": {"hour": best_hour, "pnl": round(float(hour_totals[best_hour]), 2)},
+            "worst_hour": {"hour": worst_hour, "pnl": round(float(hour_totals[worst_hour]), 2)},
+            "max_drawdown_percent": max_drawdown_percent,
+            "trades": self.trade_rows(),
+        }
+
+    def trade_rows(self):
+        """Per-trade rows for the /stats ``trades`` array."""
+        f = self.frame
+        keys = ('id', 'symbol', 'direction', 'pnl', 'rr', 'entry_price', 'exit_price',
+                'quantity', 'instrument_type', 'contract_size', 'risk_amount',
+                'strategy', 'setup', 'notes')
+        cols = [_json_list(f[k]) for k in keys]
+        cols.append(self.trade_day.tolist())
+        keys = keys + ('date',)
+        return [dict(zip(keys, row)) for row in zip(*cols)]
+
+
+def _json_list(col):
+    """``tolist()`` with NaN turned back into None for JSON output."""
+    if col.dtype.kind == 'f':
+        return [None if v != v else v for v in col.tolist()]
+    return col.tolist()
+
+
+def get_engine(user_id):
+    """
+    Return the engine for ``user_id``, building it at most once per request.
+    """
+    if not has_app_context():
+        return AnalyticsEngine.for_user(user_id)
+    engines = g.setdefault('analytics_engines', {})
+    engine = engines.get(user_id)
+    if engine is None:
+        engine = engines[user_id] = AnalyticsEngine.for_user(user_id)
+    return engine
+
+
+def get_entries(user_id, by_date=False):
+    """
+    The user's ``JournalEntry`` objects, loaded at most once per request.
+
+    For views that still walk ORM objects (streaks): when /dashboard renders
+    several of them they share one query.  Ordered by id, or by (date, id)
+    with ``by_date`` – the order ``ORDER BY date`` returns over
+    ``ix_journal_entry_user_date``.
+    """
+    def load():
+        return JournalEntry.query.filter_by(user_id=user_id).order_by(JournalEntry.id).all()
+
+    if not has_app_context():
+        entries = load()
+    else:
+        loaded = g.setdefault('journal_entries', {})
+        entries = loaded.get(user_id)
+        if entries is None:
+            entries = loaded[user_id] = load()
+    return sorted(entries, key=lambda entry: entry.date) if by_date else entries
@@ -0,0 +1,391 @@
+# analytics/excursions.py
+
+"""
+Batch MAE / MFE over a user's trade history.
+
+``compute_user_excursions`` joins every trade with a stop loss and a take
+profit against the cached 1-minute bars (``market.intraday``), one bar load
+per symbol, and computes for all of a symbol's trades at once:
+
+    mae / mfe            maximum adverse / favourable excursion (price, and
+                         in R = |entry - stop_loss|)
+    time_to_stop / _target / _1r
+                         seconds from entry to the first bar touching the
+                         stop, the target and +1R
+    first_hit            which of stop / target was touched first
+    capture_efficiency   realized move / MFE
+
+The hold window runs from entry to the recorded exit time, or to the first
+bar that traded the exit price when none is recorded.  Every trade window
+is flattened into one index array, so the per-trade maxima and first
+touches are numpy ``reduceat`` / ``unique`` calls rather than a Python loop
+over trades.  Results are stored in ``trade_excursion``; the aggregate
+endpoints only read that table.
+"""
+
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import delete, select
+
+from models import db, JournalEntry, TradeExcursion
+from market import DEFAULT_HOLD, MAX_HOLD, bars_for_days, day_range, recorded_exit_time
+from .cache import bump_data_version
+
+
+EXCURSION_CHUNK_SIZE = 1000
+# Stored metrics exposed by the distribution endpoint
+DISTRIBUTION_METRICS = ('mae_r', 'mfe_r', 'capture_efficiency')
+GROUP_FIELDS = ('symbol', 'direction', 'strategy', 'setup', 'instrument_type')
+SUMMARY_COLUMNS = ('mae_r', 'mfe_r', 'capture_efficiency', 'time_to_stop', 'time_to_target', 'time_to_1r')
+
+
+def _epoch(value):
+    return int(value.replace(tzinfo=timezone.utc).timestamp())
+
+
+# ─── Vectorized core ─────────────────────────────────────────────────────────
+def _windows(ts, start_ts, end_ts):
+    """Flattened bar windows ``[start_ts, end_ts]`` → (lengths, segment, position, bar index)."""
+    lo = np.searchsorted(ts, start_ts, side='left')
+    hi = np.searchsorted(ts, end_ts, side='right')
+    lengths = np.maximum(hi - lo, 0)
+    segment = np.repeat(np.arange(len(lo)), lengths)
+    offsets = np.cumsum(lengths) - lengths
+    position = np.arange(lengths.sum()) - offsets[segment]
+    return lengths, segment, position, lo[segment] + position
+
+
+def _first_true(mask, segment, position, count):
+    """Position within its window of each window's first True (-1: none)."""
+    first = np.full(count, -1, dtype=np.int64)
+    hits = np.flatnonzero(mask)
+    windows, index = np.unique(segment[hits], return_index=True)
+    first[windows] = position[hits[index]]
+    return first
+
+
+def _window_max(values, lengths, count):
+    result = np.full(count, np.nan)
+    nonempty = lengths > 0
+    if nonempty.any():
+        starts = (np.cumsum(lengths) - lengths)[nonempty]
+        result[nonempty] = np.fmax.reduceat(values, starts)
+    return result
+
+
+def compute_excursions(bars, entry_ts, exit_ts, side, entry, exit_price, stop, target):
+    """
+    Excursion metrics of many trades on one symbol's bars.
+
+    All trade arguments are equal-length arrays; ``side`` is +1 (long) / -1
+    (short) and ``exit_ts`` is -1 where the exit time is unknown.  Returns a
+    dict of arrays (NaN / -1 where undefined).
+    """
+    ts, high, low = bars['ts'], bars['high'], bars['low']
+    count = len(entry_ts)
+
+    # Unknown exits: first bar within DEFAULT_HOLD that traded the exit price
+    exit_ts = exit_ts.copy()
+    unknown = exit_ts < 0
+    lengths, segment, position, index = _windows(
+        ts, entry_ts, entry_ts + int(DEFAULT_HOLD.total_seconds()))
+    touched = (low[index] <= exit_price[segment]) & (high[index] >= exit_price[segment])
+    first = _first_true(touched, segment, position, count)
+    estimated = unknown & (first >= 0)
+    found = np.flatnonzero(estimated)
+    exit_ts[found] = ts[np.searchsorted(ts, entry_ts[found]) + first[found]]
+    exit_ts = np.minimum(exit_ts, entry_ts + int(MAX_HOLD.total_seconds()))
+
+    # Per-bar excursions inside each hold window
+    lengths, segment, position, index = _windows(ts, entry_ts, np.where(exit_ts < 0, -1, exit_ts))
+    s = side[segment]
+    favourable = np.where(s > 0, high[index] - entry[segment], entry[segment] - low[index])
+    adverse = np.where(s > 0, entry[segment] - low[index], high[index] - entry[segment])
+    mfe = np.maximum(_window_max(favourable, lengths, count), 0)
+    mae = np.maximum(_window_max(adverse, lengths, count), 0)
+
+    risk = side * (entry - stop)
+    reward = side * (target - entry)
+    valid_risk = risk > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mfe_r = np.where(valid_risk, mfe / risk, np.nan)
+        mae_r = np.where(valid_risk, mae / risk, np.nan)
+        capture = np.where(mfe > 0, side * (exit_price - entry) / mfe, np.nan)
+
+    stop_pos = _first_true(adverse >= risk[segment], segment, position, count)
+    target_pos = _first_true(favourable >= reward[segment], segment, position, count)
+    one_r_pos = _first_true(valid_risk[segment] & (favourable >= risk[segment]), segment, position, count)
+    window_start = np.searchsorted(ts, entry_ts, side='left')
+
+    def seconds_after_entry(pos):
+        when = np.full(count, -1, dtype=np.int64)
+        hit = np.flatnonzero(pos >= 0)
+        when[hit] = ts[window_start[hit] + pos[hit]] - entry_ts[hit]
+        return when
+
+    # A bar touching both levels counts as the stop (the conservative reading)
+    first_hit = np.where(
+        stop_pos >= 0,
+        np.where((target_pos >= 0) & (target_pos < stop_pos), 'target', 'stop'),
+        np.where(target_pos >= 0, 'target', '')
+    )
+    return {
+        'bar_count': lengths,
+        'exit_ts': exit_ts,
+        'exit_estimated': estimated,
+        'mae': mae, 'mfe': mfe, 'mae_r': mae_r, 'mfe_r': mfe_r,
+        'time_to_stop': seconds_after_entry(stop_pos),
+        'time_to_target': seconds_after_entry(target_pos),
+        'time_to_1r': seconds_after_entry(one_r_pos),
+        'first_hit': first_hit,
+        'capture_efficiency': capture,
+    }
+
+
+# ─── Batch job ───────────────────────────────────────────────────────────────
+def eligible_filter(user_id):
+    return (JournalEntry.user_id == user_id,
+            JournalEntry.stop_loss.isnot(None),
+            JournalEntry.take_profit.isnot(None))
+
+
+def _trades_to_compute(user_id, recompute):
+    query = select(
+        JournalEntry.id, JournalEntry.symbol, JournalEntry.direction, JournalEntry.date,
+        JournalEntry.entry_price, JournalEntry.exit_price, JournalEntry.stop_loss,
+        JournalEntry.take_profit, JournalEntry.extra_data,
+    ).where(*eligible_filter(user_id))
+    if not recompute:
+        query = query.where(JournalEntry.id.not_in(select(TradeExcursion.entry_id)))
+    return db.session.execute(query.order_by(JournalEntry.symbol, JournalEntry.date)).all()
+
+
+def _nan_to_none(value):
+    return None if value != value else float(value)
+
+
+def _symbol_rows(user_id, symbol, trades, provider):
+    entry_times = [t.date for t in trades]
+    exit_times = [recorded_exit_time(t.extra_data) for t in trades]
+    days = set()
+    for entry_time, exit_time in zip(entry_times, exit_times):
+        last = exit_time if exit_time and exit_time > entry_time else entry_time + DEFAULT_HOLD
+        days.update(day_range(entry_time.date(), min(last, entry_time + MAX_HOLD).date()))
+    bars = bars_for_days(symbol, days, provider)
+
+    result = compute_excursions(
+        bars,
+        np.array([_epoch(t) for t in entry_times], dtype=np.int64),
+        np.array([_epoch(x) if x and x > t else -1 for t, x in zip(entry_times, exit_times)], dtype=np.int64),
+        np.array([-1 if (t.direction or '').lower() == 'short' else 1 for t in trades]),
+        np.array([t.entry_price for t in trades], dtype=np.float64),
+        np.array([t.exit_price for t in trades], dtype=np.float64),
+        np.array([t.stop_loss for t in trades], dtype=np.float64),
+        np.array([t.take_profit for t in trades], dtype=np.float64),
+    )
+    now = datetime.utcnow()
+    rows = []
+    for i, trade in enumerate(trades):
+        has_data = result['bar_count'][i] > 0
+        has_exit = result['exit_ts'][i] >= 0
+        rows.append({
+            'entry_id': trade.id,
+            'user_id': user_id,
+            'status': 'ok' if has_data else 'no_data' if has_exit else 'no_exit',
+            'bar_count': int(result['bar_count'][i]),
+            'exit_time': datetime.utcfromtimestamp(int(result['exit_ts'][i])) if has_exit else None,
+            'exit_estimated': bool(result['exit_estimated'][i]),
+            'mae': _nan_to_none(result['mae'][i]) if has_data else None,
+            'mfe': _nan_to_none(result['mfe'][i]) if has_data else None,
+            'mae_r': _nan_to_none(result['mae_r'][i]) if has_data else None,
+            'mfe_r': _nan_to_none(result['mfe_r'][i]) if has_data else None,
+            'time_to_stop': int(result['time_to_stop'][i]) if result['time_to_stop'][i] >= 0 else None,
+            'time_to_target': int(result['time_to_target'][i]) if result['time_to_target'][i] >= 0 else None,
+            'time_to_1r': int(result['time_to_1r'][i]) if result['time_to_1r'][i] >= 0 else None,
+            'first_hit': result['first_hit'][i] or None,
+            'capture_efficiency': _nan_to_none(result['capture_efficiency'][i]) if has_data else None,
+            'computed_at': now,
+        })
+    return rows
+
+
+def _store(rows):
+    for start in range(0, len(rows), EXCURSION_CHUNK_SIZE):
+        chunk = rows[start:start + EXCURSION_CHUNK_SIZE]
+        db.session.execute(delete(TradeExcursion).where(
+            TradeExcursion.entry_id.in_([row['entry_id'] for row in chunk])
+        ))
+        db.session.execute(TradeExcursion.__table__.insert(), chunk)
+
+
+def compute_user_excursions(user_id, recompute=False, provider=None):
+    """
+    Compute and store excursions for the user's eligible trades (only the
+    ones without a stored result unless ``recompute``).  Commits per symbol
+    and bumps the data version once at the end.
+    """
+    trades = _trades_to_compute(user_id, recompute)
+    by_symbol = {}
+    for trade in trades:
+        by_symbol.setdefault(trade.symbol.replace('/', '-').upper(), []).append(trade)
+
+    summary = {'computed': 0, 'no_data': 0, 'failed_symbols': []}
+    for symbol, symbol_trades in by_symbol.items():
+        try:
+            rows = _symbol_rows(user_id, symbol, symbol_trades, provider)
+            _store(rows)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"excursions {symbol} (user {user_id}) error:", e)
+            summary['failed_symbols'].append(symbol)
+            continue
+        summary['no_data'] += sum(row['status'] != 'ok' for row in rows)
+        summary['computed'] += len(rows)
+    if summary['computed']:
+        bump_data_version(user_id)
+        db.session.commit()
+    return summary
+
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def _excursion_job(app, user_id, recompute):
+    with app.app_context():
+        try:
+            summary = compute_user_excursions(user_id, recompute)
+            print(f"Excursions user {user_id}: {summary['computed']} trades "
+                  f"({summary['no_data']} without bars)")
+        except Exception as e:
+            print(f" excursions user {user_id} error:", e)
+        finally:
+            with _jobs_lock:
+                _jobs.pop(user_id, None)
+
+
+def start_excursion_job(user_id, recompute=False):
+    """
+    Queue ``compute_user_excursions`` on the import pool; returns False when
+    a job for the user is already running in this process.
+    """
+    from ingest import import_executor
+
+    app = current_app._get_current_object()
+    with _jobs_lock:
+        if user_id in _jobs:
+            return False
+        _jobs[user_id] = import_executor(app).submit(_excursion_job, app, user_id, recompute)
+    return True
+
+
+def excursion_job_running(user_id):
+    with _jobs_lock:
+        return user_id in _jobs
+
+
+# ─── Aggregates ──────────────────────────────────────────────────────────────
+def excursion_status(user_id):
+    eligible = db.session.execute(
+        select(db.func.count()).select_from(JournalEntry).where(*eligible_filter(user_id))
+    ).scalar()
+    counts = dict(db.session.execute(
+        select(TradeExcursion.status, db.func.count())
+        .where(TradeExcursion.user_id == user_id)
+        .group_by(TradeExcursion.status)
+    ).all())
+    computed = sum(counts.values())
+    return {
+        'eligible': eligible,
+        'computed': computed,
+        'no_data': counts.get('no_data', 0),
+        'no_exit': counts.get('no_exit', 0),
+        'pending': max(eligible - computed, 0),
+        'running': excursion_job_running(user_id),
+    }
+
+
+def _load(user_id, columns, group_by=None):
+    fields = [getattr(TradeExcursion, name) for name in columns]
+    if group_by:
+        fields.append(getattr(JournalEntry, group_by))
+    return db.session.execute(
+        select(*fields)
+        .join(JournalEntry, JournalEntry.id == TradeExcursion.entry_id)
+        .where(TradeExcursion.user_id == user_id, TradeExcursion.status == 'ok')
+    ).all()
+
+
+def _floats(values):
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def _rate(mask):
+    return round(float(mask.mean()), 4) if len(mask) else None
+
+
+def _stat(fn, values):
+    values = values[~np.isnan(values)]
+    return round(float(fn(values)), 4) if len(values) else None
+
+
+def _summarize(rows):
+    columns = list(zip(*rows)) or [()] * len(SUMMARY_COLUMNS)
+    mae_r, mfe_r, capture, to_stop, to_target, to_1r = (_floats(column) for column in columns)
+    stop_hit, target_hit, one_r = ~np.isnan(to_stop), ~np.isnan(to_target), ~np.isnan(to_1r)
+    # +1R before the stop: 1R touched and, if the stop was touched too, strictly earlier
+    one_r_first = one_r & (~stop_hit | (to_1r < np.where(stop_hit, to_stop, np.inf)))
+    first_target = target_hit & (~stop_hit | (to_target < np.where(stop_hit, to_stop, np.inf)))
+    return {
+        'trades': len(rows),
+        'avg_mae_r': _stat(np.mean, mae_r),
+        'median_mae_r': _stat(np.median, mae_r),
+        'avg_mfe_r': _stat(np.mean, mfe_r),
+        'median_mfe_r': _stat(np.median, mfe_r),
+        'reached_1r_rate': _rate(one_r),
+        'reached_1r_before_stop_rate': _rate(one_r_first),
+        'stop_hit_rate': _rate(stop_hit),
+        'target_hit_rate': _rate(target_hit),
+        'target_before_stop_rate': _rate(first_target),
+        'avg_capture_efficiency': _stat(np.mean, capture),
+        'median_time_to_stop': _stat(np.median, to_stop),
+        'median_time_to_target': _stat(np.median, to_target),
+        'median_time_to_1r': _stat(np.median, to_1r),
+    }
+
+
+def excursion_summary(user_id, group_by=None):
+    """Aggregate excursion statistics, overall or per ``group_by`` value."""
+    rows = _load(user_id, SUMMARY_COLUMNS, group_by)
+    if not group_by:
+        return _summarize([tuple(row) for row in rows])
+    groups = {}
+    for row in rows:
+        groups.setdefault(row[-1] or 'Unknown', []).append(tuple(row)[:-1])
+    return [
+        {group_by: key, **_summarize(values)}
+        for key, values in sorted(groups.items(), key=lambda item: -len(item[1]))
+    ]
+
+
+def excursion_distribution(user_id, metric='mfe_r', bin_size=0.25, minimum=0.0, maximum=5.0):
+    """
+    Histogram of a stored metric.  Values below ``minimum`` are counted in
+    the first bin; the last bin collects everything ``>= maximum``.
+    """
+    values = _floats([row[0] for row in _load(user_id, (metric,))])
+    values = values[~np.isnan(values)]
+    edges = np.arange(minimum, maximum + bin_size / 2, bin_size)
+    counts = np.histogram(np.clip(values, minimum, maximum), bins=np.r_[edges[:-1], maximum, np.inf])[0]
+    return {
+        'metric': metric,
+        'trades': int(len(values)),
+        'bins': [
+            {'from': round(float(lo), 4), 'to': round(float(hi), 4) if np.isfinite(hi) else None, 'count': int(c)}
+            for lo, hi, c in zip(np.r_[edges[:-1], maximum], np.r_[edges[1:], np.inf], counts)
+        ],
+    }
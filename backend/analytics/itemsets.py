@@ -0,0 +1,203 @@
+# analytics/itemsets.py
+
+"""
+Frequent variable combinations (Apriori).
+
+Each trade is a transaction whose items are its ``key:value`` tags.  Rather
+than expanding every trade into all of its ``itertools.combinations``, the
+miner grows itemsets level by level and only keeps those that occur in at
+least ``min_trades`` trades, so a combination is never built if any of its
+subsets is already too rare.  Trade sets are packed numpy bitsets, and the
+support of every candidate sharing a prefix is counted in one vectorized
+``&`` + ``bitwise_count``.
+"""
+
+import heapq
+
+import numpy as np
+from sqlalchemy import select
+
+from models import db
+from .engine import factorize
+from .tags import _tagged_trades
+
+
+DEFAULT_MIN_TRADES = 3
+DEFAULT_TOP_K = 1000
+# Hard cap on frequent itemsets per level so one request cannot exhaust a worker
+MAX_ITEMSETS = 100000
+SORT_FIELDS = ('pnl', 'trades', 'win_rate', 'profit_factor', 'expectancy', 'avg_rr')
+
+
+# ─── Transactions ────────────────────────────────────────────────────────────
+class TagTransactions:
+    """Tagged trades in (date, id) order with one trade bitset per tag."""
+
+    def __init__(self, items, item_bits, pnl, rr):
+        self.items = items            # list of (key, value)
+        self.item_bits = item_bits    # uint8 matrix, one packed trade bitset per item
+        self.pnl = pnl
+        self.rr = rr
+
+    def __len__(self):
+        return len(self.pnl)
+
+    @classmethod
+    def load(cls, user_id, *where):
+        tv, je, joined = _tagged_trades()
+        stmt = (
+            select(tv.c.key, tv.c.value, je.c.id, je.c.pnl, je.c.rr)
+            .select_from(joined)
+            .where(tv.c.user_id == user_id, *where)
+            .order_by(je.c.date, je.c.id)
+        )
+        rows = db.session.execute(stmt).all()
+        if not rows:
+            return cls([], np.zeros((0, 1), dtype=np.uint8), np.zeros(0), np.zeros(0))
+
+        keys, values, ids, pnl, rr = zip(*rows)
+        # Trades and tags are numbered in first-appearance (date) order
+        trade_ids, trade_codes = factorize(np.array(ids, dtype=np.int64))
+        labels = np.array([f'{k}\x1f{v}' for k, v in zip(keys, values)])
+        tag_labels, tag_codes = factorize(labels)
+
+        # Any of a trade's rows carries its pnl / rr
+        row_of = np.zeros(len(trade_ids), dtype=np.int64)
+        row_of[trade_codes] = np.arange(len(rows))
+        trade_pnl = np.nan_to_num(np.array(pnl, dtype=float), nan=0.0)[row_of]
+        trade_rr = np.nan_to_num(np.array(rr, dtype=float), nan=0.0)[row_of]
+
+        item_bits = np.zeros((len(tag_labels), (len(trade_ids) + 7) // 8), dtype=np.uint8)
+        np.bitwise_or.at(
+            item_bits, (tag_codes, trade_codes >> 3),
+            np.left_shift(1, trade_codes & 7).astype(np.uint8)
+        )
+        items = [tuple(label.split('\x1f', 1)) for label in tag_labels.tolist()]
+        return cls(items, item_bits, trade_pnl, trade_rr)
+
+    def mask(self, bits):
+        """Boolean trade mask for a bitset."""
+        return np.unpackbits(bits, bitorder='little')[:len(self)].astype(bool)
+
+
+# ─── Apriori ─────────────────────────────────────────────────────────────────
+def frequent_itemsets(item_bits, min_support, size):
+    """
+    All itemsets of exactly ``size`` items present in ``min_support`` trades.
+
+    Returns a dict mapping sorted item-index tuples to their trade bitset.
+    Raises ValueError when a level grows beyond ``MAX_ITEMSETS``.
+    """
+    support = np.bitwise_count(item_bits).sum(axis=1)
+    level = {(int(item),): item_bits[item] for item in np.flatnonzero(support >= min_support)}
+    for k in range(2, size + 1):
+        # Join (k-1)-itemsets that share their first k-2 items
+        groups = {}
+        for itemset in sorted(level):
+            groups.setdefault(itemset[:-1], []).append(itemset[-1])
+
+        candidates = {}
+        for prefix, lasts in groups.items():
+            if len(lasts) < 2:
+                continue
+            stack = np.stack([level[prefix + (last,)] for last in lasts])
+            for i in range(len(lasts) - 1):
+                joined = stack[i + 1:] & stack[i]
+                counts = np.bitwise_count(joined).sum(axis=1)
+                for j in np.flatnonzero(counts >= min_support).tolist():
+                    candidate = prefix + (lasts[i], lasts[i + 1 + j])
+                    # Apriori pruning: every (k-1)-subset must itself be frequent
+                    if any(candidate[:m] + candidate[m + 1:] not in level for m in range(k - 2)):
+                        continue
+                    candidates[candidate] = joined[j]
+                    if len(candidates) > MAX_ITEMSETS:
+                        raise ValueError(
+                            f"More than {MAX_ITEMSETS} combinations of {k} variables; "
+                            "raise min_trades or lower combination_level"
+                        )
+        level = candidates
+        if not level:
+            break
+    return level
+
+
+def _combination_stats(pnl, rr):
+    trades = len(pnl)
+    wins = pnl[pnl > 0]
+    losses = -pnl[pnl < 0]
+    gross_profit = float(wins.sum())
+    gross_loss = float(losses.sum())
+
+    profit_factor = 0.0
+    if gross_loss > 0:
+        profit_factor = gross_profit / gross_loss
+    elif gross_profit > 0:
+        profit_factor = None  # Infinite profit factor
+
+    avg_win = gross_profit / len(wins) if len(wins) else 0.0
+    avg_loss = gross_loss / len(losses) if len(losses) else 0.0
+    decided = len(wins) + len(losses)
+    win_rate = len(wins) / decided * 100 if decided else 0.0
+    expectancy = len(wins) / trades * avg_win - len(losses) / trades * avg_loss
+
+    running = np.cumsum(pnl)
+    peak = np.maximum.accumulate(np.maximum(running, 0.0))
+    max_drawdown = float((peak - running).max())
+
+    return {
+        'trades': trades,
+        'wins': int(len(wins)),
+        'losses': int(len(losses)),
+        'win_rate': round(win_rate, 1),
+        'avg_rr': round(float(rr.sum()) / trades, 2),
+        'pnl': round(float(pnl.sum()), 2),
+        'profit_factor': round(profit_factor, 2) if profit_factor is not None else None,
+        'gross_profit': round(gross_profit, 2),
+        'gross_loss': round(gross_loss, 2),
+        'avg_win': round(avg_win, 2),
+        'avg_loss': round(avg_loss, 2),
+        'max_drawdown': round(max_drawdown, 2),
+        'expectancy': round(expectancy, 2),
+    }
+
+
+def _sort_value(field):
+    def key(combo):
+        value = combo[field]
+        # A profit factor of None means no losing trades, i.e. infinite
+        return float('inf') if value is None else value
+    return key
+
+
+def variable_combinations(user_id, *where, combination_level=2,
+                          min_trades=DEFAULT_MIN_TRADES, top_k=DEFAULT_TOP_K, sort_by='pnl'):
+    """
+    Best-performing combinations of ``combination_level`` variables.
+
+    Args:
+        user_id: owner of the trades
+        *where: extra filters on journal_entry
+        combination_level: number of variables per combination
+        min_trades: minimum number of trades a combination must appear in
+        top_k: maximum number of combinations returned
+        sort_by: one of ``SORT_FIELDS`` (descending)
+
+    Returns:
+        list of combination dicts, best first.
+    """
+    if sort_by not in SORT_FIELDS:
+        raise ValueError(f"sort_by must be one of: {', '.join(SORT_FIELDS)}")
+
+    transactions = TagTransactions.load(user_id, *where)
+    itemsets = frequent_itemsets(transactions.item_bits, max(int(min_trades), 1), combination_level)
+
+    result = []
+    for itemset, bits in itemsets.items():
+        components = sorted(transactions.items[i] for i in itemset)
+        mask = transactions.mask(bits)
+        combo = {'combination': ' | '.join(f'{k}:{v}' for k, v in components)}
+        combo.update(_combination_stats(transactions.pnl[mask], transactions.rr[mask]))
+        combo['variable_components'] = [f'{k}:{v}' for k, v in components]
+        result.append(combo)
+
+    return heapq.nlargest(top_k, result, key=_sort_value(sort_by))
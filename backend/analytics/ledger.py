@@ -0,0 +1,53 @@
+# analytics/ledger.py
+
+"""
+Daily PnL ledger.
+
+``daily_pnl`` holds one row per (user, trading day) with the day's PnL,
+trade / win / loss counts and gross profit / loss.  It is written by
+``analytics.rollups`` on every trade change; this module turns trades into
+per-day totals and reads the ledger back.
+
+A trade's day is the UTC calendar day of ``date`` (``created_at`` when
+missing), the same day the analytics group trades by.
+"""
+
+from sqlalchemy import select
+
+from models import db, DailyPnl
+
+
+LEDGER_MEASURES = ('pnl', 'trades', 'wins', 'losses', 'gross_profit', 'gross_loss')
+
+
+def trade_day(date, created_at=None):
+    value = date or created_at
+    return value.date() if value is not None else None
+
+
+def day_totals(trades):
+    """``{day: [pnl, trades, wins, losses, gross_profit, gross_loss]}`` of ``(day, pnl)`` pairs."""
+    totals = {}
+    for day, pnl in trades:
+        if day is None:
+            continue
+        pnl = float(pnl or 0.0)
+        row = totals.get(day)
+        if row is None:
+            row = totals[day] = [0.0, 0, 0, 0, 0.0, 0.0]
+        row[0] += pnl
+        row[1] += 1
+        if pnl > 0:
+            row[2] += 1
+            row[4] += pnl
+        elif pnl < 0:
+            row[3] += 1
+            row[5] -= pnl
+    return totals
+
+
+def daily_ledger(user_id):
+    """The user's ledger rows in day order."""
+    return db.session.execute(
+        select(DailyPnl).where(DailyPnl.user_id == user_id).order_by(DailyPnl.day)
+    ).scalars().all()
@@ -0,0 +1,150 @@
+# analytics/loader.py
+
+"""
+Columnar trade loader.
+
+Analytics reads only need a handful of scalar columns (pnl, rr, date,
+symbol …), yet ``JournalEntry.query`` hydrates a full ORM object per row,
+including the ``variables`` / ``extra_data`` JSON blobs.  ``load_columns``
+runs a Core ``select`` over just the requested columns and hands the result
+back as numpy arrays, so no ORM identity map, no attribute instrumentation
+and no JSON decoding happens unless a JSON column is explicitly asked for.
+"""
+
+from datetime import timezone
+
+import numpy as np
+from sqlalchemy import select, types
+
+from models import db, JournalEntry
+
+
+# ─── Column conversion ───────────────────────────────────────────────────────
+def _naive_utc(value):
+    """Drop tzinfo (after converting to UTC) so numpy can store the value."""
+    if value is None:
+        return None
+    if getattr(value, 'tzinfo', None) is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def to_datetime64(values):
+    """Convert a sequence of datetimes (or None) to a datetime64[us] array."""
+    return np.array([_naive_utc(v) for v in values], dtype='datetime64[us]')
+
+
+def column_kind(column):
+    """Map a SQLAlchemy column to the numpy kind the loader produces."""
+    col_type = column.type
+    if isinstance(col_type, (types.Float, types.Numeric)):
+        return 'f'
+    if isinstance(col_type, (types.DateTime, types.Date)):
+        return 'M'
+    if isinstance(col_type, types.Boolean):
+        return 'b'
+    if isinstance(col_type, types.Integer):
+        return 'i'
+    return 'O'
+
+
+def to_array(values, kind):
+    """Convert one result column to a numpy array of the given kind."""
+    if kind == 'f':
+        return np.array(values, dtype=float)
+    if kind == 'M':
+        return to_datetime64(values)
+    if kind in ('i', 'b'):
+        if any(v is None for v in values):
+            # Nullable integer columns (e.g. import_batch_id) become float/NaN
+            return np.array([np.nan if v is None else v for v in values], dtype=float)
+        return np.array(values, dtype=np.int64 if kind == 'i' else bool)
+    out = np.empty(len(values), dtype=object)
+    out[:] = values
+    return out
+
+
+# ─── Trade frame ─────────────────────────────────────────────────────────────
+class TradeFrame:
+    """Column-oriented snapshot of trades (one numpy array per field)."""
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def __len__(self):
+        for col in self.columns.values():
+            return len(col)
+        return 0
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    @property
+    def names(self):
+        return list(self.columns)
+
+    @classmethod
+    def from_rows(cls, rows, names, kinds):
+        """Build a frame from result tuples whose fields are ``names``."""
+        values = list(zip(*rows)) if rows else [()] * len(names)
+        return cls({
+            name: to_array(col, kind)
+            for name, col, kind in zip(names, values, kinds)
+        })
+
+    def text(self, name):
+        """String view of an object column with None replaced by ''."""
+        col = self.columns[name]
+        if not len(col):
+            return np.array([], dtype=str)
+        return np.array(['' if v is None else str(v) for v in col], dtype=str)
+
+    def take(self, index):
+        """New frame holding only the rows selected by ``index`` (mask or positions)."""
+        return TradeFrame({name: col[index] for name, col in self.columns.items()})
+
+    def to_records(self):
+        """Pack the frame into one numpy structured array."""
+        dtype = [(name, col.dtype) for name, col in self.columns.items()]
+        records = np.empty(len(self), dtype=dtype)
+        for name, col in self.columns.items():
+            records[name] = col
+        return records
+
+
+# ─── Loader ──────────────────────────────────────────────────────────────────
+def load_columns(columns, *where, order_by=None, model=JournalEntry, **filter_by):
+    """
+    Load ``columns`` of ``model`` into a ``TradeFrame`` without ORM hydration.
+
+    Args:
+        columns: column names, e.g. ``('pnl', 'rr', 'date', 'symbol')``
+        *where: extra SQL expressions, e.g. ``JournalEntry.date >= start``
+        order_by: column name(s) or SQL expression(s) to sort by
+        **filter_by: equality filters, e.g. ``user_id=5``
+
+    Returns:
+        TradeFrame with one numpy array per requested column.
+    """
+    table = model.__table__
+    cols = [table.c[name] for name in columns]
+    stmt = select(*cols)
+    for name, value in filter_by.items():
+        stmt = stmt.where(table.c[name] == value)
+    for clause in where:
+        stmt = stmt.where(clause)
+    if order_by is not None:
+        if not isinstance(order_by, (list, tuple)):
+            order_by = [order_by]
+        stmt = stmt.order_by(*[table.c[o] if isinstance(o, str) else o for o in order_by])
+
+    rows = db.session.execute(stmt).all()
+    return TradeFrame.from_rows(rows, list(columns), [column_kind(c) for c in cols])
+
+
+def load_records(columns, *where, **kwargs):
+    """Same as ``load_columns`` but returns a compact numpy structured array."""
+    return load_columns(columns, *where, **kwargs).to_records()
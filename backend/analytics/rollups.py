@@ -0,0 +1,120 @@
+# analytics/rollups.py
+
+"""
+Write-time maintenance of the pre-aggregated trade tables.
+
+``daily_pnl`` (``analytics.ledger``) and ``trade_cube`` (``analytics.cube``)
+are kept in step with ``journal_entry`` by every write path, inside the
+writer's own transaction:
+
+    add / import      – ``add_trades`` (one upsert per table and chunk)
+    update            – ``move_trade`` (old values out, new values in)
+    delete / purge    – ``remove_trades`` / ``remove_entries``, before the
+                        journal rows go
+
+Trades are passed as dicts of ``ROLLUP_COLUMNS`` (``trade_values(entry)``
+for an ORM entry).  Deltas are applied with ``INSERT … ON CONFLICT DO
+UPDATE`` adding to the stored totals, so concurrent writers never lose an
+update, and rows left without trades are deleted.  ``rebuild_rollups``
+recomputes a user's rows from the trades.
+"""
+
+from sqlalchemy import delete, select
+
+from models import db, DailyPnl, JournalEntry, TradeCube
+from .cube import CUBE_DIMENSIONS, CUBE_MEASURES, cube_totals
+from .ledger import LEDGER_MEASURES, day_totals, trade_day
+
+
+# journal_entry columns the rollups are computed from
+ROLLUP_COLUMNS = ('date', 'created_at', 'symbol', 'strategy', 'direction', 'pnl', 'rr')
+
+
+def trade_values(entry):
+    """The ``ROLLUP_COLUMNS`` of an ORM entry, as a dict."""
+    return {name: getattr(entry, name) for name in ROLLUP_COLUMNS}
+
+
+def _upsert(table, keys, measures, rows):
+    if db.session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    statement = insert(table)
+    db.session.execute(
+        statement.on_conflict_do_update(
+            index_elements=['user_id', *keys],
+            set_={name: table.c[name] + statement.excluded[name] for name in measures}
+        ),
+        rows
+    )
+
+
+def _apply(user_id, trades, sign):
+    trades = list(trades)
+    days = day_totals((trade_day(t['date'], t['created_at']), t['pnl']) for t in trades)
+    cells = cube_totals(trades)
+    if not days:
+        return 0
+
+    ledger, cube = DailyPnl.__table__, TradeCube.__table__
+    _upsert(ledger, ('day',), LEDGER_MEASURES, [
+        {'user_id': user_id, 'day': day, **{name: sign * value for name, value in zip(LEDGER_MEASURES, values)}}
+        for day, values in days.items()
+    ])
+    _upsert(cube, CUBE_DIMENSIONS, CUBE_MEASURES, [
+        {'user_id': user_id, **dict(zip(CUBE_DIMENSIONS, key)),
+         **{name: sign * value for name, value in zip(CUBE_MEASURES, values)}}
+        for key, values in cells.items()
+    ])
+    if sign < 0:
+        touched = list(days)
+        for table in (ledger, cube):
+            db.session.execute(delete(table).where(
+                table.c.user_id == user_id, table.c.day.in_(touched), table.c.trades <= 0
+            ))
+    return len(days)
+
+
+def add_trades(user_id, trades):
+    """Add trade dicts to the user's rollups; returns the number of days touched."""
+    return _apply(user_id, trades, 1)
+
+
+def remove_trades(user_id, trades):
+    """Take trade dicts back out of the user's rollups."""
+    return _apply(user_id, trades, -1)
+
+
+def move_trade(user_id, old, new):
+    """Replace one trade's values in the rollups (after an edit)."""
+    if old != new:
+        remove_trades(user_id, [old])
+        add_trades(user_id, [new])
+
+
+def _entry_rows(*where):
+    columns = [JournalEntry.user_id] + [getattr(JournalEntry, name) for name in ROLLUP_COLUMNS]
+    for row in db.session.execute(select(*columns).where(*where)):
+        yield row[0], dict(zip(ROLLUP_COLUMNS, row[1:]))
+
+
+def remove_entries(*where):
+    """Take the journal entries matching ``where`` out of their owners' rollups."""
+    by_user = {}
+    for user_id, trade in _entry_rows(*where):
+        by_user.setdefault(user_id, []).append(trade)
+    for user_id, trades in by_user.items():
+        remove_trades(user_id, trades)
+
+
+def delete_rollups(user_id):
+    for model in (DailyPnl, TradeCube):
+        db.session.execute(delete(model).where(model.user_id == user_id))
+
+
+def rebuild_rollups(user_id):
+    """Recompute the user's ledger and cube rows from their trades."""
+    delete_rollups(user_id)
+    return add_trades(user_id, [trade for _, trade in _entry_rows(JournalEntry.user_id == user_id)])
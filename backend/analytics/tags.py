@@ -0,0 +1,254 @@
+# analytics/tags.py
+
+"""
+Normalized trade-variable tags.
+
+Every journal entry's ``variables`` (and variable-like ``extra_data`` keys)
+are flattened into ``trade_variable`` rows — one per (key, value) — when the
+entry is added, updated or imported.  Tag analytics then group and filter
+with SQL over the ``(user_id, key, value)`` index instead of decoding and
+walking the JSON of every trade.
+
+All ``variables`` keys are stored, including system-looking ones such as
+``trade_hour``, so key breakdowns and the report keep working for them;
+variables analysis leaves those out at query time (``user_variable_tags``).
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import and_, case, func, select
+
+from models import db, JournalEntry, TradeVariable
+from .downsample import downsample_points
+
+
+# Keys that describe the trade itself rather than a user variable
+SYSTEM_FIELDS = {
+    'trade_hour', 'trade_day', 'trade_week', 'trade_month', 'trade_year',
+    'entry_time', 'exit_time', 'duration', 'trade_id', 'import_batch_id'
+}
+CORE_FIELDS = {
+    'id', 'symbol', 'direction', 'entry_price', 'exit_price', 'quantity',
+    'date', 'time', 'pnl', 'rr', 'notes', 'created_at', 'updated_at'
+}
+SYSTEM_PREFIXES = ('_', 'unused', 'temp', 'meta', 'trade_', 'time_')
+# extra_data keys containing these look like imported trade fields, not variables
+EXTRA_DATA_EXCLUDED = ('id', 'price', 'time', 'date', 'pnl', 'rr')
+
+MAX_KEY_LENGTH = 64
+MAX_VALUE_LENGTH = 255
+
+
+# ─── Extraction ──────────────────────────────────────────────────────────────
+def _clean_values(value):
+    """Return the non-empty, stripped string values of a scalar or list."""
+    items = value if isinstance(value, (list, tuple)) else [value]
+    cleaned = []
+    for item in items:
+        if item is None or item == '':
+            continue
+        text = str(item).strip()
+        if text:
+            cleaned.append(text[:MAX_VALUE_LENGTH])
+    return cleaned
+
+
+def _is_variable_key(key):
+    return bool(key) and key not in SYSTEM_FIELDS and not key.startswith(SYSTEM_PREFIXES)
+
+
+def user_variable_tags():
+    """SQL filter on ``trade_variable`` leaving out system keys (``trade_hour``, ``_…``)."""
+    key = TradeVariable.key
+    return and_(key.not_in(SYSTEM_FIELDS),
+                *[~key.startswith(prefix, autoescape=True) for prefix in SYSTEM_PREFIXES])
+
+
+def extract_tags(variables, extra_data=None):
+    """
+    Flatten an entry's variables into unique ``(key, value)`` pairs.
+
+    Keys are lower-cased; values are stripped strings (list values give one
+    pair per item).  Every ``variables`` key is kept; ``extra_data`` only
+    contributes keys that are not in ``variables`` and do not look like trade
+    or system fields.
+    """
+    tags = {}
+    if isinstance(variables, dict):
+        for k, v in variables.items():
+            key = str(k).strip().lower()[:MAX_KEY_LENGTH]
+            if key:
+                values = _clean_values(v)
+                if values:
+                    tags[key] = values
+
+    if isinstance(extra_data, dict):
+        for k, v in extra_data.items():
+            key = str(k).strip().lower()[:MAX_KEY_LENGTH]
+            if key in tags or key in CORE_FIELDS or not _is_variable_key(key):
+                continue
+            if any(part in key for part in EXTRA_DATA_EXCLUDED):
+                continue
+            values = _clean_values(v)
+            if values:
+                tags[key] = values
+
+    pairs, seen = [], set()
+    for key, values in tags.items():
+        for value in values:
+            if (key, value) not in seen:
+                seen.add((key, value))
+                pairs.append((key, value))
+    return pairs
+
+
+def build_tags(user_id, variables, extra_data=None):
+    """``TradeVariable`` objects for assigning to ``JournalEntry.tags``."""
+    return [
+        TradeVariable(user_id=user_id, key=key, value=value)
+        for key, value in extract_tags(variables, extra_data)
+    ]
+
+
+def tag_rows(entry_id, user_id, variables, extra_data=None):
+    """Plain dicts for a Core ``insert(TradeVariable)`` executemany."""
+    return [
+        {'entry_id': entry_id, 'user_id': user_id, 'key': key, 'value': value}
+        for key, value in extract_tags(variables, extra_data)
+    ]
+
+
+# ─── SQL aggregates ──────────────────────────────────────────────────────────
+def _tagged_trades():
+    tv, je = TradeVariable.__table__, JournalEntry.__table__
+    return tv, je, tv.join(je, je.c.id == tv.c.entry_id)
+
+
+def tag_aggregates(user_id, *where, key=None, loss_includes_zero=False):
+    """
+    Additive per-(key, value) measures computed with one GROUP BY.
+
+    Args:
+        user_id: owner of the trades
+        *where: extra filters on journal_entry / trade_variable, e.g.
+            ``JournalEntry.date >= start`` or ``user_variable_tags()``
+        key: restrict to one variable key
+        loss_includes_zero: count break-even trades as losses
+
+    Returns:
+        list of dicts in first-tagged order with trades, wins, losses, pnl,
+        rr, gross_profit, gross_loss, win_sq, loss_sq, max_win, min_loss,
+        max_loss, first_date and last_date.
+    """
+    tv, je, joined = _tagged_trades()
+    pnl = je.c.pnl
+    is_win = pnl > 0
+    is_loss = (pnl <= 0) if loss_includes_zero else (pnl < 0)
+
+    stmt = (
+        select(
+            tv.c.key,
+            tv.c.value,
+            func.count().label('trades'),
+            func.sum(case((is_win, 1), else_=0)).label('wins'),
+            func.sum(case((is_loss, 1), else_=0)).label('losses'),
+            func.sum(func.coalesce(pnl, 0.0)).label('pnl'),
+            func.sum(func.coalesce(je.c.rr, 0.0)).label('rr'),
+            func.sum(case((is_win, pnl), else_=0.0)).label('gross_profit'),
+            func.sum(case((is_loss, -pnl), else_=0.0)).label('gross_loss'),
+            func.sum(case((is_win, pnl * pnl), else_=0.0)).label('win_sq'),
+            func.sum(case((is_loss, pnl * pnl), else_=0.0)).label('loss_sq'),
+            func.max(case((is_win, pnl))).label('max_win'),
+            func.min(case((is_loss, -pnl))).label('min_loss'),
+            func.max(case((is_loss, -pnl))).label('max_loss'),
+            func.min(je.c.date).label('first_date'),
+            func.max(je.c.date).label('last_date'),
+        )
+        .select_from(joined)
+        .where(tv.c.user_id == user_id, *where)
+        .group_by(tv.c.key, tv.c.value)
+        .order_by(func.min(tv.c.id))
+    )
+    if key is not None:
+        stmt = stmt.where(tv.c.key == key.lower())
+    return [dict(row._mapping) for row in db.session.execute(stmt)]
+
+
+def tag_breakdown(user_id):
+    """Per tag key, per label: trades, win rate, avg pnl and avg rr."""
+    groups = {}
+    for agg in tag_aggregates(user_id):
+        tr = agg['trades']
+        groups.setdefault(agg['key'], []).append({
+            'label': agg['value'],
+            'trades': tr,
+            'win_rate': round((agg['wins'] / tr * 100) if tr else 0.0, 1),
+            'avg_pnl': round(agg['pnl'] / tr if tr else 0.0, 2),
+            'avg_rr': round(agg['rr'] / tr if tr else 0.0, 2)
+        })
+
+    tag_stats = []
+    for k, items in groups.items():
+        items.sort(key=lambda x: x['trades'], reverse=True)
+        tag_stats.append({'tag': k, 'items': items})
+    tag_stats.sort(key=lambda grp: sum(i['trades'] for i in grp['items']), reverse=True)
+    return tag_stats
+
+
+def tag_series(user_id, *where, key=None, max_points=None, method='lttb'):
+    """
+    Per-(key, value) cumulative PnL series and max drawdown.
+
+    Reads only (key, value, entry id, pnl, date) for tagged trades in date
+    order and computes the running sums group-wise with pandas.  With
+    ``max_points`` each series is downsampled (the drawdown is not).
+
+    Returns:
+        (series, tagged_entries) where ``series`` maps (key, value) to
+        ``{'points': [{'date', 'value'}, …], 'max_drawdown': float}`` and
+        ``tagged_entries`` is the number of distinct trades with any tag.
+    """
+    tv, je, joined = _tagged_trades()
+    stmt = (
+        select(tv.c.key, tv.c.value, je.c.id, je.c.pnl, je.c.date)
+        .select_from(joined)
+        .where(tv.c.user_id == user_id, *where)
+        .order_by(je.c.date, je.c.id)
+    )
+    if key is not None:
+        stmt = stmt.where(tv.c.key == key.lower())
+    rows = db.session.execute(stmt).all()
+    if not rows:
+        return {}, 0
+
+    keys, values, ids, pnl, dates = zip(*rows)
+    frame = pd.DataFrame({
+        'key': keys,
+        'value': values,
+        'pnl': np.nan_to_num(np.array(pnl, dtype=float), nan=0.0),
+    })
+    grouped = frame.groupby(['key', 'value'], sort=False)['pnl']
+    running = grouped.cumsum()
+    peak = running.groupby([frame['key'], frame['value']], sort=False).cummax().clip(lower=0.0)
+    drawdown = (peak - running).groupby([frame['key'], frame['value']], sort=False).max()
+
+    series = {}
+    for tag, date, value in zip(zip(keys, values), dates, np.round(running.to_numpy(), 2).tolist()):
+        entry = series.get(tag)
+        if entry is None:
+            entry = series[tag] = {'points': [], 'max_drawdown': float(drawdown[tag])}
+        entry['points'].append({'date': date.isoformat() if date else None, 'value': value})
+    if max_points is not None:
+        for entry in series.values():
+            entry['points'] = downsample_points(entry['points'], max_points, method)
+    return series, len(set(ids))
+
+
+def spread(sum_sq, total, count):
+    """Population standard deviation from a sum of squares and a sum."""
+    if not count:
+        return 0.0
+    mean = total / count
+    return math.sqrt(max(sum_sq / count - mean * mean, 0.0))
@@ -0,0 +1,145 @@
+# analytics/timeparts.py
+
+"""
+Precomputed time dimensions of trades.
+
+Next to ``date`` every journal entry stores integer columns derived from its
+trade time (``trade_moment``) in its owner's timezone (``User.timezone``):
+
+    trade_epoch   Unix seconds of the trade time (stored dates are naive UTC)
+    local_hour    0–23
+    weekday       Monday=0 … Sunday=6
+    year_week     ISO year * 100 + ISO week, e.g. 202452
+    year_month    year * 100 + month, e.g. 202412
+
+They are written with the entry (add / import) and rewritten for all of a
+user's trades when the timezone changes, so time-bucketed analytics GROUP
+BY indexed integers instead of calling datetime methods on every row.
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import bindparam, case, column, func, select, table
+
+from models import db, JournalEntry, User
+from .loader import _naive_utc
+
+
+DEFAULT_TIMEZONE = 'UTC'
+TIME_COLUMNS = ('trade_epoch', 'local_hour', 'weekday', 'year_week', 'year_month')
+
+
+def resolve_timezone(name):
+    """``ZoneInfo`` for an IANA name; raises ValueError for unknown names."""
+    try:
+        return ZoneInfo(name or DEFAULT_TIMEZONE)
+    except (KeyError, ValueError):
+        raise ValueError(f'Unknown timezone: {name}')
+
+
+def user_timezone(user_id):
+    name = db.session.execute(select(User.timezone).where(User.id == user_id)).scalar()
+    try:
+        return resolve_timezone(name)
+    except ValueError:
+        return resolve_timezone(DEFAULT_TIMEZONE)
+
+
+def trade_moment(trade_date, created_at=None):
+    """
+    The time a trade happened.  JSON imports store ``date`` as a bare day
+    (midnight) and keep the time of day in ``created_at``; for those the
+    day of ``date`` is combined with the time of ``created_at`` when both
+    fall on the same day.
+    """
+    if trade_date is None:
+        return created_at
+    if created_at is None:
+        return trade_date
+    trade_date, created_at = _naive_utc(trade_date), _naive_utc(created_at)
+    if trade_date.time() == time.min and created_at.date() == trade_date.date():
+        return datetime.combine(trade_date.date(), created_at.time())
+    return trade_date
+
+
+def time_parts(moment, tz):
+    """``TIME_COLUMNS`` of one trade time, as a dict (all None without a time)."""
+    if moment is None:
+        return dict.fromkeys(TIME_COLUMNS)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    local = moment.astimezone(tz)
+    iso = local.isocalendar()
+    return {
+        'trade_epoch': int(moment.timestamp()),
+        'local_hour': local.hour,
+        'weekday': local.weekday(),
+        'year_week': iso.year * 100 + iso.week,
+        'year_month': local.year * 100 + local.month,
+    }
+
+
+def set_time_parts(entry, tz=None):
+    """Fill an ORM entry's time columns from its ``date`` (see ``trade_moment``)."""
+    parts = time_parts(trade_moment(entry.date, entry.created_at), tz or user_timezone(entry.user_id))
+    for name, value in parts.items():
+        setattr(entry, name, value)
+
+
+def time_parts_update():
+    """
+    executemany-able UPDATE of the time columns by ``entry_id``; a plain
+    table clause, so ``updated_at`` is not bumped.
+    """
+    entries = table('journal_entry', column('id'), *[column(name) for name in TIME_COLUMNS])
+    return entries.update().where(entries.c.id == bindparam('entry_id')).values(
+        {name: bindparam(name) for name in TIME_COLUMNS}
+    )
+
+
+def refresh_time_parts(user_id, tz=None):
+    """Recompute the time columns of every trade of the user (after a timezone change)."""
+    tz = tz or user_timezone(user_id)
+    rows = db.session.execute(
+        select(JournalEntry.id, JournalEntry.date, JournalEntry.created_at)
+        .where(JournalEntry.user_id == user_id)
+    ).all()
+    if rows:
+        db.session.execute(time_parts_update(), [
+            {'entry_id': entry_id, **time_parts(trade_moment(trade_date, created_at), tz)}
+            for entry_id, trade_date, created_at in rows
+        ])
+    return len(rows)
+
+
+# ─── Aggregates ──────────────────────────────────────────────────────────────
+def bucket_totals(user_id, columns=(), *where):
+    """
+    trades / wins / pnl of the user's trades grouped by ``columns``
+    (``JournalEntry`` columns, e.g. ``JournalEntry.year_week``), in column
+    order; one dict per group.
+    """
+    rows = db.session.execute(
+        select(
+            *columns,
+            func.count().label('trades'),
+            func.sum(case((JournalEntry.pnl > 0, 1), else_=0)).label('wins'),
+            func.sum(func.coalesce(JournalEntry.pnl, 0.0)).label('pnl'),
+        )
+        .where(JournalEntry.user_id == user_id, *where)
+        .group_by(*columns)
+        .order_by(*columns)
+    ).all()
+    return [dict(row._mapping) for row in rows if row.trades]
+
+
+# ─── Labels ──────────────────────────────────────────────────────────────────
+def week_start(year_week):
+    """Monday of an ISO ``year_week``."""
+    return date.fromisocalendar(year_week // 100, year_week % 100, 1)
+
+
+def week_range(year_week):
+    start = week_start(year_week)
+    return start, start + timedelta(days=6)
@@ -5,6 +5,8 @@ from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from models import db
 from config import Config
+from database import init_database
+from migrations import upgrade_database, register_migration_commands
 
 # 1️⃣ Import the Blueprint objects by name:
 from routes.auth_routes import auth_bp
@@ -21,15 +23,22 @@ app.config.from_object(Config)
 # JWT setup
 jwt = JWTManager(app)
 
-# DB setup
-db.init_app(app)
+# DB setup (engine profile and pool from config, see database.py)
+init_database(app)
+
+# Schema migrations: `flask db-upgrade` (run before gunicorn in deployments);
+# AUTO_MIGRATE=1 also applies them on import
+register_migration_commands(app)
+if app.config.get('AUTO_MIGRATE'):
+    with app.app_context():
+        upgrade_database()
 
 # CORS setup - Very permissive configuration for development
 app.config['CORS_HEADERS'] = 'Content-Type, Authorization'
 app.config['CORS_ORIGINS'] = '*'
 app.config['CORS_METHODS'] = ['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS', 'PATCH']
-app.config['CORS_ALLOW_HEADERS'] = ['Content-Type', 'Authorization', 'X-Requested-With']
-app.config['CORS_EXPOSE_HEADERS'] = ['Content-Type', 'X-Total-Count']
+app.config['CORS_ALLOW_HEADERS'] = ['Content-Type', 'Authorization', 'X-Requested-With', 'If-None-Match']
+app.config['CORS_EXPOSE_HEADERS'] = ['Content-Type', 'X-Total-Count', 'X-Next-Cursor', 'Link', 'ETag']
 app.config['CORS_SUPPORTS_CREDENTIALS'] = True
 
 cors = CORS()
@@ -95,7 +104,7 @@ def options_handler(path):
     origin = request.headers.get('Origin', '*')
     response.headers['Access-Control-Allow-Origin'] = origin
     response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS, PATCH'
-    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, X-Requested-With'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, X-Requested-With, If-None-Match'
     response.headers['Access-Control-Allow-Credentials'] = 'true'
     response.headers['Access-Control-Max-Age'] = '600'
     response.headers['Vary'] = 'Origin'
@@ -103,7 +112,7 @@ def options_handler(path):
 
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
-        print("✅ Tables created:", db.metadata.tables.keys())
+        upgrade_database()
+        print("✅ Tables ready:", db.metadata.tables.keys())
     app.run(debug=True, host='0.0.0.0', port=5000)
 
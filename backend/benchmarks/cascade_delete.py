@@ -0,0 +1,135 @@
+# benchmarks/cascade_delete.py
+
+"""
+Benchmark deleting a large import batch / user: ORM cascade vs set-based.
+
+Run from the backend directory:
+
+    python -m benchmarks.cascade_delete [--rows 100000]
+
+Each case seeds a fresh temporary SQLite database with one user holding a
+``--rows`` trade import (two tags per trade) plus a small second batch,
+deletes the big batch (or the whole user) and checks that exactly the
+same rows survive either way.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import func, select
+
+from ingest import BulkImporter
+from models import db, User, ImportBatch, JournalEntry, TradeVariable
+from purge import purge_import_batch, purge_user
+
+
+def make_app(path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + path
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def seed_batch(user_id, rows, seed):
+    rnd = random.Random(seed)
+    batch = ImportBatch(user_id=user_id, filename=f'bench_{rows}.csv', filepath='', status='running')
+    db.session.add(batch)
+    db.session.commit()
+    importer = BulkImporter(user_id, batch.id, chunk_size=5000)
+    start = datetime(2020, 1, 1)
+    for i in range(rows):
+        importer.add({
+            'symbol': rnd.choice(['EURUSD', 'BTCUSD', 'ES', 'NQ']),
+            'direction': rnd.choice(['long', 'short']),
+            'pnl': round(rnd.uniform(-200, 250), 2),
+            'date': start + timedelta(minutes=17 * i),
+            'variables': {'setup': rnd.choice(['breakout', 'pullback', 'range']),
+                          'session': rnd.choice(['london', 'ny', 'asia'])},
+        })
+    importer.finish()
+    return batch.id
+
+
+def seed(rows):
+    user = User(email='bench@example.com', password='x')
+    db.session.add(user)
+    db.session.commit()
+    big = seed_batch(user.id, rows, seed=1)
+    seed_batch(user.id, max(rows // 100, 10), seed=2)
+    return user.id, big
+
+
+def counts():
+    return tuple(
+        db.session.execute(select(func.count()).select_from(model)).scalar()
+        for model in (User, ImportBatch, JournalEntry, TradeVariable)
+    )
+
+
+def legacy_delete_batch(user_id, batch_id):
+    db.session.delete(db.session.get(ImportBatch, batch_id))
+    db.session.commit()
+
+
+def set_based_delete_batch(user_id, batch_id):
+    purge_import_batch(batch_id)
+    db.session.commit()
+
+
+def legacy_delete_user(user_id, batch_id):
+    db.session.delete(db.session.get(User, user_id))
+    db.session.commit()
+
+
+def set_based_delete_user(user_id, batch_id):
+    purge_user(user_id)
+    db.session.commit()
+
+
+def run(delete, rows):
+    """Seed a fresh database, time ``delete`` and return (seconds, surviving counts)."""
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        app = make_app(path)
+        with app.app_context():
+            db.create_all()
+            user_id, batch_id = seed(rows)
+            db.session.expunge_all()
+            started = time.perf_counter()
+            delete(user_id, batch_id)
+            elapsed = time.perf_counter() - started
+            remaining = counts()
+            db.session.remove()
+            db.engine.dispose()
+        return elapsed, remaining
+    finally:
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"Import batch of {args.rows} trades, 2 tags each")
+    for label, legacy, set_based in (
+        ('delete batch', legacy_delete_batch, set_based_delete_batch),
+        ('delete user ', legacy_delete_user, set_based_delete_user),
+    ):
+        legacy_time, legacy_left = run(legacy, args.rows)
+        set_time, set_left = run(set_based, args.rows)
+        if legacy_left != set_left:
+            raise AssertionError(f"{label}: surviving rows differ: {legacy_left} vs {set_left}")
+        print(f"{label}: ORM cascade {legacy_time:8.3f}s   set-based {set_time:8.3f}s   "
+              f"speed-up {legacy_time / set_time:6.1f}x   (left: users/batches/trades/tags = {set_left})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+# benchmarks/concurrent_reads.py
+
+"""
+Benchmark read latency while a bulk import is writing, per SQLite profile.
+
+Run from the backend directory:
+
+    python -m benchmarks.concurrent_reads [--rows 100000] [--readers 4] [--seed-rows 5000]
+
+Each profile (``default`` = rollback journal, ``production`` = WAL etc., see
+``database.py``) gets a fresh temporary database with one user holding
+``--seed-rows`` trades.  ``--readers`` processes (like gunicorn workers)
+then repeatedly load that user's trades and sum their PnL while the main
+process imports ``--rows`` trades for a second user through
+``BulkImporter``.  Reported per profile:
+import duration, reads completed, read latency percentiles and reads that
+failed (e.g. "database is locked").
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from flask import Flask
+from sqlalchemy import func, select
+
+from database import SQLITE_PROFILES, init_database
+from ingest import BulkImporter
+from models import db, User, ImportBatch, JournalEntry
+
+
+def make_app(path, profile, pool_size):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + path
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLITE_PROFILE'] = profile
+    app.config['DB_POOL_SIZE'] = pool_size
+    init_database(app)
+    return app
+
+
+def trade(rnd, start, i):
+    return {
+        'symbol': rnd.choice(['EURUSD', 'BTCUSD', 'ES', 'NQ']),
+        'direction': rnd.choice(['long', 'short']),
+        'pnl': round(rnd.uniform(-200, 250), 2),
+        'date': start + timedelta(minutes=17 * i),
+        'variables': {'setup': rnd.choice(['breakout', 'pullback', 'range'])},
+    }
+
+
+def import_trades(user_id, rows, seed, chunk_size):
+    rnd = random.Random(seed)
+    batch = ImportBatch(user_id=user_id, filename=f'bench_{rows}.csv', filepath='', status='running')
+    db.session.add(batch)
+    db.session.commit()
+    importer = BulkImporter(user_id, batch.id, chunk_size=chunk_size)
+    start = datetime(2020, 1, 1)
+    for i in range(rows):
+        importer.add(trade(rnd, start, i))
+    return importer.finish()
+
+
+def seed(seed_rows):
+    users = [User(email='reader@example.com', password='x'), User(email='writer@example.com', password='x')]
+    db.session.add_all(users)
+    db.session.commit()
+    import_trades(users[0].id, seed_rows, seed=1, chunk_size=5000)
+    return users[0].id, users[1].id
+
+
+def read_once(user_id):
+    """One analytics-style read: the user's trades plus an aggregate."""
+    rows = db.session.execute(
+        select(JournalEntry.id, JournalEntry.pnl, JournalEntry.date)
+        .where(JournalEntry.user_id == user_id)
+    ).all()
+    total = db.session.execute(
+        select(func.sum(JournalEntry.pnl)).where(JournalEntry.user_id == user_id)
+    ).scalar()
+    db.session.remove()
+    return len(rows), total
+
+
+def reader(path, profile, user_id, start, stop, results):
+    app = make_app(path, profile, pool_size=1)
+    latencies, errors = [], []
+    with app.app_context():
+        start.wait()
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                read_once(user_id)
+            except Exception as e:
+                db.session.remove()
+                errors.append(str(e).splitlines()[0])
+                continue
+            latencies.append(time.perf_counter() - started)
+        db.engine.dispose()
+    results.put((latencies, errors))
+
+
+def run(profile, args):
+    handle, path = tempfile.mkstemp(suffix='.db')
+    os.close(handle)
+    try:
+        app = make_app(path, profile, pool_size=1)
+        with app.app_context():
+            db.create_all()
+            reader_id, writer_id = seed(args.seed_rows)
+            db.engine.dispose()
+
+        context = multiprocessing.get_context('spawn')
+        start, stop, results = context.Event(), context.Event(), context.Queue()
+        processes = [
+            context.Process(target=reader, args=(path, profile, reader_id, start, stop, results))
+            for _ in range(args.readers)
+        ]
+        for process in processes:
+            process.start()
+        start.set()
+
+        started = time.perf_counter()
+        with app.app_context():
+            summary = import_trades(writer_id, args.rows, seed=2, chunk_size=args.chunk_size)
+            db.engine.dispose()
+        import_seconds = time.perf_counter() - started
+
+        stop.set()
+        latencies, errors = [], []
+        for _ in processes:
+            process_latencies, process_errors = results.get()
+            latencies += process_latencies
+            errors += process_errors
+        for process in processes:
+            process.join()
+
+        during = np.array(latencies or [0.0]) * 1000
+        return {
+            'import_s': import_seconds,
+            'inserted': summary['inserted_count'],
+            'reads': len(latencies),
+            'p50_ms': float(np.percentile(during, 50)),
+            'p95_ms': float(np.percentile(during, 95)),
+            'max_ms': float(during.max()),
+            'errors': len(errors),
+            'first_error': errors[0] if errors else '',
+        }
+    finally:
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=100000, help='trades imported while reading')
+    parser.add_argument('--seed-rows', type=int, default=5000, help="trades of the user being read")
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--profiles', default=','.join(reversed(SQLITE_PROFILES)))
+    args = parser.parse_args()
+
+    print(f'{args.rows} imported trades, {args.readers} readers over {args.seed_rows} trades')
+    print(f"{'profile':<12}{'import s':>10}{'reads':>8}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'errors':>8}")
+    for profile in args.profiles.split(','):
+        result = run(profile, args)
+        print(f"{profile:<12}{result['import_s']:>10.2f}{result['reads']:>8}{result['p50_ms']:>9.1f}"
+              f"{result['p95_ms']:>9.1f}{result['max_ms']:>9.1f}{result['errors']:>8}")
+        if result['first_error']:
+            print(f'    first error: {result["first_error"]}')
+        assert result['inserted'] == args.rows, result
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+# benchmarks/parse_trades.py
+
+"""
+Benchmark ``parse_trades_dataframe`` against the previous per-row
+``iterrows`` implementation (kept below verbatim as the baseline).
+
+Run from the backend directory:
+
+    python -m benchmarks.parse_trades [--rows 20000] [--variables 50] [--repeat 3]
+
+Both parsers must produce identical trades for the generated broker export.
+"""
+
+import argparse
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from ingest import parse_trades_dataframe
+
+
+def legacy_parse_trades_dataframe(df):
+    """Parse a pandas DataFrame into a list[dict] trade objects.
+    We attempt to map common broker column names to our internal fields.
+    Unknown columns are stored in `extra_data` or as variables.
+    """
+    # Make a copy to avoid modifying the original
+    df = df.copy()
+    
+    # Store original column names for reference
+    original_headers = {col.lower(): col for col in df.columns}
+    
+    # Normalise headers (strip, lower) for processing
+    df.columns = [c.strip().lower() for c in df.columns]
+
+    # Heuristic mapping - only for core fields that we need to identify
+    core_fields = {
+        'symbol': ['symbol', 'pair', 'instrument'],
+        'direction': ['type', 'side', 'direction'],
+        'entry_price': ['entry price', 'open', 'open price', 'price open'],
+        'exit_price': ['exit price', 'close', 'close price', 'price close'],
+        'quantity': ['volume', 'qty', 'size', 'lots', 'quantity'],
+        'date': ['date', 'open time', 'entry time', 'datetime', 'trade time', 'close time'],
+        'time': ['time', 'entry time', 'close time', 'hour', 'trade time'],
+        'pnl': ['pnl', 'profit', 'net profit', 'p&l'],
+        'rr': ['rr', 'r:r', 'riskreward', 'risk reward', 'risk/reward'],
+    }
+    
+    # Fields that should be excluded from variables
+    excluded_from_vars = set()
+    for field, aliases in core_fields.items():
+        excluded_from_vars.update(aliases)
+    excluded_from_vars.update(['id', 'notes', 'tags', 'variables', 'extra_data', 'created_at', 'updated_at'])
+
+    # Build reverse lookup for core fields
+    reverse_lookup = {}
+    for k, aliases in core_fields.items():
+        for alias in aliases:
+            reverse_lookup[alias] = k
+
+    # Try to automatically detect date/time columns
+    date_columns = []
+    time_columns = []
+    datetime_columns = []
+    
+    for col in df.columns:
+        col_lower = col.lower()
+        if any(x in col_lower for x in ['date', 'time', 'datetime']):
+            # Check if column contains datetime strings
+            sample = df[col].dropna().head(10).astype(str)
+            if sample.empty:
+                continue
+                
+            # Check for datetime format (e.g., '2023-01-01 14:30:00')
+            if sample.str.match(r'\d{4}[-/]\d{1,2}[-/]\d{1,2}[T\s]\d{1,2}:\d{2}(?::\d{2})?(?:\.\d+)?(?:[+-]\d{2}:?\d{2}|Z)?').any():
+                datetime_columns.append(col)
+            # Check for date format (e.g., '2023-01-01')
+            elif sample.str.match(r'\d{4}[-/]\d{1,2}[-/]\d{1,2}').any():
+                date_columns.append(col)
+            # Check for time format (e.g., '14:30:00')
+            elif sample.str.match(r'\d{1,2}:\d{2}(?::\d{2})?(?:\.\d+)?').any():
+                time_columns.append(col)
+
+    trades = []
+    for _, row in df.iterrows():
+        trade = {
+            'symbol': None,
+            'direction': None,
+            'entry_price': None,
+            'exit_price': None,
+            'quantity': 1.0,
+            'date': None,
+            'time': None,
+            'datetime': None,
+            'pnl': None,
+            'rr': None,
+            'extra_data': {},
+            'variables': {}
+        }
+        
+        # Map known columns and collect variables
+        for col in df.columns:
+            if pd.isna(row[col]) or row[col] == '':
+                continue
+                
+            col_lower = col.lower()
+            
+            # Check if this is a core field
+            if col_lower in reverse_lookup:
+                field = reverse_lookup[col_lower]
+                trade[field] = row[col]
+            # Only include non-core, non-excluded fields as variables
+            elif col_lower not in excluded_from_vars:
+                # Use the original column name from the import file and convert to lowercase
+                original_col = original_headers.get(col, col).lower()
+                # Convert the value to lowercase if it's a string, or process lists of strings
+                if isinstance(row[col], str):
+                    trade['variables'][original_col] = row[col].lower() if pd.notna(row[col]) and str(row[col]).strip() else row[col]
+                elif isinstance(row[col], list):
+                    # Handle lists of strings
+                    trade['variables'][original_col] = [
+                        str(item).lower().strip() 
+                        for item in row[col] 
+                        if pd.notna(item) and str(item).strip()
+                    ]
+                else:
+                    trade['variables'][original_col] = row[col]
+            else:
+                # Store in extra_data
+                trade['extra_data'][col] = row[col]
+        
+        # Handle date/time parsing
+        if 'datetime' not in trade or not trade['datetime']:
+            # Try to combine separate date and time columns
+            date_val = trade.get('date')
+            time_val = trade.get('time')
+            
+            if date_val and time_val:
+                try:
+                    # Convert to string in case they're pandas Timestamp objects
+                    date_str = str(date_val).strip()
+                    time_str = str(time_val).strip()
+                    
+                    # Handle different date formats
+                    if 'T' in date_str:  # ISO format
+                        trade['datetime'] = date_str
+                    else:
+                        # Combine date and time
+                        trade['datetime'] = f"{date_str} {time_str}"
+                except Exception as e:
+                    print(f"Error combining date and time: {e}")
+                    trade['datetime'] = str(date_val)
+        
+        # If we still don't have a datetime, try to parse the date
+        if 'datetime' not in trade or not trade['datetime']:
+            if 'date' in trade and trade['date']:
+                trade['datetime'] = str(trade['date'])
+        
+        # Clean up the trade dictionary
+        if 'date' in trade and not trade['date']:
+            del trade['date']
+        if 'time' in trade and not trade['time']:
+            del trade['time']
+            
+        trades.append(trade)
+    
+    return trades
+
+
+def broker_export(rows, variables, seed=0):
+    """A synthetic broker export with the usual core columns plus variables."""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('2023-01-02T09:30')
+    opened = start + rng.integers(0, 365 * 24 * 60, rows).astype('timedelta64[m]')
+    frame = {
+        'Symbol': rng.choice(['ES', 'NQ', 'EURUSD', 'btc/usd'], rows),
+        'Side': rng.choice(['Buy', 'Sell'], rows),
+        'Open Price': rng.uniform(10, 5000, rows).round(2),
+        'Close Price': rng.uniform(10, 5000, rows).round(2),
+        'Qty': rng.integers(1, 10, rows),
+        'Date': pd.Series(opened).dt.strftime('%Y-%m-%d'),
+        'Time': pd.Series(opened).dt.strftime('%H:%M:%S'),
+        'Profit': rng.normal(0, 150, rows).round(2),
+        'Notes': np.where(rng.random(rows) < 0.3, 'reviewed', None),
+    }
+    for v in range(variables):
+        values = rng.choice(['Breakout', 'Pullback', 'Range', ' ', ''], rows).astype(object)
+        values[rng.random(rows) < 0.2] = None
+        frame[f'Var {v}'] = values
+    return pd.DataFrame(frame)
+
+
+def _same(a, b):
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return a == b
+
+
+def check_equal(expected, actual):
+    assert len(expected) == len(actual), (len(expected), len(actual))
+    for i, (x, y) in enumerate(zip(expected, actual)):
+        assert x.keys() == y.keys(), (i, x.keys(), y.keys())
+        for key in x:
+            if isinstance(x[key], dict):
+                assert x[key].keys() == y[key].keys(), (i, key)
+                assert all(_same(x[key][k], y[key][k]) for k in x[key]), (i, key)
+            else:
+                assert _same(x[key], y[key]), (i, key, x[key], y[key])
+
+
+def best_of(fn, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(df)
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--variables', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    df = broker_export(args.rows, args.variables)
+    print(f"Broker export: {len(df)} rows x {len(df.columns)} columns")
+
+    legacy_time, legacy = best_of(legacy_parse_trades_dataframe, df, args.repeat)
+    vector_time, vector = best_of(parse_trades_dataframe, df, args.repeat)
+    check_equal(legacy, vector)
+
+    print(f"iterrows   : {legacy_time:8.3f}s  ({len(df) / legacy_time:10.0f} rows/s)")
+    print(f"vectorized : {vector_time:8.3f}s  ({len(df) / vector_time:10.0f} rows/s)")
+    print(f"speed-up   : {legacy_time / vector_time:8.1f}x  (outputs identical)")
+
+
+if __name__ == '__main__':
+    main()
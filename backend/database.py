@@ -0,0 +1,168 @@
+# database.py
+
+"""
+Engine setup for the journal database.
+
+With SQLite's defaults (rollback journal, ``synchronous=FULL``) a writer
+holds an exclusive lock while it commits, so an import or edit stalls
+every reader in every gunicorn worker.  ``init_database(app)`` replaces
+``db.init_app(app)`` and, for a file-backed SQLite database, applies the
+``SQLITE_PROFILE`` to every new connection through the engine's
+``connect`` event:
+
+    production  – WAL (readers never block on the writer and vice versa),
+                  synchronous=NORMAL (safe in WAL, fsync on checkpoint only),
+                  memory-mapped reads, a larger page cache, temp tables in
+                  memory and a busy timeout instead of immediate
+                  "database is locked" errors
+    default     – SQLite's own settings (only the busy timeout is set)
+
+The connection pool is sized from ``DB_POOL_SIZE`` / ``DB_MAX_OVERFLOW`` /
+``DB_POOL_TIMEOUT``; values in ``SQLALCHEMY_ENGINE_OPTIONS`` win.  Server
+databases (``DATABASE_URL=postgresql://…``) get the same pool plus
+pre-ping and ``DB_POOL_RECYCLE`` so connections the server dropped are
+replaced transparently.  ``database_diagnostics()`` reports the effective
+settings and pool state.
+"""
+
+from functools import partial
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from models import db
+
+
+SQLITE_PROFILES = ('production', 'default')
+# Pragmas reported by the diagnostics endpoint
+SQLITE_DIAGNOSTIC_PRAGMAS = (
+    'journal_mode', 'synchronous', 'mmap_size', 'cache_size', 'busy_timeout',
+    'temp_store', 'page_size', 'wal_autocheckpoint', 'foreign_keys',
+)
+SYNCHRONOUS_NAMES = {0: 'OFF', 1: 'NORMAL', 2: 'FULL', 3: 'EXTRA'}
+TEMP_STORE_NAMES = {0: 'DEFAULT', 1: 'FILE', 2: 'MEMORY'}
+
+
+def is_file_sqlite(uri):
+    """True for a SQLite URI backed by a file (not ``:memory:``)."""
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def is_server_database(uri):
+    return make_url(uri).get_backend_name() != 'sqlite'
+
+
+def sqlite_pragmas(config):
+    """``(name, value)`` pairs run on every new connection, in order."""
+    profile = config.get('SQLITE_PROFILE', 'production')
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"SQLITE_PROFILE must be one of: {', '.join(SQLITE_PROFILES)}")
+    pragmas = [('busy_timeout', int(config.get('SQLITE_BUSY_TIMEOUT', 5000)))]
+    if profile == 'production':
+        pragmas += [
+            ('journal_mode', 'WAL'),
+            ('synchronous', 'NORMAL'),
+            ('mmap_size', int(config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))),
+            # Negative cache_size is in KiB rather than pages
+            ('cache_size', -int(config.get('SQLITE_CACHE_SIZE_KB', 64 * 1024))),
+            ('temp_store', 'MEMORY'),
+        ]
+    return pragmas
+
+
+def engine_options(config):
+    """Pool and driver options for ``SQLALCHEMY_ENGINE_OPTIONS``."""
+    options = {
+        'pool_size': int(config.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(config.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(config.get('DB_POOL_TIMEOUT', 30)),
+    }
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    if is_server_database(uri):
+        options['pool_pre_ping'] = True
+        options['pool_recycle'] = int(config.get('DB_POOL_RECYCLE', 1800))
+    elif is_file_sqlite(uri):
+        # Pooled connections move between request and import threads
+        options['connect_args'] = {
+            'timeout': int(config.get('SQLITE_BUSY_TIMEOUT', 5000)) / 1000,
+            'check_same_thread': False,
+        }
+    configured = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if 'connect_args' in options and 'connect_args' in configured:
+        configured['connect_args'] = {**options['connect_args'], **configured['connect_args']}
+    options.update(configured)
+    return options
+
+
+def _apply_pragmas(pragmas, dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas:
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+
+def init_database(app):
+    """``db.init_app(app)`` with the engine profile from the app config."""
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI')
+    file_sqlite = bool(uri) and is_file_sqlite(uri)
+    if file_sqlite or (uri and is_server_database(uri)):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    if file_sqlite:
+        pragmas = sqlite_pragmas(app.config)
+    db.init_app(app)
+    if file_sqlite:
+        with app.app_context():
+            event.listen(db.engine, 'connect', partial(_apply_pragmas, pragmas))
+
+
+# ─── Diagnostics ─────────────────────────────────────────────────────────────
+def sqlite_settings(connection):
+    """The effective value of ``SQLITE_DIAGNOSTIC_PRAGMAS`` on a connection."""
+    settings = {}
+    for name in SQLITE_DIAGNOSTIC_PRAGMAS:
+        settings[name] = connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+    settings['synchronous'] = SYNCHRONOUS_NAMES.get(settings['synchronous'], settings['synchronous'])
+    settings['temp_store'] = TEMP_STORE_NAMES.get(settings['temp_store'], settings['temp_store'])
+    return settings
+
+
+def pool_status(pool):
+    status = {'class': type(pool).__name__}
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        method = getattr(pool, name, None)
+        if callable(method):
+            status[name] = method()
+    max_overflow = getattr(pool, '_max_overflow', None)
+    if max_overflow is not None:
+        status['max_overflow'] = max_overflow
+    timeout = getattr(pool, '_timeout', None)
+    if timeout is not None:
+        status['timeout'] = timeout
+    return status
+
+
+def database_diagnostics(app):
+    """Dialect, pool state and server version or (SQLite) configured vs effective pragmas."""
+    engine = db.engine
+    info = {
+        'dialect': engine.dialect.name,
+        'driver': engine.dialect.driver,
+        'url': engine.url.render_as_string(hide_password=True),
+        'pool': pool_status(engine.pool),
+    }
+    if engine.dialect.name == 'sqlite':
+        info['sqlite_profile'] = app.config.get('SQLITE_PROFILE', 'production')
+        info['configured_pragmas'] = {}
+        if is_file_sqlite(app.config['SQLALCHEMY_DATABASE_URI']):
+            info['configured_pragmas'] = dict(sqlite_pragmas(app.config))
+        with engine.connect() as conn:
+            info['sqlite_version'] = conn.exec_driver_sql('SELECT sqlite_version()').scalar()
+            info['pragmas'] = sqlite_settings(conn)
+    elif engine.dialect.name == 'postgresql':
+        with engine.connect() as conn:
+            info['server_version'] = conn.exec_driver_sql('SHOW server_version').scalar()
+            info['max_connections'] = int(conn.exec_driver_sql('SHOW max_connections').scalar())
+    return info
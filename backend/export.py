@@ -0,0 +1,181 @@
+# export.py
+
+"""
+Streaming journal export.
+
+Rows are read with ``yield_per`` and written batch by batch, so memory
+stays flat however large the journal is:
+
+    csv / ndjson  – generated text, the first batch goes out immediately
+    parquet       – one row group per batch, streamed as it is written
+    xlsx          – openpyxl write-only workbook (rows spill to temp files);
+                    an .xlsx is a zip, so it can only be sent once complete
+
+``stream_export(user_id, fmt)`` returns ``(body iterator, mimetype,
+filename)`` for a Flask ``Response``.
+"""
+
+import csv
+import io
+import json
+import tempfile
+
+import openpyxl
+from sqlalchemy import select
+
+from models import db, JournalEntry
+
+
+EXPORT_BATCH_SIZE = 2000
+EXPORT_COLUMNS = (
+    'symbol', 'direction', 'entry_price', 'exit_price', 'quantity', 'contract_size',
+    'instrument_type', 'risk_amount', 'pnl', 'rr', 'notes', 'date', 'created_at',
+)
+DATETIME_COLUMNS = ('date', 'created_at')
+EXPORT_FORMATS = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+class ExportUnavailable(Exception):
+    """The requested format needs an optional dependency that is missing."""
+
+
+def export_batches(user_id, batch_size=EXPORT_BATCH_SIZE):
+    """The user's trades as lists of row tuples (``EXPORT_COLUMNS`` order)."""
+    columns = [getattr(JournalEntry, name) for name in EXPORT_COLUMNS]
+    result = db.session.execute(
+        select(*columns)
+        .where(JournalEntry.user_id == user_id)
+        .order_by(JournalEntry.created_at.asc(), JournalEntry.id.asc())
+        .execution_options(yield_per=batch_size)
+    )
+    for partition in result.partitions():
+        yield [tuple(row) for row in partition]
+
+
+def _format_datetimes(rows, formatter):
+    positions = [EXPORT_COLUMNS.index(name) for name in DATETIME_COLUMNS]
+    for row in rows:
+        row = list(row)
+        for i in positions:
+            row[i] = formatter(row[i]) if row[i] is not None else None
+        yield row
+
+
+def _text_datetime(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S')
+
+
+# ─── Writers ─────────────────────────────────────────────────────────────────
+def csv_stream(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue()
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(_format_datetimes(rows, _text_datetime))
+        yield buffer.getvalue()
+
+
+def ndjson_stream(batches):
+    for rows in batches:
+        yield ''.join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, row))) + '\n'
+            for row in _format_datetimes(rows, lambda value: value.isoformat())
+        )
+
+
+def xlsx_stream(batches):
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('Journal')
+    sheet.append(EXPORT_COLUMNS)
+    for rows in batches:
+        for row in _format_datetimes(rows, _text_datetime):
+            sheet.append(row)
+
+    with tempfile.TemporaryFile() as handle:
+        workbook.save(handle)
+        handle.seek(0)
+        while True:
+            chunk = handle.read(FILE_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+class _ByteSink(io.RawIOBase):
+    """Write-only file whose bytes are drained by the response generator."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data, self.chunks = b''.join(self.chunks), []
+        return data
+
+
+def parquet_stream(batches):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        (name, pa.timestamp('us') if name in DATETIME_COLUMNS
+         else pa.float64() if name in ('entry_price', 'exit_price', 'quantity', 'contract_size',
+                                       'risk_amount', 'pnl', 'rr')
+         else pa.string())
+        for name in EXPORT_COLUMNS
+    ])
+    sink = _ByteSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for rows in batches:
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+WRITERS = {'csv': csv_stream, 'ndjson': ndjson_stream, 'xlsx': xlsx_stream, 'parquet': parquet_stream}
+
+
+def stream_export(user_id, fmt='xlsx', batch_size=EXPORT_BATCH_SIZE):
+    """
+    Body iterator, mimetype and download filename of a user's export.
+
+    Raises ValueError for an unknown format and ExportUnavailable when the
+    format's optional dependency (pyarrow for parquet) is not installed.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    if fmt == 'parquet':
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            raise ExportUnavailable('Parquet export requires pyarrow')
+    body = WRITERS[fmt](export_batches(user_id, batch_size))
+    return body, EXPORT_FORMATS[fmt], f'trading_journal.{fmt}'
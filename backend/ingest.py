@@ -0,0 +1,738 @@
+# ingest.py
+
+"""
+Bulk trade ingestion for imports.
+
+Adding one ``JournalEntry`` per row to the session and committing once
+builds a unit of work as large as the file and holds SQLite's write lock
+for the whole import.  ``BulkImporter`` collects plain column dicts and
+writes them with one executemany ``INSERT … RETURNING id`` per chunk (plus
+one executemany for the chunk's ``trade_variable`` tags), committing after
+each chunk so other users' writes can interleave.
+
+If the import fails part-way, ``abort()`` removes what was already written
+for the batch, so a batch is either fully imported or not there at all.
+
+Every chunk commit also records the batch's progress counters, which is
+what ``GET /import/<id>/status`` and the ``/import/<id>/events`` stream
+report while an import is running, and adds the chunk to the
+pre-aggregated tables (``analytics.rollups``).  Each row's time dimension
+columns (``analytics.timeparts``) are filled in the user's timezone as it
+is queued.
+
+Uploaded files are imported by a background job (``start_import``)
+that streams them chunk by chunk – ``pd.read_csv(chunksize=…)`` for CSV and
+a read-only openpyxl row iterator for XLSX – so memory stays bounded by
+the chunk size rather than the file size.
+
+``parse_trades_dataframe`` turns a broker export (CSV / Excel DataFrame)
+into trade dicts for the import preview and the import pipeline.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from flask import current_app, has_app_context
+from sqlalchemy import select, update
+
+from analytics.cache import bump_data_version
+from analytics.rollups import add_trades
+from analytics.tags import tag_rows
+from analytics.timeparts import time_parts, trade_moment, user_timezone
+from models import db, JournalEntry, TradeVariable, ImportBatch
+from purge import delete_batch_trades, purge_import_batch
+
+
+DEFAULT_CHUNK_SIZE = 2000
+
+# Columns every imported row is normalized to, so each chunk is one
+# homogeneous executemany
+ENTRY_DEFAULTS = {
+    'symbol': None, 'direction': None, 'entry_price': 0.0, 'exit_price': 0.0,
+    'stop_loss': None, 'take_profit': None, 'quantity': 1.0, 'contract_size': None,
+    'instrument_type': 'crypto', 'risk_amount': 1.0, 'pnl': 0.0, 'rr': 0.0,
+    'strategy': None, 'setup': None, 'notes': None, 'variables': None,
+    'extra_data': None, 'date': None, 'created_at': None, 'updated_at': None,
+}
+
+
+class BulkImporter:
+    """
+    Chunked writer of journal entries for one import batch.
+
+    Usage::
+
+        importer = BulkImporter(user_id, batch.id)
+        for row in rows:
+            importer.add(row)      # dict of JournalEntry column values
+        importer.finish()          # flushes the tail, bumps the data version
+
+    ``skip()`` counts rows left out on purpose (missing required fields) and
+    ``fail()`` rows that could not be converted.
+    """
+
+    def __init__(self, user_id, batch_id, chunk_size=None):
+        if chunk_size is None and has_app_context():
+            chunk_size = current_app.config.get('IMPORT_CHUNK_SIZE')
+        self.user_id = user_id
+        self.batch_id = batch_id
+        self.chunk_size = max(int(chunk_size or DEFAULT_CHUNK_SIZE), 1)
+        self.timezone = user_timezone(user_id)
+        self.pending = []
+        self.inserted = 0
+        self.skipped = 0
+        self.failed = 0
+        self.status = 'running'
+        self.error = None
+        # Batch summary of the inserted trades; parse_duration is added to by
+        # whoever turns the upload into entry dicts
+        self.total_pnl = 0.0
+        self.first_trade_at = None
+        self.last_trade_at = None
+        self.parse_duration = 0.0
+        self.chunks = 0
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def add(self, row):
+        """Queue one entry (a dict of column values); flushes full chunks."""
+        now = datetime.utcnow()
+        values = dict(ENTRY_DEFAULTS)
+        values.update(row)
+        values['user_id'] = self.user_id
+        values['import_batch_id'] = self.batch_id
+        values['date'] = values['date'] or now
+        if not isinstance(values['date'], datetime):
+            # A bare date is stored as midnight; keep it comparable with stored rows
+            values['date'] = datetime.combine(values['date'], datetime.min.time())
+        values['created_at'] = values['created_at'] or now
+        values['updated_at'] = values['updated_at'] or now
+        values.update(time_parts(trade_moment(values['date'], values['created_at']), self.timezone))
+        self.pending.append(values)
+        if len(self.pending) >= self.chunk_size:
+            self.flush()
+
+    def skip(self, count=1):
+        self.skipped += count
+
+    def fail(self, count=1):
+        self.failed += count
+
+    @property
+    def parsed(self):
+        return self.inserted + len(self.pending) + self.skipped + self.failed
+
+    def progress(self):
+        """Snapshot of the counters, as published to progress listeners."""
+        duration = self.duration
+        return {
+            'batch_id': self.batch_id,
+            'status': self.status,
+            'error': self.error,
+            'rows_parsed': self.parsed,
+            'rows_inserted': self.inserted,
+            'rows_skipped': self.skipped,
+            'rows_failed': self.failed,
+            'rows_per_second': round(self.inserted / duration, 1) if duration > 0 else None,
+        }
+
+    def _record(self, **values):
+        """
+        Write the counters (and any status ``values``) to the batch row.
+
+        Bumps the user's data version too: /import/history (and /dashboard)
+        answer revalidations from it, and each chunk commit makes new trades
+        visible.
+        """
+        self.status = values.get('status', self.status)
+        self.error = values.get('error', self.error)
+        bump_data_version(self.user_id)
+        db.session.execute(
+            update(ImportBatch).where(ImportBatch.id == self.batch_id).values(
+                heartbeat_at=datetime.utcnow(),
+                rows_parsed=self.parsed, rows_inserted=self.inserted,
+                rows_skipped=self.skipped, rows_failed=self.failed, trade_count=self.inserted,
+                total_pnl=round(self.total_pnl, 8), first_trade_at=self.first_trade_at,
+                last_trade_at=self.last_trade_at, parse_duration=round(self.parse_duration, 3),
+                **values
+            )
+        )
+
+    def _publish(self):
+        """Hand the committed progress to this process's listeners, if any."""
+        channel = progress_channel(self.batch_id)
+        if channel is not None:
+            channel.publish(self.progress())
+
+    def start(self):
+        """Mark the batch as running."""
+        self._record(status='running', started_at=datetime.utcnow())
+        db.session.commit()
+        self._publish()
+
+    def flush(self):
+        """Write and commit the queued rows."""
+        if not self.pending:
+            return
+        rows, self.pending = self.pending, []
+
+        entries = JournalEntry.__table__
+        ids = db.session.execute(
+            entries.insert().returning(entries.c.id, sort_by_parameter_order=True),
+            rows
+        ).scalars().all()
+
+        tags = []
+        for entry_id, row in zip(ids, rows):
+            tags.extend(tag_rows(entry_id, self.user_id, row['variables'], row['extra_data']))
+        if tags:
+            db.session.execute(TradeVariable.__table__.insert(), tags)
+        add_trades(self.user_id, rows)
+
+        self.inserted += len(rows)
+        self.chunks += 1
+        dates = [row['date'] for row in rows]
+        self.total_pnl += sum(row['pnl'] or 0.0 for row in rows)
+        self.first_trade_at = min(dates + [self.first_trade_at or dates[0]])
+        self.last_trade_at = max(dates + [self.last_trade_at or dates[0]])
+        self._record()
+        db.session.commit()
+        self._publish()
+
+    def finish(self):
+        """Flush the last chunk and publish the import to cached analytics."""
+        self.flush()
+        self.finished = time.perf_counter()
+        self._record(status='completed', finished_at=datetime.utcnow())
+        db.session.commit()
+        self._publish()
+        return self.summary()
+
+    def abort(self, error=None):
+        """
+        Roll back and delete everything already committed for the batch.
+
+        Without ``error`` the batch row goes too; with it, the batch is kept
+        as ``failed`` with the message so a status poll can report it.
+        """
+        db.session.rollback()
+        self.pending = []
+        self.inserted = 0
+        self.total_pnl = 0.0
+        self.first_trade_at = self.last_trade_at = None
+        if error is None:
+            purge_import_batch(self.batch_id)
+            bump_data_version(self.user_id)
+        else:
+            delete_batch_trades(self.batch_id)
+            self._record(status='failed', error=str(error), finished_at=datetime.utcnow())
+        db.session.commit()
+        self._publish()
+
+    @property
+    def duration(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def summary(self):
+        duration = self.duration
+        return {
+            'inserted_count': self.inserted,
+            'skipped_count': self.skipped,
+            'failed_count': self.failed,
+            'chunks': self.chunks,
+            'duration_seconds': round(duration, 3),
+            'rows_per_second': round(self.inserted / duration, 1) if duration > 0 else None,
+        }
+
+
+# ─── Parsing ─────────────────────────────────────────────────────────────────
+# Broker column aliases for the core trade fields.  An alias listed under two
+# fields belongs to the later one ('entry time' → time).
+CORE_FIELD_ALIASES = {
+    'symbol': ['symbol', 'pair', 'instrument'],
+    'direction': ['type', 'side', 'direction'],
+    'entry_price': ['entry price', 'open', 'open price', 'price open'],
+    'exit_price': ['exit price', 'close', 'close price', 'price close'],
+    'quantity': ['volume', 'qty', 'size', 'lots', 'quantity'],
+    'date': ['date', 'open time', 'entry time', 'datetime', 'trade time', 'close time'],
+    'time': ['time', 'entry time', 'close time', 'hour', 'trade time'],
+    'pnl': ['pnl', 'profit', 'net profit', 'p&l'],
+    'rr': ['rr', 'r:r', 'riskreward', 'risk reward', 'risk/reward'],
+}
+ALIAS_TO_FIELD = {
+    alias: field for field, aliases in CORE_FIELD_ALIASES.items() for alias in aliases
+}
+# Non-core columns kept verbatim in extra_data instead of becoming variables
+EXTRA_DATA_COLUMNS = {'id', 'notes', 'tags', 'variables', 'extra_data', 'created_at', 'updated_at'}
+
+
+def resolve_columns(columns):
+    """
+    Map normalized column names to their role, once per file.
+
+    Returns (core, variables, extra) where ``core`` maps each core field to
+    the column positions feeding it (later columns win) and ``variables`` /
+    ``extra`` are lists of ``(position, name)``.
+    """
+    core, variables, extra = {}, [], []
+    for position, name in enumerate(columns):
+        if name in ALIAS_TO_FIELD:
+            core.setdefault(ALIAS_TO_FIELD[name], []).append(position)
+        elif name in EXTRA_DATA_COLUMNS:
+            extra.append((position, name))
+        else:
+            variables.append((position, name))
+    return core, variables, extra
+
+
+def column_values(column, lower=False):
+    """
+    ``(present, values)`` for one column.
+
+    ``present`` masks cells that are neither missing nor an empty string;
+    ``values`` holds the cells as Python objects, with non-blank strings
+    lower-cased when ``lower`` is set.  Broker columns repeat a handful of
+    distinct values, so the work is done on the factorized uniques only.
+    """
+    codes, uniques = pd.factorize(column, use_na_sentinel=True)
+    uniques = np.asarray(uniques, dtype=object)
+    keep = np.array([u != '' for u in uniques.tolist()], dtype=bool)
+    if lower:
+        uniques = np.array([
+            u.lower() if isinstance(u, str) and u.strip() else u
+            for u in uniques.tolist()
+        ], dtype=object)
+    present = codes >= 0
+    present[present] = keep[codes[present]]
+    values = np.full(len(codes), None, dtype=object)
+    values[present] = uniques[codes[present]]
+    return present, values
+
+
+def _fill_sparse(dicts, name, present, values):
+    values = values.tolist()
+    for i in np.flatnonzero(present).tolist():
+        dicts[i][name] = values[i]
+
+
+def parse_trades_dataframe(df):
+    """Parse a pandas DataFrame into a list[dict] trade objects.
+    We attempt to map common broker column names to our internal fields.
+    Unknown columns are stored in `extra_data` or as variables.
+
+    The column mapping is resolved once; masking and lower-casing run
+    column-at-a-time over each column's distinct values.
+    """
+    n = len(df)
+    columns = [str(c).strip().lower() for c in df.columns]
+    core, variables, extra = resolve_columns(columns)
+
+    # Core fields: start from the default and let every mapped column
+    # overwrite the rows where it has a value
+    fields = {
+        field: np.full(n, 1.0 if field == 'quantity' else None, dtype=object)
+        for field in CORE_FIELD_ALIASES
+    }
+    for field, positions in core.items():
+        target = fields[field]
+        for position in positions:
+            present, values = column_values(df.iloc[:, position])
+            target[present] = values[present]
+
+    # Combine date + time into datetime
+    dates, times = fields['date'], fields['time']
+    has_date = np.array([bool(v) for v in dates.tolist()], dtype=bool)
+    has_time = np.array([bool(v) for v in times.tolist()], dtype=bool)
+    datetimes = np.full(n, None, dtype=object)
+    for i in np.flatnonzero(has_date).tolist():
+        date_str = str(dates[i]).strip()
+        if has_time[i] and 'T' not in date_str:
+            datetimes[i] = f"{date_str} {str(times[i]).strip()}"
+        else:
+            datetimes[i] = date_str if has_time[i] else str(dates[i])
+
+    trades = [
+        {
+            'symbol': symbol, 'direction': direction,
+            'entry_price': entry_price, 'exit_price': exit_price,
+            'quantity': quantity, 'date': date, 'time': time_, 'datetime': datetime_,
+            'pnl': pnl, 'rr': rr, 'extra_data': {}, 'variables': {},
+        }
+        for symbol, direction, entry_price, exit_price, quantity, date, time_, datetime_, pnl, rr in zip(
+            fields['symbol'].tolist(), fields['direction'].tolist(),
+            fields['entry_price'].tolist(), fields['exit_price'].tolist(),
+            fields['quantity'].tolist(), dates.tolist(), times.tolist(), datetimes.tolist(),
+            fields['pnl'].tolist(), fields['rr'].tolist(),
+        )
+    ]
+
+    variable_dicts = [t['variables'] for t in trades]
+    for position, name in variables:
+        _fill_sparse(variable_dicts, name, *column_values(df.iloc[:, position], lower=True))
+
+    extra_dicts = [t['extra_data'] for t in trades]
+    for position, name in extra:
+        _fill_sparse(extra_dicts, name, *column_values(df.iloc[:, position]))
+
+    for trade, date_ok, time_ok in zip(trades, has_date.tolist(), has_time.tolist()):
+        if not date_ok:
+            del trade['date']
+        if not time_ok:
+            del trade['time']
+    return trades
+
+
+# ─── Streaming file readers ──────────────────────────────────────────────────
+IMPORT_EXTENSIONS = ('.csv', '.xlsx', '.xlsm', '.xls')
+XLSX_EXTENSIONS = ('.xlsx', '.xlsm')
+
+
+def _xlsx_frames(source, chunk_size, limit=None):
+    """DataFrames of ``chunk_size`` rows from the first sheet, read row by row."""
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [
+            f'Unnamed: {i}' if name is None else name
+            for i, name in enumerate(next(rows, ()))
+        ]
+        width = len(header)
+        chunk, seen = [], 0
+        for values in rows:
+            if limit is not None and seen >= limit:
+                break
+            if all(v is None for v in values):
+                continue
+            values = tuple(values[:width]) + (None,) * (width - len(values))
+            chunk.append(values)
+            seen += 1
+            if len(chunk) >= chunk_size:
+                yield pd.DataFrame.from_records(chunk, columns=header)
+                chunk = []
+        if chunk or not seen:
+            yield pd.DataFrame.from_records(chunk, columns=header)
+    finally:
+        workbook.close()
+
+
+def iter_file_frames(path, chunk_size):
+    """Yield an uploaded CSV / Excel file as DataFrames of at most ``chunk_size`` rows."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        yield from pd.read_csv(path, chunksize=chunk_size)
+    elif extension in XLSX_EXTENSIONS:
+        yield from _xlsx_frames(path, chunk_size)
+    else:
+        # Legacy .xls has no row-streaming reader
+        df = pd.read_excel(path)
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+
+
+def read_file_head(source, filename, nrows):
+    """The first ``nrows`` data rows of an upload (path or file object)."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        return pd.read_csv(source, nrows=nrows)
+    if extension in XLSX_EXTENSIONS:
+        return next(_xlsx_frames(source, nrows, limit=nrows))
+    return pd.read_excel(source, nrows=nrows)
+
+
+# ─── Journal template rows ───────────────────────────────────────────────────
+# The file importer reads the journal's own column names (the export format)
+TEMPLATE_REQUIRED = ('symbol', 'direction', 'entry_price', 'exit_price', 'pnl')
+TEMPLATE_NUMBERS = ('entry_price', 'exit_price', 'pnl')
+TEMPLATE_OPTIONAL_NUMBERS = {'quantity': 1.0, 'contract_size': None, 'risk_amount': 1.0, 'rr': 0.0}
+
+
+def _to_datetime(series):
+    try:
+        return pd.to_datetime(series, errors='coerce', format='mixed')
+    except (TypeError, ValueError):
+        # Mixed time zones: fall back to one value at a time
+        return series.map(lambda v: pd.to_datetime(v, errors='coerce'))
+
+
+def template_entries(df):
+    """
+    Journal entry dicts for one chunk of an uploaded template file.
+
+    Rows missing any of ``TEMPLATE_REQUIRED`` are skipped; rows whose prices
+    or pnl are not numbers count as failed.  The trade date comes from
+    ``date``, else ``created_at``, else the import time.
+
+    Returns (entries, skipped_count, failed_count).
+    """
+    df = df.reset_index(drop=True)
+    n = len(df)
+
+    def column(name):
+        return df[name] if name in df.columns else pd.Series([None] * n, dtype=object)
+
+    present = np.ones(n, dtype=bool)
+    for name in TEMPLATE_REQUIRED:
+        present &= column(name).notna().to_numpy()
+    numbers = {name: pd.to_numeric(column(name), errors='coerce') for name in TEMPLATE_NUMBERS}
+    valid = present.copy()
+    for values in numbers.values():
+        valid &= values.notna().to_numpy()
+
+    for name, default in TEMPLATE_OPTIONAL_NUMBERS.items():
+        values = pd.to_numeric(column(name), errors='coerce').astype(float).astype(object)
+        numbers[name] = values.where(values.notna(), default)
+
+    dates = _to_datetime(column('date'))
+    dates = dates.where(column('date').notna(), _to_datetime(column('created_at')))
+    dates = [None if pd.isna(d) else pd.Timestamp(d).to_pydatetime() for d in dates.tolist()]
+
+    instrument_type = column('instrument_type').astype(object)
+    instrument_type = instrument_type.where(instrument_type.notna(), 'crypto').tolist()
+    notes = column('notes').astype(object)
+    notes = notes.where(notes.notna(), None).tolist()
+    symbols, directions = column('symbol').tolist(), column('direction').tolist()
+    columns = {name: values.tolist() for name, values in numbers.items()}
+
+    entries = [
+        {
+            'symbol': str(symbols[i]).upper(),
+            'direction': str(directions[i]).lower(),
+            'entry_price': float(columns['entry_price'][i]),
+            'exit_price': float(columns['exit_price'][i]),
+            'quantity': columns['quantity'][i],
+            'contract_size': columns['contract_size'][i],
+            'instrument_type': instrument_type[i],
+            'risk_amount': columns['risk_amount'][i],
+            'pnl': float(columns['pnl'][i]),
+            'rr': columns['rr'][i],
+            'notes': notes[i],
+            'date': dates[i],
+        }
+        for i in np.flatnonzero(valid).tolist()
+    ]
+    skipped = int(n - present.sum())
+    return entries, skipped, int(present.sum() - valid.sum())
+
+
+# ─── Progress events ─────────────────────────────────────────────────────────
+PROGRESS_BUFFER_SIZE = 32
+
+
+class ProgressChannel:
+    """
+    Bounded buffer of one running job's progress snapshots.
+
+    Snapshots are cumulative, so when a slow listener falls more than
+    ``maxlen`` behind it simply skips to the newer ones.
+    """
+
+    def __init__(self, maxlen=PROGRESS_BUFFER_SIZE):
+        self.events = deque(maxlen=maxlen)
+        self.sequence = 0
+        self.condition = threading.Condition()
+
+    def publish(self, progress):
+        with self.condition:
+            self.sequence += 1
+            self.events.append((self.sequence, progress))
+            self.condition.notify_all()
+
+    def wait(self, after, timeout):
+        """``(sequence, progress)`` pairs newer than ``after``, waiting up to ``timeout``."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.sequence > after, timeout)
+            return [event for event in self.events if event[0] > after]
+
+
+# batch_id -> ProgressChannel for jobs running in this process
+_channels = {}
+_channels_lock = threading.Lock()
+
+
+def progress_channel(batch_id):
+    with _channels_lock:
+        return _channels.get(batch_id)
+
+
+def batch_progress(batch):
+    """Progress snapshot of an ImportBatch row (any process's job)."""
+    rate = None
+    if batch.started_at is not None:
+        duration = ((batch.finished_at or datetime.utcnow()) - batch.started_at).total_seconds()
+        rate = round(batch.rows_inserted / duration, 1) if duration > 0 else None
+    return {
+        'batch_id': batch.id,
+        'status': batch.status,
+        'error': batch.error,
+        'rows_parsed': batch.rows_parsed,
+        'rows_inserted': batch.rows_inserted,
+        'rows_skipped': batch.rows_skipped,
+        'rows_failed': batch.rows_failed,
+        'rows_per_second': rate,
+    }
+
+
+# ─── Background imports ──────────────────────────────────────────────────────
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def import_executor(app):
+    """Process-wide pool running imports (``IMPORT_WORKERS`` threads)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(int(app.config.get('IMPORT_WORKERS', 2)), 1),
+                thread_name_prefix='import'
+            )
+    return _executor
+
+
+def file_chunks(path, chunk_size):
+    """``(entries, skipped, failed)`` per chunk of an uploaded template file."""
+    for frame in iter_file_frames(path, chunk_size):
+        yield template_entries(frame)
+
+
+def entry_chunks(entries, chunk_size):
+    """``(entries, skipped, failed)`` per ``chunk_size`` entry dicts (None = skipped row)."""
+    chunk, skipped = [], 0
+    for entry in entries:
+        if entry is None:
+            skipped += 1
+        else:
+            chunk.append(entry)
+        if len(chunk) + skipped >= chunk_size:
+            yield chunk, skipped, 0
+            chunk, skipped = [], 0
+    if chunk or skipped:
+        yield chunk, skipped, 0
+
+
+def run_import(batch_id, chunks=None):
+    """
+    Import into a batch, chunk by chunk.
+
+    ``chunks(chunk_size)`` yields ``(entries, skipped_count, failed_count)``;
+    by default the batch's saved upload is streamed.  On failure the rows
+    written so far are removed, the batch is marked ``failed`` and the
+    exception is re-raised.  Returns the importer summary.
+    """
+    batch = db.session.get(ImportBatch, batch_id)
+    if chunks is None:
+        chunks = partial(file_chunks, batch.filepath)
+    importer = BulkImporter(batch.user_id, batch.id)
+    try:
+        importer.start()
+        chunk_iter = iter(chunks(importer.chunk_size))
+        while True:
+            # Reading and converting the next chunk is the parse time
+            started = time.perf_counter()
+            chunk = next(chunk_iter, None)
+            importer.parse_duration += time.perf_counter() - started
+            if chunk is None:
+                break
+            entries, skipped, failed = chunk
+            importer.skip(skipped)
+            importer.fail(failed)
+            for entry in entries:
+                importer.add(entry)
+        return importer.finish()
+    except Exception as e:
+        importer.abort(error=e)
+        raise
+
+
+def _import_job(app, batch_id, chunks):
+    with app.app_context():
+        try:
+            summary = run_import(batch_id, chunks)
+            print(f"Import batch {batch_id}: {summary['inserted_count']} rows "
+                  f"in {summary['duration_seconds']}s ({summary['rows_per_second']} rows/s)")
+        except Exception as e:
+            print(f" import batch {batch_id} error:", e)
+        finally:
+            with _channels_lock:
+                _channels.pop(batch_id, None)
+
+
+def start_import(batch_id, chunks=None):
+    """Queue ``run_import`` for a committed ``pending`` batch."""
+    app = current_app._get_current_object()
+    with _channels_lock:
+        _channels[batch_id] = ProgressChannel()
+    return import_executor(app).submit(_import_job, app, batch_id, chunks)
+
+
+# ─── Interrupted imports ─────────────────────────────────────────────────────
+DEFAULT_STALE_AFTER = 600
+INTERRUPTED_ERROR = 'Import was interrupted before it finished'
+
+
+def import_job_alive(batch_id):
+    """Whether a background job for the batch is queued or running in this process."""
+    return progress_channel(batch_id) is not None
+
+
+def fail_stale_import(batch, stale_after=None):
+    """
+    Mark a pending/running batch whose job died as ``failed``.
+
+    Jobs only live in a worker process's thread pool (and sync JSON imports
+    in a request), so a deploy, timeout kill or OOM leaves the batch
+    unfinished with some chunks committed.  A batch counts as interrupted
+    when no job for it runs in this process and it has not written progress
+    for ``stale_after`` seconds (``IMPORT_STALE_AFTER``).  Its committed
+    trades are removed, as ``BulkImporter.abort`` would have done.  Does not
+    commit; returns True when the batch was marked.
+    """
+    if batch.status not in ('pending', 'running') or import_job_alive(batch.id):
+        return False
+    if stale_after is None:
+        stale_after = current_app.config.get('IMPORT_STALE_AFTER', DEFAULT_STALE_AFTER)
+    last_seen = batch.heartbeat_at or batch.started_at or batch.imported_at
+    if last_seen is not None and last_seen > datetime.utcnow() - timedelta(seconds=stale_after):
+        return False
+
+    delete_batch_trades(batch.id)
+    batch.status = 'failed'
+    batch.error = INTERRUPTED_ERROR
+    batch.finished_at = datetime.utcnow()
+    batch.rows_inserted = batch.trade_count = 0
+    batch.total_pnl = 0.0
+    batch.first_trade_at = batch.last_trade_at = None
+    bump_data_version(batch.user_id)
+    return True
+
+
+def fail_stale_imports(user_id, stale_after=None):
+    """``fail_stale_import`` for every unfinished batch of the user; commits if any changed."""
+    batches = ImportBatch.query.filter(
+        ImportBatch.user_id == user_id, ImportBatch.status.in_(('pending', 'running'))
+    ).all()
+    failed = [batch for batch in batches if fail_stale_import(batch, stale_after)]
+    if failed:
+        db.session.commit()
+    return len(failed)
+
+
+# ─── Batch summary upkeep ────────────────────────────────────────────────────
+def adjust_batch_summary(batch_id, trades=0, pnl=0.0):
+    """Apply a single-trade delete / pnl edit to its batch's stored summary."""
+    if batch_id is None:
+        return
+    db.session.execute(
+        update(ImportBatch).where(ImportBatch.id == batch_id).values(
+            trade_count=ImportBatch.trade_count + trades,
+            total_pnl=ImportBatch.total_pnl + pnl,
+        )
+    )
@@ -0,0 +1,14 @@
+# market/__init__.py
+
+from .intraday import (
+    DEFAULT_HOLD, INTRADAY_INTERVALS, MAX_HOLD, bars_for_days, day_range, exit_time_from_bars,
+    intraday_bars, recorded_exit_time, resample, trim
+)
+from .providers import FixtureProvider, MarketDataProvider, YahooProvider, get_provider
+from .store import daily_bars, missing_ranges
+
+__all__ = [
+    'DEFAULT_HOLD', 'FixtureProvider', 'INTRADAY_INTERVALS', 'MAX_HOLD', 'MarketDataProvider',
+    'YahooProvider', 'bars_for_days', 'daily_bars', 'day_range', 'exit_time_from_bars',
+    'get_provider', 'intraday_bars', 'missing_ranges', 'recorded_exit_time', 'resample', 'trim',
+]
@@ -0,0 +1,211 @@
+# market/intraday.py
+
+"""
+Per-(symbol, day) cache of 1-minute bars.
+
+Each UTC day of a symbol is one compressed ``.npz`` file of column arrays
+(``ts`` as epoch seconds plus ``INTRADAY_COLUMNS``) under
+``MARKET_INTRADAY_CACHE`` (default ``instance/market_cache/intraday``).
+``intraday_bars`` loads the cached days and fetches the missing ones from
+the provider in one request per run of consecutive days (at most
+``MAX_FETCH_DAYS`` per request), so once a trade has been viewed its bars
+never hit the network again.
+
+Only finished days are written.  A day that comes back empty is cached as
+empty when the same request returned bars for another day, or when the day
+is older than the provider keeps minute history; otherwise (most likely a
+failed download) it is retried next time.
+
+``resample`` and ``trim`` work on the column arrays directly with numpy.
+"""
+
+import os
+import re
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+from flask import current_app
+
+from .providers import INTRADAY_COLUMNS, get_provider
+from .store import _symbol_lock
+
+
+INTRADAY_COLUMNS_ALL = ('ts',) + INTRADAY_COLUMNS
+# Longest hold window analysed, and the window used when no exit time is known
+MAX_HOLD = timedelta(days=7)
+DEFAULT_HOLD = timedelta(days=1)
+# Most days of 1-minute bars asked for in one provider request; Yahoo serves
+# about 8 days per request and returns nothing for longer spans
+MAX_FETCH_DAYS = 7
+# extra_data keys that may carry a trade's exit time
+EXIT_TIME_KEYS = ('exit_time', 'exit_date', 'close_time')
+# Resampling targets: interval name -> bucket width in seconds
+INTRADAY_INTERVALS = {'1m': 60, '5m': 300, '15m': 900, '1h': 3600}
+DAY_SECONDS = 86400
+
+
+def empty_bars():
+    arrays = {column: np.empty(0, dtype=np.float64) for column in INTRADAY_COLUMNS}
+    arrays['ts'] = np.empty(0, dtype=np.int64)
+    return arrays
+
+
+def _concat(parts):
+    if not parts:
+        return empty_bars()
+    return {column: np.concatenate([part[column] for part in parts]) for column in INTRADAY_COLUMNS_ALL}
+
+
+# ─── Day files ───────────────────────────────────────────────────────────────
+def cache_dir(app=None):
+    app = app or current_app
+    return app.config.get('MARKET_INTRADAY_CACHE') or \
+        os.path.join(app.instance_path, 'market_cache', 'intraday')
+
+
+def day_path(directory, symbol, day):
+    safe_symbol = re.sub(r'[^A-Za-z0-9._=^-]', '_', symbol)
+    return os.path.join(directory, safe_symbol, f'{day.isoformat()}.npz')
+
+
+def load_day(path):
+    with np.load(path) as data:
+        return {column: data[column] for column in INTRADAY_COLUMNS_ALL}
+
+
+def save_day(path, arrays):
+    """Write a day file atomically (readers never see a partial file)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as handle:
+        np.savez_compressed(handle, **arrays)
+    os.replace(tmp_path, path)
+
+
+def _frame_to_days(frame):
+    """Split a provider frame into ``{date: column arrays}`` by UTC day."""
+    ts = frame.index.to_numpy(dtype='datetime64[s]').astype(np.int64)
+    day_numbers = ts // DAY_SECONDS
+    days = {}
+    for number in np.unique(day_numbers):
+        mask = day_numbers == number
+        arrays = {'ts': ts[mask]}
+        for column in INTRADAY_COLUMNS:
+            arrays[column] = frame[column].to_numpy(dtype=np.float64)[mask]
+        days[date(1970, 1, 1) + timedelta(days=int(number))] = arrays
+    return days
+
+
+def day_range(first, last):
+    """The days ``first`` … ``last`` inclusive."""
+    return [first + timedelta(days=i) for i in range((last - first).days + 1)]
+
+
+def _runs(days, max_days=MAX_FETCH_DAYS):
+    """Group sorted days into ``(first, last)`` runs of at most ``max_days`` consecutive days."""
+    runs = []
+    for day in days:
+        if runs and day - runs[-1][1] == timedelta(days=1) and (day - runs[-1][0]).days < max_days:
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return runs
+
+
+# ─── Bars ────────────────────────────────────────────────────────────────────
+def bars_for_days(symbol, days, provider=None, directory=None):
+    """
+    1-minute bars of ``symbol`` for the given UTC days (any order, gaps
+    allowed) as a dict of column arrays sorted by ``ts``.
+    """
+    directory = directory or cache_dir()
+    today = datetime.now(timezone.utc).date()
+    days = sorted(set(days))
+
+    loaded = {}
+    for day in days:
+        path = day_path(directory, symbol, day)
+        if os.path.isfile(path):
+            loaded[day] = load_day(path)
+    missing = [day for day in days if day not in loaded]
+    if missing:
+        provider = provider or get_provider()
+        history = provider.intraday_history_days
+        with _symbol_lock(symbol):
+            for first, last in _runs(missing):
+                fetched = _frame_to_days(provider.intraday(symbol, first, last + timedelta(days=1)))
+                for day in day_range(first, last):
+                    arrays = fetched.get(day)
+                    trusted = arrays is not None or bool(fetched) or \
+                        (history is not None and (today - day).days > history)
+                    arrays = arrays if arrays is not None else empty_bars()
+                    if day < today and trusted:
+                        save_day(day_path(directory, symbol, day), arrays)
+                    loaded[day] = arrays
+    return _concat([loaded[day] for day in days])
+
+
+def intraday_bars(symbol, start_day, end_day, provider=None, directory=None):
+    """1-minute bars of ``symbol`` for the UTC days ``[start_day, end_day]``."""
+    return bars_for_days(symbol, day_range(start_day, end_day), provider, directory)
+
+
+def trim(bars, start_ts=None, end_ts=None):
+    """The bars with ``start_ts <= ts <= end_ts`` (epoch seconds)."""
+    ts = bars['ts']
+    lo = 0 if start_ts is None else np.searchsorted(ts, start_ts, side='left')
+    hi = len(ts) if end_ts is None else np.searchsorted(ts, end_ts, side='right')
+    return {column: values[lo:hi] for column, values in bars.items()}
+
+
+def resample(bars, interval):
+    """
+    Aggregate 1-minute bars into ``interval`` buckets (aligned to UTC):
+    first open, max high, min low, last close, summed volume.
+    """
+    step = INTRADAY_INTERVALS[interval]
+    ts = bars['ts']
+    if step == 60 or not len(ts):
+        return bars
+    buckets = ts // step * step
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+    return {
+        'ts': buckets[starts],
+        'open': bars['open'][starts],
+        'high': np.fmax.reduceat(bars['high'], starts),
+        'low': np.fmin.reduceat(bars['low'], starts),
+        'close': bars['close'][ends],
+        'volume': np.add.reduceat(np.nan_to_num(bars['volume']), starts),
+    }
+
+
+def exit_time_from_bars(bars, entry_ts, exit_price):
+    """
+    First bar at or after ``entry_ts`` whose range contains ``exit_price``,
+    as epoch seconds (None if price never got there).  Used when a trade has
+    no recorded exit time.
+    """
+    ts = bars['ts']
+    lo = np.searchsorted(ts, entry_ts, side='left')
+    hits = np.flatnonzero((bars['low'][lo:] <= exit_price) & (bars['high'][lo:] >= exit_price))
+    return int(ts[lo + hits[0]]) if len(hits) else None
+
+
+def recorded_exit_time(extra_data):
+    """The exit time stored in a trade's ``extra_data`` (naive UTC), if any."""
+    extra = extra_data if isinstance(extra_data, dict) else {}
+    for key in EXIT_TIME_KEYS:
+        if not extra.get(key):
+            continue
+        try:
+            value = pd.Timestamp(extra[key])
+        except (TypeError, ValueError):
+            continue
+        if pd.isna(value):
+            continue
+        if value.tzinfo is not None:
+            value = value.tz_convert('UTC').tz_localize(None)
+        return value.to_pydatetime()
+    return None
@@ -0,0 +1,150 @@
+# market/providers.py
+
+"""
+Market-data providers.
+
+A provider fetches raw bars for a symbol and hands them back as a
+``DataFrame``: daily bars indexed by ``datetime.date`` with the columns in
+``BAR_COLUMNS``, 1-minute bars indexed by naive UTC timestamps with the
+columns in ``INTRADAY_COLUMNS`` (missing ones filled with NaN).
+``market.store`` / ``market.intraday`` decide *what* to fetch; providers only
+know *how*:
+
+    YahooProvider    – yfinance download (the default)
+    FixtureProvider  – ``<SYMBOL>.csv`` / ``<SYMBOL>_1m.csv`` files from a
+                       directory, for offline development and tests
+
+Pick one with ``MARKET_DATA_PROVIDER`` (``yahoo`` / ``fixture``) and, for
+fixtures, ``MARKET_DATA_FIXTURES``.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+from flask import current_app
+
+
+BAR_COLUMNS = ('open', 'high', 'low', 'close', 'adj_close', 'volume')
+INTRADAY_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+
+def _flat_columns(df, symbol):
+    if isinstance(df.columns, pd.MultiIndex):
+        # yfinance returns (field, ticker) columns even for a single ticker
+        tickers = df.columns.get_level_values(-1)
+        df = df.xs(symbol, axis=1, level=-1) if symbol in tickers else df.droplevel(-1, axis=1)
+    return df.rename(columns=lambda c: str(c).strip().lower().replace(' ', '_'))
+
+
+def _frame(df, index, columns, index_name):
+    frame = pd.DataFrame(index=index)
+    for column in columns:
+        frame[column] = pd.to_numeric(df[column], errors='coerce').to_numpy() \
+            if column in df else np.nan
+    frame.index.name = index_name
+    return frame[~frame.index.duplicated(keep='last')].sort_index()
+
+
+def normalize_bars(df, symbol=None):
+    """Lower-case OHLC columns, one column level and a ``date`` index."""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=BAR_COLUMNS, index=pd.Index([], name='day'), dtype=float)
+    df = _flat_columns(df, symbol)
+    return _frame(df, pd.to_datetime(df.index).date, BAR_COLUMNS, 'day')
+
+
+def normalize_intraday(df, symbol=None):
+    """Like ``normalize_bars`` for minute bars; the index becomes naive UTC."""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=INTRADAY_COLUMNS, dtype=float,
+                            index=pd.DatetimeIndex([], name='timestamp'))
+    df = _flat_columns(df, symbol)
+    # Naive timestamps are taken to be UTC already
+    index = pd.to_datetime(df.index, utc=True).tz_localize(None)
+    return _frame(df, index, INTRADAY_COLUMNS, 'timestamp')
+
+
+class MarketDataProvider:
+    """
+    Interface: ``daily(symbol, start, end)`` and ``intraday(symbol, start,
+    end)`` return bars for the days ``[start, end)``.
+    """
+
+    name = 'base'
+    # Days of 1-minute history the source keeps (None: unlimited); older days
+    # that come back empty will never have bars
+    intraday_history_days = None
+
+    def daily(self, symbol, start, end):
+        raise NotImplementedError
+
+    def intraday(self, symbol, start, end):
+        raise NotImplementedError
+
+
+class YahooProvider(MarketDataProvider):
+    name = 'yahoo'
+    intraday_history_days = 30
+
+    def daily(self, symbol, start, end):
+        import yfinance as yf
+
+        df = yf.download(symbol, start=start, end=end, interval='1d',
+                         auto_adjust=False, progress=False, threads=False)
+        return normalize_bars(df, symbol)
+
+    def intraday(self, symbol, start, end):
+        import yfinance as yf
+
+        df = yf.download(symbol, start=start, end=end, interval='1m',
+                         progress=False, threads=False)
+        return normalize_intraday(df, symbol)
+
+
+class FixtureProvider(MarketDataProvider):
+    """
+    Reads ``<directory>/<SYMBOL>.csv`` (a ``date`` column plus any of
+    ``BAR_COLUMNS``; ``Adj Close`` style headers work too) and
+    ``<SYMBOL>_1m.csv`` (a ``timestamp`` column, UTC unless it carries an
+    offset).  An unknown symbol yields no bars, like an unknown ticker on
+    Yahoo.
+    """
+    name = 'fixture'
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, symbol, suffix=''):
+        return os.path.join(self.directory, symbol.replace('/', '-') + suffix + '.csv')
+
+    def _read(self, path, index_names):
+        df = pd.read_csv(path)
+        index_column = next(c for c in df.columns if str(c).strip().lower() in index_names)
+        return df.set_index(index_column)
+
+    def daily(self, symbol, start, end):
+        path = self.path(symbol)
+        if not os.path.isfile(path):
+            return normalize_bars(None)
+        df = normalize_bars(self._read(path, ('date', 'day')))
+        return df[(df.index >= start) & (df.index < end)]
+
+    def intraday(self, symbol, start, end):
+        path = self.path(symbol, '_1m')
+        if not os.path.isfile(path):
+            return normalize_intraday(None)
+        df = normalize_intraday(self._read(path, ('timestamp', 'datetime', 'date')))
+        return df[(df.index >= pd.Timestamp(start)) & (df.index < pd.Timestamp(end))]
+
+
+def get_provider(app=None):
+    """The provider configured on ``app`` (default: the current app)."""
+    app = app or current_app
+    name = app.config.get('MARKET_DATA_PROVIDER', 'yahoo')
+    if name == 'fixture':
+        return FixtureProvider(app.config.get('MARKET_DATA_FIXTURES') or
+                               os.path.join(app.instance_path, 'market_fixtures'))
+    if name == 'yahoo':
+        return YahooProvider()
+    raise ValueError(f"Unknown MARKET_DATA_PROVIDER: {name}")
@@ -0,0 +1,151 @@
+# market/store.py
+
+"""
+Local store of daily market bars.
+
+``daily_bars(symbol, start, end)`` serves ``[start, end)`` from the
+``market_bar`` table and only asks the provider for the day ranges that
+have never been fetched.  Fetched ranges are kept in ``market_coverage``
+(merged into as few rows as possible), so non-trading days are known to be
+empty rather than missing.
+
+Two rules keep the store honest:
+
+* the current day is never marked as covered – its bar is still moving –
+  so it is fetched again on the next request;
+* an empty provider answer only counts as coverage for short gaps
+  (weekends, holidays).  yfinance reports network errors as an empty
+  frame, and caching that would leave a permanent hole.
+"""
+
+import threading
+from datetime import date, timedelta
+
+import pandas as pd
+from sqlalchemy import delete, select
+
+from models import db, MarketBar, MarketCoverage
+from .providers import BAR_COLUMNS, get_provider
+
+
+# Longest gap whose empty answer is trusted (a long weekend plus a holiday)
+MAX_EMPTY_GAP_DAYS = 4
+
+_symbol_locks = {}
+_symbol_locks_guard = threading.Lock()
+
+
+def _symbol_lock(symbol):
+    with _symbol_locks_guard:
+        return _symbol_locks.setdefault(symbol, threading.Lock())
+
+
+# ─── Coverage ────────────────────────────────────────────────────────────────
+def covered_ranges(symbol):
+    """Fetched ``(start, end)`` ranges of ``symbol``, sorted by start."""
+    rows = db.session.execute(
+        select(MarketCoverage.start, MarketCoverage.end)
+        .where(MarketCoverage.symbol == symbol)
+        .order_by(MarketCoverage.start)
+    ).all()
+    return [(row.start, row.end) for row in rows]
+
+
+def missing_ranges(start, end, covered):
+    """The parts of ``[start, end)`` not inside any of the sorted ``covered`` ranges."""
+    gaps = []
+    cursor = start
+    for covered_start, covered_end in covered:
+        if covered_end <= cursor:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start))
+        cursor = max(cursor, covered_end)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def _record_coverage(symbol, start, end):
+    """Add ``[start, end)`` to the symbol's coverage, merging touching ranges."""
+    touching = db.session.execute(
+        select(MarketCoverage.id, MarketCoverage.start, MarketCoverage.end)
+        .where(MarketCoverage.symbol == symbol,
+               MarketCoverage.start <= end, MarketCoverage.end >= start)
+    ).all()
+    if touching:
+        start = min([start] + [row.start for row in touching])
+        end = max([end] + [row.end for row in touching])
+        db.session.execute(delete(MarketCoverage).where(
+            MarketCoverage.id.in_([row.id for row in touching])
+        ))
+    db.session.add(MarketCoverage(symbol=symbol, start=start, end=end))
+
+
+# ─── Bars ────────────────────────────────────────────────────────────────────
+def _upsert_bars(symbol, frame):
+    if frame.empty:
+        return
+    if db.session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    rows = [
+        {'symbol': symbol, 'day': day,
+         **{column: (None if pd.isna(value) else float(value))
+            for column, value in zip(BAR_COLUMNS, values)}}
+        for day, values in zip(frame.index, frame[list(BAR_COLUMNS)].itertuples(index=False))
+    ]
+    statement = insert(MarketBar)
+    db.session.execute(
+        statement.on_conflict_do_update(
+            index_elements=['symbol', 'day'],
+            set_={column: statement.excluded[column] for column in BAR_COLUMNS}
+        ),
+        rows
+    )
+
+
+def _stored_bars(symbol, start, end):
+    rows = db.session.execute(
+        select(MarketBar.day, *[getattr(MarketBar, column) for column in BAR_COLUMNS])
+        .where(MarketBar.symbol == symbol, MarketBar.day >= start, MarketBar.day < end)
+        .order_by(MarketBar.day)
+    ).all()
+    return pd.DataFrame([tuple(row)[1:] for row in rows], columns=BAR_COLUMNS,
+                        index=pd.Index([row.day for row in rows], name='day'), dtype=float)
+
+
+def fill_gaps(symbol, start, end, provider=None):
+    """
+    Fetch and store the missing parts of ``[start, end)``; returns the
+    fetched ``(start, end)`` ranges.  Commits.
+    """
+    provider = provider or get_provider()
+    today = date.today()
+    with _symbol_lock(symbol):
+        gaps = missing_ranges(start, end, covered_ranges(symbol))
+        for gap_start, gap_end in gaps:
+            frame = provider.daily(symbol, gap_start, gap_end)
+            _upsert_bars(symbol, frame)
+            covered_end = min(gap_end, today)
+            trusted = not frame.empty or (gap_end - gap_start) <= timedelta(days=MAX_EMPTY_GAP_DAYS)
+            if trusted and gap_start < covered_end:
+                _record_coverage(symbol, gap_start, covered_end)
+            db.session.commit()
+    return gaps
+
+
+def daily_bars(symbol, start, end, provider=None):
+    """
+    Daily bars of ``symbol`` for ``[start, end)`` as a ``DataFrame``
+    (``BAR_COLUMNS``, indexed by date), fetching only the missing ranges.
+    """
+    symbol = symbol.upper()
+    if start >= end:
+        return _stored_bars(symbol, start, start)
+    fill_gaps(symbol, start, end, provider)
+    return _stored_bars(symbol, start, end)
@@ -0,0 +1,391 @@
+# migrations.py
+
+"""
+Minimal in-place schema migrations.
+
+``db.create_all()`` only creates missing tables; it never touches a table that
+already exists, so an existing ``instance/journal.db`` never picks up new
+indexes or columns.  This module keeps an ordered list of migrations and a
+``schema_migrations`` table recording which ones have run.  Deployments run
+``flask db-upgrade`` before starting gunicorn (Procfile ``release``, the
+Dockerfile command, render.yaml); with ``AUTO_MIGRATE=1`` the app also runs
+``upgrade_database`` on start-up.  Concurrent upgrades are serialized with a
+PostgreSQL advisory lock or a lock file next to the SQLite database.
+
+Every migration must be idempotent (``IF NOT EXISTS`` / column checks): on a
+fresh database ``create_all`` already builds the current schema and the
+migrations simply get recorded as applied.
+"""
+
+import os
+from contextlib import contextmanager
+from datetime import datetime
+
+import click
+import sqlalchemy as sa
+from sqlalchemy.exc import IntegrityError
+
+from models import db
+
+try:
+    import fcntl
+except ImportError:   # Windows: no advisory file locks
+    fcntl = None
+
+
+schema_metadata = sa.MetaData()
+schema_migrations = sa.Table(
+    'schema_migrations', schema_metadata,
+    sa.Column('version', sa.Integer, primary_key=True),
+    sa.Column('name', sa.String(128), nullable=False),
+    sa.Column('applied_at', sa.DateTime, nullable=False),
+)
+
+MIGRATIONS = []
+
+
+def migration(version, name):
+    """Register ``fn(conn)`` as schema migration number ``version``."""
+    def decorator(fn):
+        MIGRATIONS.append((version, name, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return decorator
+
+
+# ─── Helpers for migrations ─────────────────────────────────────────────────
+def create_index(conn, name, table, columns):
+    conn.execute(sa.text(
+        f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({", ".join(columns)})'
+    ))
+
+
+def add_column(conn, table, column_ddl):
+    """``ALTER TABLE … ADD COLUMN`` unless the column is already there."""
+    if conn.dialect.name == 'postgresql':
+        column_ddl = column_ddl.replace(' DATETIME', ' TIMESTAMP')
+    column_name = column_ddl.split()[0]
+    existing = {c['name'] for c in sa.inspect(conn).get_columns(table)}
+    if column_name not in existing:
+        quoted = conn.dialect.identifier_preparer.quote(table)   # "user" is reserved on PostgreSQL
+        conn.execute(sa.text(f'ALTER TABLE {quoted} ADD COLUMN {column_ddl}'))
+
+
+# ─── Migrations ──────────────────────────────────────────────────────────────
+@migration(1, 'journal_entry and import_batch indexes')
+def _journal_indexes(conn):
+    create_index(conn, 'ix_journal_entry_user_date', 'journal_entry', ['user_id', 'date'])
+    create_index(conn, 'ix_journal_entry_user_created', 'journal_entry', ['user_id', 'created_at'])
+    create_index(conn, 'ix_journal_entry_import_batch', 'journal_entry', ['import_batch_id'])
+    create_index(conn, 'ix_import_batch_user_imported', 'import_batch', ['user_id', 'imported_at'])
+
+
+@migration(2, 'trade_variable backfill')
+def _backfill_trade_variables(conn):
+    from analytics.tags import tag_rows
+    from models import JournalEntry, TradeVariable
+
+    je, tv = JournalEntry.__table__, TradeVariable.__table__
+    tagged = sa.select(tv.c.entry_id).distinct()
+    rows = conn.execute(
+        sa.select(je.c.id, je.c.user_id, je.c.variables, je.c.extra_data)
+        .where(je.c.id.not_in(tagged))
+        .execution_options(yield_per=2000)
+    )
+    for chunk in rows.partitions():
+        values = []
+        for entry_id, user_id, variables, extra_data in chunk:
+            values.extend(tag_rows(entry_id, user_id, variables, extra_data))
+        if values:
+            conn.execute(tv.insert(), values)
+
+
+@migration(3, 'import_batch job status columns')
+def _import_batch_status(conn):
+    add_column(conn, 'import_batch', "status VARCHAR(16) NOT NULL DEFAULT 'completed'")
+    add_column(conn, 'import_batch', 'error TEXT')
+    for name in ('rows_parsed', 'rows_inserted', 'rows_skipped', 'rows_failed'):
+        add_column(conn, 'import_batch', f'{name} INTEGER NOT NULL DEFAULT 0')
+    add_column(conn, 'import_batch', 'started_at DATETIME')
+    add_column(conn, 'import_batch', 'finished_at DATETIME')
+    add_column(conn, 'import_batch', 'heartbeat_at DATETIME')
+
+
+@migration(4, 'import_batch summary columns')
+def _import_batch_summary(conn):
+    add_column(conn, 'import_batch', 'trade_count INTEGER NOT NULL DEFAULT 0')
+    add_column(conn, 'import_batch', 'total_pnl FLOAT NOT NULL DEFAULT 0')
+    add_column(conn, 'import_batch', 'first_trade_at DATETIME')
+    add_column(conn, 'import_batch', 'last_trade_at DATETIME')
+    add_column(conn, 'import_batch', 'byte_size INTEGER')
+    add_column(conn, 'import_batch', 'parse_duration FLOAT')
+
+    # Backfill from the trades (one pass over the import_batch index) and the files
+    conn.execute(sa.text(
+        'UPDATE import_batch SET '
+        ' trade_count = (SELECT count(*) FROM journal_entry WHERE import_batch_id = import_batch.id),'
+        ' total_pnl = (SELECT coalesce(sum(pnl), 0) FROM journal_entry WHERE import_batch_id = import_batch.id),'
+        ' first_trade_at = (SELECT min(date) FROM journal_entry WHERE import_batch_id = import_batch.id),'
+        ' last_trade_at = (SELECT max(date) FROM journal_entry WHERE import_batch_id = import_batch.id)'
+    ))
+    for batch_id, filepath in conn.execute(sa.text(
+        "SELECT id, filepath FROM import_batch WHERE byte_size IS NULL AND filepath != ''"
+    )).all():
+        if os.path.isfile(filepath):
+            conn.execute(sa.text('UPDATE import_batch SET byte_size = :size WHERE id = :id'),
+                         {'size': os.path.getsize(filepath), 'id': batch_id})
+
+
+@migration(5, 'journal_entry jsonb documents and GIN indexes (PostgreSQL)')
+def _postgres_jsonb(conn):
+    if conn.dialect.name != 'postgresql':
+        return
+    from sqlalchemy.dialects.postgresql import JSONB
+
+    columns = {c['name']: c['type'] for c in sa.inspect(conn).get_columns('journal_entry')}
+    for name in ('variables', 'extra_data'):
+        if not isinstance(columns[name], JSONB):
+            conn.execute(sa.text(
+                f'ALTER TABLE journal_entry ALTER COLUMN {name} TYPE jsonb USING {name}::jsonb'
+            ))
+        conn.execute(sa.text(
+            f'CREATE INDEX IF NOT EXISTS ix_journal_entry_{name}_gin'
+            f' ON journal_entry USING gin ({name} jsonb_path_ops)'
+        ))
+
+
+def _rows_by_user(conn, user_column, *columns, batch_size=5000):
+    """
+    Yield ``(user_id, rows)`` with all of one user's ``columns`` rows at a
+    time, streamed in ``batch_size`` partitions so only one user's trades
+    are held in memory.
+    """
+    result = conn.execute(
+        sa.select(user_column, *columns)
+        .order_by(user_column)
+        .execution_options(yield_per=batch_size)
+    )
+    user_id, rows = None, []
+    for partition in result.partitions():
+        for row in partition:
+            if row[0] != user_id and rows:
+                yield user_id, rows
+                rows = []
+            user_id = row[0]
+            rows.append(tuple(row[1:]))
+    if rows:
+        yield user_id, rows
+
+
+@migration(6, 'daily_pnl ledger backfill')
+def _backfill_daily_pnl(conn):
+    from analytics.ledger import day_totals, trade_day, LEDGER_MEASURES
+    from models import DailyPnl, JournalEntry
+
+    je, ledger = JournalEntry.__table__, DailyPnl.__table__
+    conn.execute(ledger.delete())
+    for user_id, rows in _rows_by_user(conn, je.c.user_id, je.c.date, je.c.created_at, je.c.pnl):
+        trades = [(trade_day(date, created_at), pnl) for date, created_at, pnl in rows]
+        values = [
+            {'user_id': user_id, 'day': day, **dict(zip(LEDGER_MEASURES, totals))}
+            for day, totals in day_totals(trades).items()
+        ]
+        if values:
+            conn.execute(ledger.insert(), values)
+
+
+@migration(7, 'trade_cube backfill')
+def _backfill_trade_cube(conn):
+    from analytics.cube import CUBE_DIMENSIONS, CUBE_MEASURES, cube_totals
+    from analytics.rollups import ROLLUP_COLUMNS
+    from models import JournalEntry, TradeCube
+
+    je, cube = JournalEntry.__table__, TradeCube.__table__
+    conn.execute(cube.delete())
+    for user_id, rows in _rows_by_user(conn, je.c.user_id, *[je.c[name] for name in ROLLUP_COLUMNS]):
+        trades = [dict(zip(ROLLUP_COLUMNS, row)) for row in rows]
+        values = [
+            {'user_id': user_id, **dict(zip(CUBE_DIMENSIONS, key)), **dict(zip(CUBE_MEASURES, totals))}
+            for key, totals in cube_totals(trades).items()
+        ]
+        if values:
+            conn.execute(cube.insert(), values)
+
+
+@migration(8, 'user timezone and journal_entry time dimension columns')
+def _time_dimensions(conn):
+    from analytics.timeparts import DEFAULT_TIMEZONE, resolve_timezone, time_parts, time_parts_update, trade_moment
+    from models import JournalEntry, User
+
+    add_column(conn, 'user', f"timezone VARCHAR(64) NOT NULL DEFAULT '{DEFAULT_TIMEZONE}'")
+    add_column(conn, 'journal_entry', 'trade_epoch BIGINT')
+    for name in ('local_hour', 'weekday'):
+        add_column(conn, 'journal_entry', f'{name} SMALLINT')
+    for name in ('year_week', 'year_month'):
+        add_column(conn, 'journal_entry', f'{name} INTEGER')
+    for name, columns in (('epoch', ['trade_epoch']), ('hour', ['local_hour']), ('weekday', ['weekday']),
+                          ('week', ['year_week']), ('month', ['year_month', 'year_week'])):
+        create_index(conn, f'ix_journal_entry_user_{name}', 'journal_entry', ['user_id', *columns])
+
+    # Keyset pages of 5000 rows by id, so only one page is held in memory
+    je, users = JournalEntry.__table__, User.__table__
+    zones = {user_id: resolve_timezone(name) for user_id, name in conn.execute(
+        sa.select(users.c.id, users.c.timezone)
+    )}
+    utc = resolve_timezone(DEFAULT_TIMEZONE)
+    fill = time_parts_update()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(je.c.id, je.c.user_id, je.c.date, je.c.created_at)
+            .where(je.c.id > last_id, je.c.trade_epoch.is_(None))
+            .order_by(je.c.id)
+            .limit(5000)
+        ).all()
+        if not rows:
+            break
+        conn.execute(fill, [
+            {'entry_id': entry_id, **time_parts(trade_moment(date, created_at), zones.get(user_id, utc))}
+            for entry_id, user_id, date, created_at in rows
+        ])
+        last_id = rows[-1][0]
+
+
+# ─── Runner ──────────────────────────────────────────────────────────────────
+# pg_advisory_lock key for upgrade_database (any constant unique to this app)
+MIGRATION_LOCK_KEY = 7420131
+
+
+def applied_versions(conn):
+    return {row[0] for row in conn.execute(sa.select(schema_migrations.c.version))}
+
+
+@contextmanager
+def migration_lock(engine):
+    """
+    Hold a cross-process lock while migrating, so workers or deploy steps
+    starting together do not run the same migration (or ``ALTER TABLE``) twice.
+    """
+    if engine.dialect.name == 'postgresql':
+        with engine.connect() as conn:
+            conn.execute(sa.text('SELECT pg_advisory_lock(:key)'), {'key': MIGRATION_LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(sa.text('SELECT pg_advisory_unlock(:key)'), {'key': MIGRATION_LOCK_KEY})
+                conn.commit()
+        return
+
+    path = engine.url.database if engine.dialect.name == 'sqlite' else None
+    if fcntl is None or not path or path == ':memory:':
+        yield
+        return
+    with open(f'{path}.migrate.lock', 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def upgrade_database(engine=None, verbose=False):
+    """Create missing tables, then apply every pending migration in order."""
+    engine = engine or db.engine
+    with migration_lock(engine):
+        db.metadata.create_all(engine)
+        schema_metadata.create_all(engine)
+
+        applied = []
+        for version, name, fn in MIGRATIONS:
+            try:
+                with engine.begin() as conn:
+                    if version in applied_versions(conn):
+                        continue
+                    fn(conn)
+                    conn.execute(schema_migrations.insert().values(
+                        version=version, name=name, applied_at=datetime.utcnow()
+                    ))
+            except IntegrityError:
+                # Another process without the lock (e.g. Windows) got there first
+                continue
+            applied.append((version, name))
+            if verbose:
+                print(f"✅ Applied migration {version:04d}: {name}")
+    return applied
+
+
+# ─── Query-plan check ────────────────────────────────────────────────────────
+# Representative hot-path queries and the index each one must use.
+QUERY_PLAN_CHECKS = [
+    ('journal by user ordered by date',
+     'SELECT id FROM journal_entry WHERE user_id = :uid ORDER BY date',
+     'ix_journal_entry_user_date'),
+    ('journal by user and date range',
+     'SELECT id FROM journal_entry WHERE user_id = :uid AND date >= :start ORDER BY date',
+     'ix_journal_entry_user_date'),
+    ('/list keyset page',
+     'SELECT id FROM journal_entry WHERE user_id = :uid AND (date, id) < (:start, :bid) '
+     'ORDER BY date DESC, id DESC LIMIT 51',
+     'ix_journal_entry_user_date'),
+    ('/list total count',
+     'SELECT count(*) FROM journal_entry WHERE user_id = :uid',
+     'ix_journal_entry_user_date'),
+    ('journal by user ordered by created_at',
+     'SELECT id FROM journal_entry WHERE user_id = :uid ORDER BY created_at',
+     'ix_journal_entry_user_created'),
+    ('PnL by local hour',
+     'SELECT local_hour, sum(pnl) FROM journal_entry WHERE user_id = :uid GROUP BY local_hour',
+     'ix_journal_entry_user_hour'),
+    ('PnL by month and ISO week',
+     'SELECT year_month, year_week, sum(pnl) FROM journal_entry WHERE user_id = :uid '
+     'GROUP BY year_month, year_week ORDER BY year_month, year_week',
+     'ix_journal_entry_user_month'),
+    ('trade count per import batch',
+     'SELECT count(*) FROM journal_entry WHERE import_batch_id = :bid',
+     'ix_journal_entry_import_batch'),
+    ('import history by user',
+     'SELECT id FROM import_batch WHERE user_id = :uid ORDER BY imported_at DESC',
+     'ix_import_batch_user_imported'),
+]
+
+
+def check_query_plans(engine=None):
+    """
+    Run ``EXPLAIN QUERY PLAN`` (SQLite) for the hot-path queries.
+
+    Returns a list of ``(label, plan, ok)`` where ``ok`` means the plan is an
+    index search on the expected index rather than a full table scan or a
+    temp B-tree sort.
+    """
+    engine = engine or db.engine
+    params = {'uid': 1, 'bid': 1, 'start': '2000-01-01'}
+    results = []
+    with engine.connect() as conn:
+        if conn.dialect.name != 'sqlite':
+            return results
+        for label, sql, index_name in QUERY_PLAN_CHECKS:
+            rows = conn.execute(sa.text('EXPLAIN QUERY PLAN ' + sql), params).all()
+            plan = ' | '.join(row[-1] for row in rows)
+            ok = (f'USING INDEX {index_name}' in plan or f'USING COVERING INDEX {index_name}' in plan) \
+                and 'TEMP B-TREE' not in plan
+            results.append((label, plan, ok))
+    return results
+
+
+def register_migration_commands(app):
+    @app.cli.command('db-upgrade')
+    def db_upgrade_command():
+        """Apply pending schema migrations to the configured database."""
+        applied = upgrade_database(verbose=True)
+        if not applied:
+            print("✅ Database schema is up to date")
+
+    @app.cli.command('db-check-plans')
+    def db_check_plans_command():
+        """Verify hot-path queries use index range scans."""
+        failures = 0
+        for label, plan, ok in check_query_plans():
+            print(f"{'✅' if ok else '❌'} {label}: {plan}")
+            failures += not ok
+        if failures:
+            raise click.ClickException(f"{failures} query plan(s) not using the expected index")
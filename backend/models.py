@@ -1,11 +1,22 @@
 # models.py
 
-from sqlalchemy.dialects.sqlite import JSON
+from sqlalchemy import JSON
+from sqlalchemy.dialects.postgresql import JSONB
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 
 db = SQLAlchemy()
 
+# JSON documents: JSONB on PostgreSQL (binary, GIN-indexable), JSON elsewhere
+JSONDocument = JSON().with_variant(JSONB(), 'postgresql')
+
+
+def json_gin_index(name, column):
+    """GIN index for ``@>`` containment queries; PostgreSQL only."""
+    return db.Index(
+        name, column, postgresql_using='gin', postgresql_ops={column: 'jsonb_path_ops'}
+    ).ddl_if(dialect='postgresql')
+
 
 class User(db.Model):
     __tablename__ = 'user'
@@ -13,6 +24,8 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password = db.Column(db.String(256), nullable=False)
     profile_image = db.Column(db.String(256), nullable=True)
+    # IANA zone the time-bucketed analytics use (JournalEntry.local_hour …)
+    timezone = db.Column(db.String(64), nullable=False, default='UTC')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -33,6 +46,9 @@ class User(db.Model):
 
 class ImportBatch(db.Model):
     __tablename__ = 'import_batch'
+    __table_args__ = (
+        db.Index('ix_import_batch_user_imported', 'user_id', 'imported_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -42,6 +58,28 @@ class ImportBatch(db.Model):
     imported_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     filepath = db.Column(db.String(512), nullable=False)
 
+    # Background import job state: pending → running → completed / failed
+    status = db.Column(db.String(16), nullable=False, default='pending')
+    error = db.Column(db.Text, nullable=True)
+    rows_parsed = db.Column(db.Integer, nullable=False, default=0)
+    rows_inserted = db.Column(db.Integer, nullable=False, default=0)
+    rows_skipped = db.Column(db.Integer, nullable=False, default=0)
+    rows_failed = db.Column(db.Integer, nullable=False, default=0)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    # Last progress write of the job; a pending/running batch that stops
+    # beating is treated as interrupted (ingest.fail_stale_import)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+
+    # Summary of the imported trades, maintained by the importer (and by
+    # single-trade edits / deletes) so history never has to count trades
+    trade_count = db.Column(db.Integer, nullable=False, default=0)
+    total_pnl = db.Column(db.Float, nullable=False, default=0.0)
+    first_trade_at = db.Column(db.DateTime, nullable=True)
+    last_trade_at = db.Column(db.DateTime, nullable=True)
+    byte_size = db.Column(db.Integer, nullable=True)
+    parse_duration = db.Column(db.Float, nullable=True)   # seconds
+
     # When you delete a batch, cascade so that its JournalEntry rows go away too
     trades = db.relationship(
         'JournalEntry',
@@ -55,6 +93,19 @@ class ImportBatch(db.Model):
 
 class JournalEntry(db.Model):
     __tablename__ = 'journal_entry'
+    __table_args__ = (
+        db.Index('ix_journal_entry_user_date', 'user_id', 'date'),
+        db.Index('ix_journal_entry_user_created', 'user_id', 'created_at'),
+        db.Index('ix_journal_entry_import_batch', 'import_batch_id'),
+        json_gin_index('ix_journal_entry_variables_gin', 'variables'),
+        json_gin_index('ix_journal_entry_extra_data_gin', 'extra_data'),
+        # Time-bucket GROUP BYs (analytics.timeparts)
+        db.Index('ix_journal_entry_user_epoch', 'user_id', 'trade_epoch'),
+        db.Index('ix_journal_entry_user_hour', 'user_id', 'local_hour'),
+        db.Index('ix_journal_entry_user_weekday', 'user_id', 'weekday'),
+        db.Index('ix_journal_entry_user_week', 'user_id', 'year_week'),
+        db.Index('ix_journal_entry_user_month', 'user_id', 'year_month', 'year_week'),
+    )
     id = db.Column(db.Integer, primary_key=True)
 
     # Every JournalEntry belongs to a user
@@ -66,7 +117,7 @@ class JournalEntry(db.Model):
     exit_price = db.Column(db.Float, nullable=False)
     stop_loss = db.Column(db.Float, nullable=True)
     take_profit = db.Column(db.Float, nullable=True)
-    variables = db.Column(JSON, default={})
+    variables = db.Column(JSONDocument, default={})
 
 
     quantity = db.Column(db.Float, nullable=False, default=1.0)
@@ -83,11 +134,195 @@ class JournalEntry(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Time dimensions of ``date`` in the owner's timezone, written with the
+    # entry by ``analytics.timeparts`` (year_week: ISO year * 100 + week)
+    trade_epoch = db.Column(db.BigInteger, nullable=True)
+    local_hour = db.Column(db.SmallInteger, nullable=True)
+    weekday = db.Column(db.SmallInteger, nullable=True)
+    year_week = db.Column(db.Integer, nullable=True)
+    year_month = db.Column(db.Integer, nullable=True)
+
     # If this entry was imported via Excel, store the batch_id
     import_batch_id = db.Column(db.Integer, db.ForeignKey('import_batch.id'), nullable=True)
     import_batch = db.relationship('ImportBatch', back_populates='trades')
 
-    extra_data = db.Column(JSON, default={})
+    extra_data = db.Column(JSONDocument, default={})
 
     # Back‐reference so you can do: some_entry.user
     user = db.relationship('User', back_populates='journal_entries')
+
+    # Normalized (key, value) tags derived from variables / extra_data
+    tags = db.relationship(
+        'TradeVariable',
+        back_populates='entry',
+        cascade='all, delete-orphan'
+    )
+
+    # MAE / MFE computed against intraday bars (None until the batch job ran)
+    excursion = db.relationship(
+        'TradeExcursion',
+        back_populates='entry',
+        uselist=False,
+        cascade='all, delete-orphan'
+    )
+
+
+class TradeVariable(db.Model):
+    """
+    One variable tag of a journal entry, e.g. ``setup: breakout``.
+
+    Written alongside the entry on add / update / import so that tag
+    analytics can group and filter in SQL instead of walking the
+    ``variables`` / ``extra_data`` JSON of every trade in Python.
+    """
+    __tablename__ = 'trade_variable'
+    __table_args__ = (
+        db.Index('ix_trade_variable_user_key_value', 'user_id', 'key', 'value'),
+        db.Index('ix_trade_variable_entry', 'entry_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    entry_id = db.Column(db.Integer, db.ForeignKey('journal_entry.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    key = db.Column(db.String(64), nullable=False)
+    value = db.Column(db.String(255), nullable=False)
+
+    entry = db.relationship('JournalEntry', back_populates='tags')
+
+
+class TradeExcursion(db.Model):
+    """
+    Price excursion of one trade, computed by ``analytics.excursions`` from
+    cached 1-minute bars between entry and exit.
+
+    Prices are in the trade's quote units; the ``*_r`` columns divide by the
+    initial risk ``|entry_price - stop_loss|``.  ``time_to_*`` are seconds
+    after entry of the first bar touching the level (None: never touched
+    before exit).  ``status`` is ``ok``, ``no_data`` (no bars in the hold
+    window) or ``no_exit`` (no exit time and the exit price never traded), so
+    such trades are not retried on every run.
+    """
+    __tablename__ = 'trade_excursion'
+    __table_args__ = (
+        db.Index('ix_trade_excursion_user', 'user_id'),
+    )
+
+    entry_id = db.Column(db.Integer, db.ForeignKey('journal_entry.id', ondelete='CASCADE'),
+                         primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    status = db.Column(db.String(16), nullable=False, default='ok')
+    bar_count = db.Column(db.Integer, nullable=False, default=0)
+    exit_time = db.Column(db.DateTime, nullable=True)
+    exit_estimated = db.Column(db.Boolean, nullable=False, default=False)
+    mae = db.Column(db.Float, nullable=True)
+    mfe = db.Column(db.Float, nullable=True)
+    mae_r = db.Column(db.Float, nullable=True)
+    mfe_r = db.Column(db.Float, nullable=True)
+    time_to_stop = db.Column(db.Integer, nullable=True)
+    time_to_target = db.Column(db.Integer, nullable=True)
+    time_to_1r = db.Column(db.Integer, nullable=True)
+    # 'stop', 'target' or None; a bar touching both counts as 'stop'
+    first_hit = db.Column(db.String(8), nullable=True)
+    # Realized move / MFE: 1.0 = exited at the best price seen
+    capture_efficiency = db.Column(db.Float, nullable=True)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    entry = db.relationship('JournalEntry', back_populates='excursion')
+
+
+class DailyPnl(db.Model):
+    """
+    Per-user rollup of trades by trading day (the UTC day of ``date``).
+
+    Kept in step with ``journal_entry`` by every write path through
+    ``analytics.rollups``, so daily equity curves read one row per trading
+    day instead of every trade.  ``gross_loss`` is positive; a day whose
+    last trade is removed loses its row.
+    """
+    __tablename__ = 'daily_pnl'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True, autoincrement=False)
+    day = db.Column(db.Date, primary_key=True)
+    pnl = db.Column(db.Float, nullable=False, default=0.0)
+    trades = db.Column(db.Integer, nullable=False, default=0)
+    wins = db.Column(db.Integer, nullable=False, default=0)
+    losses = db.Column(db.Integer, nullable=False, default=0)
+    gross_profit = db.Column(db.Float, nullable=False, default=0.0)
+    gross_loss = db.Column(db.Float, nullable=False, default=0.0)
+
+
+class TradeCube(db.Model):
+    """
+    Additive trade measures per (user, day, symbol, strategy, direction,
+    hour) – an aggregate cube that ``analytics.cube.rollup`` rolls up to
+    any grouping of those dimensions.
+
+    Dimensions are normalized at write time: ``symbol`` upper-cased,
+    ``direction`` lower-cased, a missing symbol / strategy stored as ``''``;
+    ``day`` / ``hour`` are the UTC day and hour of ``date``.  ``decided_rr``
+    sums ``rr`` over trades with non-zero PnL only.  Maintained with
+    ``daily_pnl`` by ``analytics.rollups``.
+    """
+    __tablename__ = 'trade_cube'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True, autoincrement=False)
+    day = db.Column(db.Date, primary_key=True)
+    symbol = db.Column(db.String(20), primary_key=True)
+    strategy = db.Column(db.String(64), primary_key=True)
+    direction = db.Column(db.String(10), primary_key=True)
+    hour = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    trades = db.Column(db.Integer, nullable=False, default=0)
+    wins = db.Column(db.Integer, nullable=False, default=0)
+    losses = db.Column(db.Integer, nullable=False, default=0)
+    pnl = db.Column(db.Float, nullable=False, default=0.0)
+    rr = db.Column(db.Float, nullable=False, default=0.0)
+    decided_rr = db.Column(db.Float, nullable=False, default=0.0)
+    gross_profit = db.Column(db.Float, nullable=False, default=0.0)
+    gross_loss = db.Column(db.Float, nullable=False, default=0.0)
+
+
+class UserDataVersion(db.Model):
+    """
+    Monotonic per-user counter bumped by every route that changes a user's
+    trades.  Cached analytics are keyed on it, so a bump invalidates them.
+
+    ``user_id`` is deliberately not a foreign key: the row outlives the user
+    so a re-used id never sees a version that was already handed out.
+    """
+    __tablename__ = 'user_data_version'
+
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class MarketBar(db.Model):
+    """
+    One daily OHLC bar of a market symbol (benchmark prices), shared by all
+    users.  Filled on demand by ``market.store`` from the configured provider.
+    """
+    __tablename__ = 'market_bar'
+
+    symbol = db.Column(db.String(32), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    open = db.Column(db.Float)
+    high = db.Column(db.Float)
+    low = db.Column(db.Float)
+    close = db.Column(db.Float)
+    adj_close = db.Column(db.Float)
+    volume = db.Column(db.Float)
+
+
+class MarketCoverage(db.Model):
+    """
+    A ``[start, end)`` day range whose daily bars have been fetched for a
+    symbol.  Kept apart from the bars so weekends and holidays, which have
+    no bar, are not mistaken for gaps and fetched again.
+    """
+    __tablename__ = 'market_coverage'
+
+    id = db.Column(db.Integer, primary_key=True)
+    symbol = db.Column(db.String(32), nullable=False, index=True)
+    start = db.Column(db.Date, nullable=False)
+    end = db.Column(db.Date, nullable=False)
+    fetched_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
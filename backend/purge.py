@@ -0,0 +1,82 @@
+# purge.py
+
+"""
+Set-based deletion of trades.
+
+Deleting an ImportBatch or a User through the ORM cascade loads every child
+JournalEntry (and each entry's tags) into the session and issues one DELETE
+per row.  These helpers instead run one ``DELETE … WHERE`` per table,
+children first, so removing a 100k-trade import is a handful of statements.
+
+Tables derived from journal entries are listed in ``ENTRY_DERIVED_TABLES``
+(rows keyed by ``entry_id``); add new per-trade tables there so every
+delete path cleans them up.  The pre-aggregated tables (``daily_pnl``,
+``trade_cube``) are adjusted by the trades being deleted, or dropped
+outright with the user.
+
+None of the helpers commit, and none bump the user's data version; the
+caller does both in its own transaction.
+"""
+
+import os
+
+from sqlalchemy import delete, select
+
+from analytics.rollups import delete_rollups, remove_entries
+from models import db, User, ImportBatch, JournalEntry, TradeExcursion, TradeVariable
+
+
+# Per-trade derived tables, deleted before their journal entries
+ENTRY_DERIVED_TABLES = [TradeVariable.__table__, TradeExcursion.__table__]
+
+
+def _delete_entries(*where, rollups=True):
+    """Delete the journal entries matching ``where`` and their derived rows."""
+    if rollups:
+        remove_entries(*where)
+    entry_ids = select(JournalEntry.id).where(*where)
+    for table in ENTRY_DERIVED_TABLES:
+        db.session.execute(delete(table).where(table.c.entry_id.in_(entry_ids)))
+    return db.session.execute(delete(JournalEntry).where(*where)).rowcount
+
+
+def delete_batch_trades(batch_id):
+    """Delete every trade of an import batch (not the batch itself)."""
+    return _delete_entries(JournalEntry.import_batch_id == batch_id)
+
+
+def purge_import_batch(batch_id):
+    """Delete an import batch and its trades; returns the number of trades removed."""
+    deleted = delete_batch_trades(batch_id)
+    db.session.execute(delete(ImportBatch).where(ImportBatch.id == batch_id))
+    return deleted
+
+
+def purge_user(user_id):
+    """
+    Delete a user together with their trades, tags and import batches.
+
+    Returns the file paths of the user's uploaded imports so the caller can
+    remove them once the transaction has committed.
+    """
+    filepaths = db.session.execute(
+        select(ImportBatch.filepath).where(ImportBatch.user_id == user_id)
+    ).scalars().all()
+    for table in ENTRY_DERIVED_TABLES:
+        if 'user_id' in table.c:
+            db.session.execute(delete(table).where(table.c.user_id == user_id))
+    delete_rollups(user_id)
+    _delete_entries(JournalEntry.user_id == user_id, rollups=False)
+    db.session.execute(delete(ImportBatch).where(ImportBatch.user_id == user_id))
+    db.session.execute(delete(User).where(User.id == user_id))
+    return [path for path in filepaths if path]
+
+
+def remove_files(paths):
+    """Best-effort removal of uploaded files."""
+    for path in paths:
+        try:
+            if os.path.isfile(path):
+                os.remove(path)
+        except OSError as e:
+            print(f"Could not remove {path}: {e}")
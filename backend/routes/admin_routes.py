@@ -1,9 +1,12 @@
 # routes/admin_routes.py
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from werkzeug.security import generate_password_hash
 from models import db, User
+from analytics.cache import bump_data_version
+from purge import purge_user, remove_files
+from database import database_diagnostics
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -81,6 +84,27 @@ def delete_user(user_id):
         return jsonify({"error": "Only admins can delete users"}), 403
 
     user = User.query.get_or_404(user_id)
-    db.session.delete(user)
+    email = user.email
+    # Set-based deletes instead of loading every trade through the ORM cascade
+    filepaths = purge_user(user_id)
+    bump_data_version(user_id)
     db.session.commit()
-    return jsonify({"message": f"User {user.email} deleted."}), 200
+    remove_files(filepaths)
+    return jsonify({"message": f"User {email} deleted."}), 200
+
+
+@admin_bp.route('/database', methods=['GET'])
+@jwt_required()
+def database_info():
+    """
+    Admin-only: Effective database settings of this worker – dialect, pool
+    state and, for SQLite, the configured and actual pragmas.
+    """
+    if not is_admin_user():
+        return jsonify({"error": "Only admins can view database settings"}), 403
+
+    try:
+        return jsonify(database_diagnostics(current_app)), 200
+    except Exception as e:
+        print(f"Error in database_info: {e}")
+        return jsonify({'error': str(e)}), 500
@@ -3,6 +3,8 @@
 from flask import Blueprint, request, jsonify
 from werkzeug.security import check_password_hash, generate_password_hash
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from analytics.cache import bump_data_version
+from analytics.timeparts import refresh_time_parts, resolve_timezone
 from models import db, User
 
 auth_bp = Blueprint('auth', __name__)
@@ -89,12 +91,22 @@ def update_profile():
         user.password = generate_password_hash(data['password'])
     if data.get('profile_image') is not None:
         user.profile_image = data['profile_image']
+    if data.get('timezone') and data['timezone'] != user.timezone:
+        try:
+            tz = resolve_timezone(data['timezone'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        user.timezone = data['timezone']
+        # Hour / weekday / week / month buckets of every trade move with the zone
+        refresh_time_parts(user_id, tz)
+        bump_data_version(user_id)
 
     db.session.commit()
     return jsonify({
         'msg': 'Profile updated',
         'email': user.email,
-        'profile_image': user.profile_image
+        'profile_image': user.profile_image,
+        'timezone': user.timezone
     }), 200
 
 
@@ -106,5 +118,6 @@ def get_profile():
     user = User.query.get_or_404(user_id)
     return jsonify({
         'email': user.email,
-        'profile_image': user.profile_image or ""
+        'profile_image': user.profile_image or "",
+        'timezone': user.timezone
     }), 200
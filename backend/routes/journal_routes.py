@@ -1,231 +1,48 @@
 # routes/journal_routes.py
 
-def analyze_variable_combinations(entries, combination_level=2):
-    """
-    Analyze combinations of variables to find the most profitable combinations.
-    
-    Args:
-        entries: List of journal entries
-        combination_level: Number of variables to combine (2 for pairs, 3 for trios, etc.)
-    
-    Returns:
-        Dictionary with combination statistics
-    """
-    from itertools import combinations
-    
-    # First, collect all variables for each entry
-    entry_vars = []
-    variable_types = set()
-    
-    # Define system fields that should be excluded
-    system_fields = {
-        'trade_hour', 'trade_day', 'trade_week', 'trade_month', 'trade_year',
-        'entry_time', 'exit_time', 'duration', 'trade_id', 'import_batch_id',
-        'id', 'symbol', 'direction', 'entry_price', 'exit_price', 'quantity',
-        'date', 'time', 'pnl', 'rr', 'notes', 'created_at', 'updated_at'
-    }
-    
-    # Patterns that indicate system or non-variable fields
-    system_patterns = ('_', 'unused', 'temp', 'meta', 'trade_', 'time_')
-    
-    for entry in entries:
-        variables = {}
-        
-        # Primary: Check the variables field
-        if entry.variables and isinstance(entry.variables, dict):
-            for k, v in entry.variables.items():
-                k_lower = k.lower()
-                # Skip system fields, empty values, and fields matching system patterns
-                if (k_lower not in system_fields and 
-                    v is not None and 
-                    str(v).strip() != '' and
-                    not any(k_lower.startswith(p) for p in system_patterns)):
-                    # Store the original key but track by lowercase
-                    variables[k_lower] = v
-        
-        # Fallback: Check extra_data for variable-like fields
-        if entry.extra_data and isinstance(entry.extra_data, dict):
-            # Only consider fields that match variable patterns and aren't system fields
-            for key, value in entry.extra_data.items():
-                key_lower = key.lower()
-                # Skip system fields, empty values, and fields matching system patterns
-                if (key_lower not in system_fields and 
-                    value is not None and 
-                    str(value).strip() != '' and
-                    not any(key_lower.startswith(p) for p in system_patterns) and
-                    not any(p in key_lower for p in ('id', 'price', 'time', 'date', 'pnl', 'rr'))):
-                    
-                    # Convert value to list if it isn't already
-                    if isinstance(value, list):
-                        cleaned_values = [str(v).strip() for v in value if v and str(v).strip()]
-                        if cleaned_values:
-                            variables[key_lower] = cleaned_values
-                    else:
-                        value_str = str(value).strip()
-                        if value_str:
-                            variables[key_lower] = [value_str]
-        
-        # Convert to list of (key, value) pairs
-        var_list = []
-        for key, values in variables.items():
-            if isinstance(values, list):
-                for value in values:
-                    if value and str(value).strip():
-                        var_list.append((key, str(value).strip()))
-                        variable_types.add(key)
-            elif values and str(values).strip():
-                var_list.append((key, str(values).strip()))
-                variable_types.add(key)
-        
-        entry_vars.append({
-            'entry': entry,
-            'variables': var_list
-        })
-    
-    # Generate all possible variable combinations
-    variable_types = sorted(list(variable_types))
-    combination_stats = {}
-    
-    # For each entry, generate all combinations of its variables
-    for entry_data in entry_vars:
-        # Skip entries with no variables
-        if not entry_data['variables']:
-            continue
-            
-        # Use min(combination_level, len(variables)) to avoid skipping trades with fewer variables
-        actual_combination_level = min(combination_level, len(entry_data['variables']))
-        
-        # If no combinations possible, skip this entry
-        if actual_combination_level < 1:
-            continue
-            
-        # Generate all possible combinations for the actual combination level
-        for var_combo in combinations(entry_data['variables'], actual_combination_level):
-            # Sort to ensure consistent ordering (e.g., (A,B) is same as (B,A))
-            var_combo = sorted(var_combo)
-            combo_key = ' | '.join([f"{k}:{v}" for k, v in var_combo])
-            
-            if combo_key not in combination_stats:
-                combination_stats[combo_key] = {
-                    'trades': 0,
-                    'wins': 0,
-                    'losses': 0,
-                    'total_rr': 0.0,
-                    'total_pnl': 0.0,
-                    'gross_profit': 0.0,
-                    'gross_loss': 0.0,
-                    'win_amounts': [],
-                    'loss_amounts': [],
-                    'max_drawdown': 0.0,
-                    'running_pnl': 0.0,
-                    'peak': 0.0,
-                    'trades_data': [],
-                    'variable_components': var_combo
-                }
-            
-            stats = combination_stats[combo_key]
-            entry = entry_data['entry']
-            
-            # Update statistics
-            stats['trades'] += 1
-            pnl = entry.pnl or 0.0
-            rr = entry.rr or 0.0
-            
-            stats['total_rr'] += rr
-            stats['total_pnl'] += pnl
-            stats['running_pnl'] += pnl
-            
-            # Update peak and drawdown
-            if stats['running_pnl'] > stats['peak']:
-                stats['peak'] = stats['running_pnl']
-            else:
-                drawdown = stats['peak'] - stats['running_pnl']
-                if drawdown > stats['max_drawdown']:
-                    stats['max_drawdown'] = drawdown
-            
-            # Track wins/losses
-            if pnl > 0:
-                stats['wins'] += 1
-                stats['gross_profit'] += pnl
-                stats['win_amounts'].append(pnl)
-            elif pnl < 0:
-                stats['losses'] += 1
-                stats['gross_loss'] += abs(pnl)
-                stats['loss_amounts'].append(abs(pnl))
-            
-            # Store trade data
-            stats['trades_data'].append({
-                'date': entry.date.isoformat() if entry.date else None,
-                'pnl': pnl,
-                'rr': rr,
-                'symbol': entry.symbol,
-                'direction': entry.direction
-            })
-    
-    # Calculate final metrics for each combination
-    result = []
-    for combo_key, stats in combination_stats.items():
-        if stats['trades'] == 0:
-            continue
-            
-        # Calculate win rate
-        win_rate = (stats['wins'] / (stats['wins'] + stats['losses']) * 100) if (stats['wins'] + stats['losses']) > 0 else 0.0
-        
-        # Calculate average RR
-        avg_rr = stats['total_rr'] / stats['trades'] if stats['trades'] > 0 else 0.0
-        
-        # Calculate profit factor
-        profit_factor = 0.0
-        if stats['gross_loss'] > 0:
-            profit_factor = stats['gross_profit'] / stats['gross_loss']
-        elif stats['gross_profit'] > 0:
-            profit_factor = None  # Infinite profit factor
-        
-        # Calculate average win/loss
-        avg_win = sum(stats['win_amounts']) / len(stats['win_amounts']) if stats['win_amounts'] else 0.0
-        avg_loss = sum(stats['loss_amounts']) / len(stats['loss_amounts']) if stats['loss_amounts'] else 0.0
-        
-        # Calculate expectancy
-        win_prob = stats['wins'] / stats['trades'] if stats['trades'] > 0 else 0
-        loss_prob = stats['losses'] / stats['trades'] if stats['trades'] > 0 else 0
-        expectancy = (win_prob * avg_win) - (loss_prob * avg_loss)
-        
-        # Prepare result entry
-        result.append({
-            'combination': combo_key,
-            'trades': stats['trades'],
-            'wins': stats['wins'],
-            'losses': stats['losses'],
-            'win_rate': round(win_rate, 1),
-            'avg_rr': round(avg_rr, 2),
-            'pnl': round(stats['total_pnl'], 2),
-            'profit_factor': round(profit_factor, 2) if profit_factor is not None else None,
-            'gross_profit': round(stats['gross_profit'], 2),
-            'gross_loss': round(stats['gross_loss'], 2),
-            'avg_win': round(avg_win, 2) if stats['win_amounts'] else 0.0,
-            'avg_loss': round(avg_loss, 2) if stats['loss_amounts'] else 0.0,
-            'max_drawdown': round(stats['max_drawdown'], 2) if stats['max_drawdown'] is not None else 0.0,
-            'expectancy': round(expectancy, 2),
-            'variable_components': [f"{k}:{v}" for k, v in stats['variable_components']]
-        })
-    
-    # Sort by PnL descending
-    result.sort(key=lambda x: x['pnl'], reverse=True)
-    
-    return result
-
 import os
-from flask import Blueprint, request, jsonify, send_file, Response
+from flask import Blueprint, current_app, request, jsonify, send_file, Response, stream_with_context, url_for
 from flask_jwt_extended import jwt_required, get_jwt_identity
 import yfinance as yf
 from datetime import datetime, timedelta
 import pandas as pd
 import yfinance as yf
 import pandas as pd
-from datetime import datetime, timedelta, timezone
-from models import db, JournalEntry, ImportBatch
+from datetime import date, datetime, timedelta, timezone
+from models import db, JournalEntry, ImportBatch, TradeVariable
+from analytics import get_engine, get_entries, load_columns
+from analytics.cache import bump_data_version, cached_body, cached_response, conditional_response
+from analytics.downsample import downsample_args, downsample_points
+from analytics.excursions import (
+    DISTRIBUTION_METRICS as EXCURSION_DISTRIBUTION_METRICS, GROUP_FIELDS as EXCURSION_GROUP_FIELDS,
+    excursion_distribution, excursion_status, excursion_summary, start_excursion_job
+)
+from analytics.itemsets import SORT_FIELDS, variable_combinations
+from analytics.cube import cube_groups, cube_query, report_breakdown, strategy_breakdown, symbol_breakdown
+from analytics.ledger import daily_ledger
+from analytics.rollups import add_trades, move_trade, remove_trades, trade_values
+from analytics.tags import build_tags, spread, tag_aggregates, tag_breakdown, tag_series, user_variable_tags
+from analytics.timeparts import bucket_totals, set_time_parts, week_range
+from purge import purge_import_batch, remove_files
+from export import ExportUnavailable, stream_export
+from market import (
+    DEFAULT_HOLD, INTRADAY_INTERVALS, MAX_HOLD, daily_bars, exit_time_from_bars, intraday_bars,
+    recorded_exit_time, resample, trim
+)
+from ingest import (
+    IMPORT_EXTENSIONS, BulkImporter, adjust_batch_summary, batch_progress, entry_chunks,
+    fail_stale_import, fail_stale_imports, parse_trades_dataframe, progress_channel,
+    read_file_head, start_import
+)
+import base64
 import math
 import io
+import time
+from functools import partial, wraps
+from inspect import unwrap
+from urllib.parse import urlencode
+from sqlalchemy import select, tuple_
+import numpy as np
 import openai
 import json
 
@@ -303,7 +120,11 @@ def add_entry():
             extra_data=data.get('extra_data', {}),
             variables=data.get('variables', {})
         )
+        entry.tags = build_tags(user_id, entry.variables, entry.extra_data)
+        set_time_parts(entry)
         db.session.add(entry)
+        add_trades(user_id, [trade_values(entry)])
+        bump_data_version(user_id)
         db.session.commit()
 
         return jsonify({
@@ -332,42 +153,181 @@ def add_entry():
         print(" add_entry error:", e)
         return jsonify({'error': str(e)}), 500
 
+# ─── Trade list ──────────────────────────────────────────────────────────────
+# Fields /list can return; `fields=` picks a subset (id is always included)
+LIST_FIELDS = (
+    'id', 'symbol', 'direction', 'entry_price', 'exit_price', 'stop_loss', 'take_profit',
+    'quantity', 'contract_size', 'instrument_type', 'risk_amount', 'pnl', 'rr',
+    'strategy', 'setup', 'notes', 'extra_data', 'variables', 'import_batch_id',
+    'date', 'created_at', 'updated_at'
+)
+DEFAULT_LIST_FIELDS = (
+    'id', 'symbol', 'direction', 'entry_price', 'exit_price', 'quantity', 'contract_size',
+    'instrument_type', 'risk_amount', 'pnl', 'rr', 'notes', 'extra_data', 'variables',
+    'date', 'created_at', 'updated_at'
+)
+MAX_LIST_LIMIT = 500
+
+
+def encode_list_cursor(trade_date, trade_id):
+    raw = f"{trade_date.isoformat()}|{trade_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_list_cursor(cursor):
+    """Return (date, id) from a /list cursor; raises ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        trade_date, trade_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(trade_date), int(trade_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def list_filters(user_id, args):
+    """SQL filters for /list from the query string; raises ValueError on bad input."""
+    filters = [JournalEntry.user_id == user_id]
+
+    symbol = args.get('symbol')
+    if symbol:
+        symbols = [s.strip().upper() for s in symbol.split(',') if s.strip()]
+        filters.append(db.func.upper(JournalEntry.symbol).in_(symbols))
+
+    direction = args.get('direction')
+    if direction:
+        filters.append(db.func.lower(JournalEntry.direction) == direction.strip().lower())
+
+    for name in ('from_date', 'to_date'):
+        value = args.get(name)
+        if not value:
+            continue
+        try:
+            day = datetime.strptime(value, '%Y-%m-%d')
+        except ValueError:
+            raise ValueError(f'Invalid {name} format. Use YYYY-MM-DD')
+        if name == 'from_date':
+            filters.append(JournalEntry.date >= day)
+        else:
+            filters.append(JournalEntry.date < day + timedelta(days=1))
+
+    batch_id = args.get('batch_id')
+    if batch_id:
+        try:
+            filters.append(JournalEntry.import_batch_id == int(batch_id))
+        except ValueError:
+            raise ValueError('batch_id must be an integer')
+
+    # tag=key:value (repeatable, all must match)
+    for tag in args.getlist('tag'):
+        key, sep, value = tag.partition(':')
+        if not sep or not key.strip() or not value.strip():
+            raise ValueError('tag must look like key:value')
+        filters.append(JournalEntry.id.in_(
+            select(TradeVariable.entry_id).where(
+                TradeVariable.user_id == user_id,
+                TradeVariable.key == key.strip().lower(),
+                TradeVariable.value == value.strip(),
+            )
+        ))
+    return filters
+
+
+def list_row(row, fields):
+    item = {}
+    for name, value in zip(fields, row):
+        if name in ('extra_data', 'variables'):
+            value = value or {}
+        elif name in ('date', 'created_at', 'updated_at'):
+            value = value.isoformat() if value else None
+        item[name] = value
+    return item
+
+
 @journal_bp.route('/list', methods=['GET'])
 @jwt_required()
+@conditional_response
 def list_entries():
+    """
+    Return the current user's trades, newest first by (date, id).
+
+    Query Parameters:
+        limit: Page size (1-500); omit to return every matching trade
+        cursor: Value of the previous page's X-Next-Cursor header
+        order: 'desc' (default) or 'asc'
+        fields: Comma-separated subset of LIST_FIELDS (e.g. leave out
+                extra_data / variables)
+        symbol: Symbol or comma-separated symbols
+        direction: 'long' or 'short'
+        from_date / to_date: Inclusive date range (YYYY-MM-DD)
+        batch_id: Only trades from this import batch
+        tag: key:value variable tag (repeatable)
+
+    Headers:
+        X-Total-Count: number of trades matching the filters
+        X-Next-Cursor / Link: present when another page follows
+    """
     try:
         user_id = int(get_jwt_identity())
 
-        entries = (
-            JournalEntry.query
-            .filter_by(user_id=user_id)
-            .order_by(JournalEntry.created_at.desc())
-            .all()
-        )
+        fields = request.args.get('fields')
+        if fields:
+            requested = [f.strip() for f in fields.split(',') if f.strip()]
+            unknown = [f for f in requested if f not in LIST_FIELDS]
+            if unknown:
+                return jsonify({'error': f"Unknown fields: {', '.join(unknown)}"}), 400
+            fields = ['id'] + [f for f in dict.fromkeys(requested) if f != 'id']
+        else:
+            fields = list(DEFAULT_LIST_FIELDS)
 
-        result = []
-        for e in entries:
-            result.append({
-                'id': e.id,
-                'symbol': e.symbol,
-                'direction': e.direction,
-                'entry_price': e.entry_price,
-                'exit_price': e.exit_price,
-                'quantity': e.quantity,
-                'contract_size': e.contract_size,
-                'instrument_type': e.instrument_type,
-                'risk_amount': e.risk_amount,
-                'pnl': e.pnl,
-                'rr': e.rr,
-                'notes': e.notes,
-                'extra_data': e.extra_data or {},
-                'variables': e.variables or {},  # 
-                'date': e.date.isoformat(),
-                'created_at': e.created_at.isoformat(),
-                'updated_at': e.updated_at.isoformat()
-            })
+        descending = request.args.get('order', 'desc').lower() != 'asc'
+        limit = request.args.get('limit', type=int)
+        if limit is not None:
+            limit = min(max(limit, 1), MAX_LIST_LIMIT)
 
-        return jsonify(result), 200
+        try:
+            filters = list_filters(user_id, request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        total = db.session.execute(
+            select(db.func.count()).select_from(JournalEntry).where(*filters)
+        ).scalar()
+
+        table = JournalEntry.__table__
+        # Keyset columns ride along at the end so the cursor can be built
+        stmt = select(*[table.c[f] for f in fields], table.c.date, table.c.id).where(*filters)
+
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                position = tuple_(table.c.date, table.c.id)
+                after = tuple_(*decode_list_cursor(cursor))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            stmt = stmt.where(position < after if descending else position > after)
+
+        if descending:
+            stmt = stmt.order_by(table.c.date.desc(), table.c.id.desc())
+        else:
+            stmt = stmt.order_by(table.c.date.asc(), table.c.id.asc())
+        if limit is not None:
+            stmt = stmt.limit(limit + 1)
+
+        rows = db.session.execute(stmt).all()
+        has_more = limit is not None and len(rows) > limit
+        rows = rows[:limit] if has_more else rows
+
+        response = jsonify([list_row(row, fields) for row in rows])
+        response.headers['X-Total-Count'] = str(total)
+        if has_more:
+            last = rows[-1]
+            next_cursor = encode_list_cursor(last[-2], last[-1])
+            response.headers['X-Next-Cursor'] = next_cursor
+            args = request.args.to_dict(flat=False)
+            args['cursor'] = [next_cursor]
+            next_url = request.base_url + '?' + urlencode(args, doseq=True)
+            response.headers['Link'] = f'<{next_url}>; rel="next"'
+        return response, 200
 
     except Exception as e:
         print(" list_entries error:", e)
@@ -375,342 +335,17 @@ def list_entries():
 
 @journal_bp.route('/stats', methods=['GET'])
 @jwt_required()
+@cached_response
 def stats():
     try:
         user_id_str = get_jwt_identity()
         user_id = int(user_id_str)
+        try:
+            max_points, method = downsample_args()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-        entries = (
-            JournalEntry.query
-            .filter_by(user_id=user_id)
-            .order_by(JournalEntry.created_at.asc())
-            .all()
-        )
-
-        if not entries:
-            return jsonify({
-                "total_trades": 0,
-                "total_pnl": 0.0,
-                "win_rate": 0.0,
-                "profit_factor": None,
-                "avg_rr": 0.0,
-                "max_drawdown": 0.0,
-                "expectancy": 0.0,
-                "kelly_percentage": 0.0,
-                "sharpe_ratio": 0.0,
-                "sortino_ratio": None,
-                "recovery_factor": None,
-                "avg_win": 0.0,
-                "avg_loss": 0.0,
-                "avg_pnl": 0.0,
-                "max_consecutive_wins": 0,
-                "max_consecutive_losses": 0,
-                "buy_pnl": 0.0,
-                "sell_pnl": 0.0,
-                "win_loss": {"wins": 0, "losses": 0},
-                "best_trade": {"symbol": None, "pnl": 0.0, "date": None, "rr": 0.0},
-                "worst_trade": {"symbol": None, "pnl": 0.0, "date": None, "rr": 0.0},
-                "equity_curve": [],
-                "pnl_by_date": [],
-                "gross_profit": 0.0,
-                "gross_loss": 0.0,
-                "top_symbols": [],
-                "recent_trades": [],
-                "best_day_of_week": {"day": None, "pnl": 0.0},
-                "worst_day_of_week": {"day": None, "pnl": 0.0},
-                "best_hour": {"hour": None, "pnl": 0.0},
-                "worst_hour": {"hour": None, "pnl": 0.0},
-                "max_drawdown_percent": 0.0,
-                "trades": []
-            }), 200
-        total_trades = len(entries)
-        total_pnl = sum(e.pnl for e in entries)
-
-        # Calculate wins, losses, and break-even trades
-        wins = [e for e in entries if e.pnl > 0]
-        losses = [e for e in entries if e.pnl < 0]
-        break_even = [e for e in entries if e.pnl == 0]
-        
-        win_count = len(wins)
-        loss_count = len(losses)
-        break_even_count = len(break_even)
-        
-        # Calculate win rate as (winning trades / (total trades - break even trades))
-        total_trades_without_break_even = total_trades - break_even_count
-        win_rate = (win_count / total_trades_without_break_even) * 100 if total_trades_without_break_even else 0.0
-
-        gross_profit = sum(e.pnl for e in wins)
-        gross_loss = abs(sum(e.pnl for e in losses))
-        pf_raw = (gross_profit / gross_loss) if gross_loss != 0 else (
-            float('inf') if gross_profit > 0 else 0.0
-        )
-        profit_factor = None if not math.isfinite(pf_raw) else round(pf_raw, 2)
-
-        avg_rr_raw = sum(e.rr for e in entries) / total_trades if total_trades else 0.0
-        avg_rr = round(avg_rr_raw, 2)
-
-        # Build equity curve
-        equity = 0.0
-        equity_curve = []
-        for e in entries:
-            equity += e.pnl
-            trade_dt = e.date or e.created_at
-            equity_curve.append({
-                "date": trade_dt.strftime("%Y-%m-%d"),
-                "cumulative_pnl": round(equity, 2)
-            })
-
-        # Compute max drawdown (absolute)
-        peak = equity_curve[0]["cumulative_pnl"]
-        max_dd = 0.0
-        for point in equity_curve:
-            if point["cumulative_pnl"] > peak:
-                peak = point["cumulative_pnl"]
-            drawdown = peak - point["cumulative_pnl"]
-            if drawdown > max_dd:
-                max_dd = drawdown
-        max_drawdown = round(max_dd, 2)
-
-        # PnL by date
-        pnl_by_date_dict = {}
-        for e in entries:
-            date_key = (e.date or e.created_at).strftime("%Y-%m-%d")
-            pnl_by_date_dict.setdefault(date_key, 0.0)
-            pnl_by_date_dict[date_key] += e.pnl
-        pnl_by_date = [[date, pnl] for date, pnl in pnl_by_date_dict.items()]
-
-        # Expectancy, Kelly, Sharpe, Sortino, Recovery
-        avg_win_val = (sum(e.pnl for e in wins) / win_count) if win_count else 0.0
-        avg_loss_val = (abs(sum(e.pnl for e in losses)) / loss_count) if loss_count else 0.0
-
-        expectancy_raw = (
-            (avg_win_val * (win_rate / 100)) -
-            (avg_loss_val * (loss_count / total_trades))
-        ) if total_trades else 0.0
-        expectancy = round(expectancy_raw, 2)
-
-        w = win_rate / 100.0
-        r_ratio = (avg_win_val / avg_loss_val) if avg_loss_val != 0 else float('inf')
-        kelly_raw = (w - ((1 - w) / r_ratio)) * 100 if (avg_loss_val and win_count) else 0.0
-        kelly_percentage = None if not math.isfinite(kelly_raw) else round(kelly_raw, 2)
-
-        pl_values = [e.pnl for e in entries]
-        mean_pnl = sum(pl_values) / total_trades
-
-        # Calculate Sharpe Ratio using daily returns with a fixed initial capital
-        # This prevents division by small numbers that can inflate returns
-        
-        # Group trades by date
-        trades_by_date = {}
-        for entry in entries:
-            trade_date = entry.date.strftime('%Y-%m-%d') if entry.date else entry.created_at.strftime('%Y-%m-%d')
-            if trade_date not in trades_by_date:
-                trades_by_date[trade_date] = []
-            trades_by_date[trade_date].append(entry)
-        
-        # Sort dates chronologically
-        sorted_dates = sorted(trades_by_date.keys())
-        
-        # Calculate daily returns
-        daily_returns = []
-        
-        # Use a fixed initial capital of 10,000 (or another reasonable starting amount)
-        # This is a common approach to normalize returns
-        initial_capital = 10000.0
-        current_equity = initial_capital
-        
-        # Calculate daily returns as percentage change in equity
-        for date in sorted_dates:
-            # Calculate daily P&L
-            daily_pnl = sum(entry.pnl for entry in trades_by_date[date] if entry.pnl is not None)
-            
-            # Calculate daily return as percentage of current equity
-            # Add a small constant to avoid division by zero
-            daily_return = daily_pnl / (current_equity + 1e-8)
-            daily_returns.append(daily_return)
-            
-            # Update current equity for next day's calculation
-            current_equity += daily_pnl
-        
-        # Calculate Sharpe Ratio (annualized with 252 trading days)
-        if len(daily_returns) >= 2:  # Need at least 2 points for stddev
-            mean_return = sum(daily_returns) / len(daily_returns)
-            stddev = (sum((x - mean_return) ** 2 for x in daily_returns) / len(daily_returns)) ** 0.5
-            sharpe_ratio = round((mean_return / stddev * (252 ** 0.5)) if stddev != 0 else 0.0, 2)
-        else:
-            sharpe_ratio = 0.0
-
-        # Sortino Ratio: downside deviation uses only negative returns
-        downside_sq_sum = sum((r_val ** 2) for r_val in pl_values if r_val < 0)
-        downside_variance = downside_sq_sum / total_trades
-        downside_std = math.sqrt(downside_variance)
-        if downside_std == 0:
-            sortino_ratio = None
-        else:
-            sortino_raw = mean_pnl / downside_std
-            sortino_ratio = round(sortino_raw, 2)
-
-        rec_raw = (total_pnl / max_dd) if max_dd != 0 else (
-            float('inf') if total_pnl > 0 else 0.0
-        )
-        recovery_factor = None if not math.isfinite(rec_raw) else round(rec_raw, 2)
-
-        # Consecutive wins/losses
-        consec_wins = consec_losses = max_consec_wins = max_consec_losses = 0
-        for e in entries:
-            if e.pnl > 0:
-                consec_wins += 1
-                consec_losses = 0
-            else:
-                consec_losses += 1
-                consec_wins = 0
-            max_consec_wins = max(max_consec_wins, consec_wins)
-            max_consec_losses = max(max_consec_losses, consec_losses)
-
-        buy_pnl = sum(e.pnl for e in entries if e.direction.lower() == 'long')
-        sell_pnl = sum(e.pnl for e in entries if e.direction.lower() == 'short')
-
-        # Best / Worst trades
-        best_trade_obj = max(entries, key=lambda x: x.pnl)
-        worst_trade_obj = min(entries, key=lambda x: x.pnl)
-        best_trade = {
-            "symbol": best_trade_obj.symbol,
-            "pnl": best_trade_obj.pnl,
-            "date": best_trade_obj.created_at.strftime("%Y-%m-%d"),
-            "rr": best_trade_obj.rr
-        }
-        worst_trade = {
-            "symbol": worst_trade_obj.symbol,
-            "pnl": worst_trade_obj.pnl,
-            "date": worst_trade_obj.created_at.strftime("%Y-%m-%d"),
-            "rr": worst_trade_obj.rr
-        }
-
-        # Top-performing symbols
-        symbol_totals = {}
-        for e in entries:
-            symbol_totals.setdefault(e.symbol, {"pnl": 0.0, "trades": 0, "wins": 0})
-            symbol_totals[e.symbol]["pnl"] += e.pnl
-            symbol_totals[e.symbol]["trades"] += 1
-            if e.pnl > 0:
-                symbol_totals[e.symbol]["wins"] += 1
-
-        top_symbols = sorted(
-            symbol_totals.items(),
-            key=lambda kv: kv[1]["pnl"],
-            reverse=True
-        )
-        top_symbols_clean = [[sym, data] for sym, data in top_symbols[:6]]
-
-        # Recent trades
-        recent_trades_objs = sorted(entries, key=lambda x: (x.date or x.created_at), reverse=True)[:5]
-        recent_trades = []
-        for e in recent_trades_objs:
-            recent_trades.append({
-                "symbol": e.symbol,
-                "direction": "Long" if e.direction.lower() == "long" else "Short",
-                "date": (e.date or e.created_at).strftime("%Y-%m-%d"),
-                "pnl": e.pnl,
-                "rr": e.rr,
-                "setup": e.notes or ""
-            })
-
-        # ===== ADDITIONAL TIME-BASED METRICS =====
-
-        # 1) Day-of-week P&L totals (0=Monday, ..., 6=Sunday)
-        day_of_week_map = {i: 0.0 for i in range(7)}
-        # 2) Hourly P&L totals (0..23)
-        hour_map = {h: 0.0 for h in range(24)}
-
-        for e in entries:
-            dt = e.created_at
-            dow = dt.weekday()  # Monday=0
-            day_of_week_map[dow] += e.pnl
-            hour_map[dt.hour] += e.pnl
-
-        # Best/Worst day of week
-        best_dow_index = max(day_of_week_map, key=lambda k: day_of_week_map[k])
-        worst_dow_index = min(day_of_week_map, key=lambda k: day_of_week_map[k])
-        dow_labels = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-        best_day_of_week = {
-            "day": dow_labels[best_dow_index],
-            "pnl": round(day_of_week_map[best_dow_index], 2)
-        }
-        worst_day_of_week = {
-            "day": dow_labels[worst_dow_index],
-            "pnl": round(day_of_week_map[worst_dow_index], 2)
-        }
-
-        # Best/Worst hour
-        best_hour = max(hour_map, key=lambda h: hour_map[h])
-        worst_hour = min(hour_map, key=lambda h: hour_map[h])
-        best_hour_obj = {
-            "hour": best_hour,
-            "pnl": round(hour_map[best_hour], 2)
-        }
-        worst_hour_obj = {
-            "hour": worst_hour,
-            "pnl": round(hour_map[worst_hour], 2)
-        }
-
-        # Max drawdown percent
-        peak_equity = max([pt["cumulative_pnl"] for pt in equity_curve] + [1.0])
-        max_drawdown_percent = round((max_dd / peak_equity) * 100, 2) if peak_equity else 0.0
-
-        return jsonify({
-            "total_trades": total_trades,
-            "total_pnl": round(total_pnl, 2),
-            "win_rate": round(win_rate, 2),
-            "profit_factor": profit_factor,
-            "avg_rr": avg_rr,
-            "max_drawdown": max_drawdown,
-            "expectancy": expectancy,
-            "kelly_percentage": kelly_percentage,
-            "sharpe_ratio": sharpe_ratio,
-            "sortino_ratio": sortino_ratio,
-            "recovery_factor": recovery_factor,
-            "avg_win": round(avg_win_val, 2),
-            "avg_loss": round(avg_loss_val, 2),
-            "avg_pnl": round(mean_pnl, 2),
-            "max_consecutive_wins": max_consec_wins,
-            "max_consecutive_losses": max_consec_losses,
-            "buy_pnl": round(buy_pnl, 2),
-            "sell_pnl": round(sell_pnl, 2),
-            "win_loss": {"wins": win_count, "losses": loss_count},
-            "best_trade": best_trade,
-            "worst_trade": worst_trade,
-            "equity_curve": equity_curve,
-            "pnl_by_date": pnl_by_date,
-            "gross_profit": round(gross_profit, 2),
-            "gross_loss": round(gross_loss, 2),
-            "top_symbols": top_symbols_clean,
-            "recent_trades": recent_trades,
-            "best_day_of_week": best_day_of_week,
-            "worst_day_of_week": worst_day_of_week,
-            "best_hour": best_hour_obj,
-            "worst_hour": worst_hour_obj,
-            "max_drawdown_percent": max_drawdown_percent,
-            "trades": [
-                {
-                    "id": e.id,
-                    "symbol": e.symbol,
-                    "direction": e.direction,
-                    "pnl": e.pnl,
-                    "rr": e.rr,
-                    "entry_price": e.entry_price,
-                    "exit_price": e.exit_price,
-                    "quantity": e.quantity,
-                    "instrument_type": e.instrument_type,
-                    "contract_size": e.contract_size,
-                    "risk_amount": e.risk_amount,
-                    "strategy": e.strategy,
-                    "setup": e.setup,
-                    "notes": e.notes,
-                    "date": (e.date or e.entry_date or e.created_at).strftime("%Y-%m-%d")
-                }
-                for e in entries
-            ]
-        }), 200
+        return jsonify(get_engine(user_id).stats_payload(max_points, method)), 200
 
     except Exception as e:
         print(" stats error:", e)
@@ -728,7 +363,10 @@ def delete_entry(id):
         if entry is None:
             return jsonify({'error': 'Trade not found or not yours'}), 404
 
+        adjust_batch_summary(entry.import_batch_id, trades=-1, pnl=-(entry.pnl or 0.0))
+        remove_trades(user_id, [trade_values(entry)])
         db.session.delete(entry)
+        bump_data_version(user_id)
         db.session.commit()
         return jsonify({'message': 'Journal entry deleted'}), 200
 
@@ -741,63 +379,49 @@ def delete_entry(id):
 @jwt_required()
 def export_entries():
     """
-    Export all journal entries as an .xlsx file.
+    Stream the current user's journal entries as a download.
+    ?format=xlsx (default) | csv | ndjson | parquet
     Columns: symbol, direction, entry_price, exit_price,
              quantity, contract_size, instrument_type, risk_amount,
-             pnl, rr, notes, created_at
+             pnl, rr, notes, date, created_at
     """
     try:
-        entries = JournalEntry.query.order_by(JournalEntry.created_at.asc()).all()
-
-        rows = []
-        for e in entries:
-            rows.append({
-                'symbol': e.symbol,
-                'direction': e.direction,
-                'entry_price': e.entry_price,
-                'exit_price': e.exit_price,
-                'quantity': e.quantity,
-                'contract_size': e.contract_size,
-                'instrument_type': e.instrument_type,
-                'risk_amount': e.risk_amount,
-                'pnl': e.pnl,
-                'rr': e.rr,
-                'notes': e.notes,
-                'created_at': e.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-            })
-
-        df = pd.DataFrame(rows)
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Journal')
-        output.seek(0)
-
-        return send_file(
-            output,
-            download_name='trading_journal.xlsx',
-            as_attachment=True,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-
+        user_id = int(get_jwt_identity())
+        fmt = request.args.get('format', 'xlsx').lower()
+        body, mimetype, filename = stream_export(user_id, fmt)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except ExportUnavailable as e:
+        return jsonify({'error': str(e)}), 501
     except Exception as e:
         print(" export_entries error:", e)
         return jsonify({'error': str(e)}), 500
 
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 
-# ─── Excel-upload importer at /import/excel ───────────────────────────────────
+# ─── File-upload importer at /import/excel ───────────────────────────────────
 @journal_bp.route('/import/excel', methods=['POST'])
 @jwt_required()
 def import_entries_excel():
     """
-    Upload an Excel file under multipart/form-data field "file".
-    Saves the file to disk, creates an ImportBatch with filepath,
-    then reads trades out of it and inserts JournalEntry rows.
+    Upload a CSV or Excel file under multipart/form-data field "file".
+    Saves the file to disk, creates a pending ImportBatch with filepath
+    and queues a background job that streams the trades into the journal.
+
+    Responds 202 with the batch id; follow /import/<batch_id>/events (or
+    poll /import/<batch_id>/status) for progress and the final counts.
     """
     if 'file' not in request.files:
         return jsonify({'error': 'No file part in request'}), 400
     file = request.files['file']
     if file.filename == '':
         return jsonify({'error': 'No selected file'}), 400
+    if not file.filename.lower().endswith(IMPORT_EXTENSIONS):
+        return jsonify({'error': f"Unsupported file type; expected one of {', '.join(IMPORT_EXTENSIONS)}"}), 400
 
     try:
         user_id = int(get_jwt_identity())
@@ -808,7 +432,8 @@ def import_entries_excel():
             user_id=user_id,
             filename=filename,
             imported_at=datetime.utcnow(),
-            filepath=''  # Will update in a momentaa
+            filepath='',  # Will update in a moment
+            status='pending'
         )
         db.session.add(batch)
         db.session.flush()  # so batch.id is populated
@@ -821,65 +446,303 @@ def import_entries_excel():
 
         # 3) Update the batch with its filepath
         batch.filepath = save_path
-        db.session.commit()   # commit so that filepath is stored
+        batch.byte_size = os.path.getsize(save_path)
+        bump_data_version(user_id)   # the new batch shows up in /import/history
+        db.session.commit()   # commit so the job can see the batch
 
-        # 4) Read that same Excel file via pandas
-        df = pd.read_excel(save_path)
-        imported_count = 0
+        # 4) Parse and insert in the background
+        start_import(batch.id)
+        return jsonify({
+            'message': 'Import started',
+            'batch_id': batch.id,
+            'status': 'pending',
+            'status_url': f"/api/journal/import/{batch.id}/status",
+            'events_url': f"/api/journal/import/{batch.id}/events"
+        }), 202
 
-        for _, row in df.iterrows():
-            symbol      = row.get('symbol')
-            direction   = row.get('direction')
-            entry_price = row.get('entry_price')
-            exit_price  = row.get('exit_price')
-            pnl         = row.get('pnl')
+    except Exception as e:
+        db.session.rollback()
+        print(" import_entries_excel error:", e)
+        return jsonify({'error': str(e)}), 500
 
-            # Skip if required fields are NaN
-            if pd.isna(symbol) or pd.isna(direction) or pd.isna(entry_price) or pd.isna(exit_price) or pd.isna(pnl):
-                continue
 
-            # Determine trade date (use provided date or now)
-            trade_date = None
-            if 'date' in row and not pd.isna(row['date']):
-                trade_date = pd.to_datetime(row['date'], errors='coerce')
-            elif 'created_at' in row and not pd.isna(row['created_at']):
-                trade_date = pd.to_datetime(row['created_at'], errors='coerce')
-            
-            if not pd.isna(trade_date):
-                trade_date = trade_date.to_pydatetime()
-            else:
-                trade_date = datetime.utcnow()
+def fails_stale_imports(view):
+    """
+    Mark the user's interrupted imports as failed before the view runs.
 
-            entry = JournalEntry(
-                user_id=user_id,
-                symbol=str(symbol).upper(),
-                direction=str(direction).lower(),
-                entry_price=float(entry_price),
-                exit_price=float(exit_price),
-                quantity=float(row['quantity']) if 'quantity' in row and not pd.isna(row['quantity']) else 1.0,
-                contract_size=float(row['contract_size']) if 'contract_size' in row and not pd.isna(row['contract_size']) else None,
-                instrument_type=row.get('instrument_type') if 'instrument_type' in row and not pd.isna(row['instrument_type']) else 'crypto',
-                risk_amount=float(row['risk_amount']) if 'risk_amount' in row and not pd.isna(row['risk_amount']) else 1.0,
-                pnl=float(pnl),
-                rr=float(row['rr']) if 'rr' in row and not pd.isna(row['rr']) else 0.0,
-                notes=row['notes'] if 'notes' in row and not pd.isna(row['notes']) else None,
-                date=trade_date,
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow(),
-                import_batch_id=batch.id
-            )
-            db.session.add(entry)
-            imported_count += 1
+    Goes above ``@conditional_response`` so the data-version bump of a
+    recovered batch is seen by the 304 check.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        fail_stale_imports(int(get_jwt_identity()))
+        return view(*args, **kwargs)
+    return wrapper
 
-        db.session.commit()
-        return jsonify({'message': 'Excel import successful', 'imported': imported_count}), 200
+
+@journal_bp.route('/import/<int:batch_id>/status', methods=['GET'])
+@jwt_required()
+def import_status(batch_id):
+    """Progress and outcome of an import batch."""
+    try:
+        user_id = int(get_jwt_identity())
+        batch = ImportBatch.query.filter_by(id=batch_id, user_id=user_id).first()
+        if batch is None:
+            return jsonify({'error': 'Import batch not found'}), 404
+        if fail_stale_import(batch):
+            db.session.commit()
+        return jsonify({
+            **batch_progress(batch),
+            'filename': batch.filename,
+            'imported_at': batch.imported_at.isoformat(),
+            'started_at': batch.started_at.isoformat() if batch.started_at else None,
+            'finished_at': batch.finished_at.isoformat() if batch.finished_at else None,
+        }), 200
 
     except Exception as e:
-        db.session.rollback()
-        print(" import_entries_excel error:", e)
+        print(" import_status error:", e)
         return jsonify({'error': str(e)}), 500
 
 
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@journal_bp.route('/import/<int:batch_id>/events', methods=['GET'])
+@jwt_required()
+def import_events(batch_id):
+    """
+    Server-Sent Events stream of an import's progress.
+
+    Emits a ``progress`` event (rows parsed / inserted / skipped / failed
+    and rows_per_second) whenever the counters move and a final
+    ``done`` event once the batch has completed or failed.  When the job
+    runs in this process its progress buffer is followed directly;
+    otherwise the batch row is polled every IMPORT_EVENTS_INTERVAL seconds.
+
+    Each open stream occupies one gunicorn thread, so deployments run the
+    threaded worker (``--worker-class gthread``, see the Procfile) and other
+    requests keep being served while an import is watched.  A stream lasts
+    at most IMPORT_EVENTS_TIMEOUT seconds; clients reconnect (EventSource
+    does so by itself after the ``retry`` delay) and get the current state.
+    """
+    user_id = int(get_jwt_identity())
+    batch = ImportBatch.query.filter_by(id=batch_id, user_id=user_id).first()
+    if batch is None:
+        return jsonify({'error': 'Import batch not found'}), 404
+    if fail_stale_import(batch):
+        db.session.commit()
+    db.session.rollback()  # don't hold a read transaction while streaming
+
+    interval = current_app.config.get('IMPORT_EVENTS_INTERVAL', 0.5)
+    deadline = time.monotonic() + current_app.config.get('IMPORT_EVENTS_TIMEOUT', 20)
+
+    def stream():
+        yield f"retry: {int(interval * 1000)}\n\n"
+        sequence, last = 0, None
+        while True:
+            channel = progress_channel(batch_id)
+            if channel is not None:
+                events = channel.wait(sequence, interval)
+                if events:
+                    sequence, progress = events[-1]
+                else:
+                    progress = last
+            else:
+                batch = db.session.get(ImportBatch, batch_id)
+                progress = batch_progress(batch) if batch is not None else None
+                db.session.rollback()
+                if progress is None:
+                    yield sse_event('done', {'batch_id': batch_id, 'status': 'deleted'})
+                    return
+
+            if progress is not None and progress != last:
+                yield sse_event('progress', progress)
+                last = progress
+            else:
+                yield ": keep-alive\n\n"
+
+            if last is not None and last['status'] in ('completed', 'failed'):
+                yield sse_event('done', last)
+                return
+            if time.monotonic() >= deadline:
+                return
+            if channel is None:
+                time.sleep(interval)
+
+    response = Response(stream_with_context(stream()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def json_trade_entry(t):
+    """
+    JournalEntry column values for one trade of a JSON import, or None
+    when it lacks the required 'symbol', 'direction' and 'pnl'.
+    """
+    # only insert if required fields exist
+    if not all(k in t for k in ('symbol', 'direction', 'pnl')):
+        return None
+
+    symbol    = t['symbol'].upper()
+    direction = t['direction'].lower()
+    pnl       = float(t['pnl'])
+    rr        = float(t.get('rr', 0.0))
+    notes     = t.get('notes', '')
+
+    # Parse trade date and time if provided
+    trade_date = None
+    trade_time = None
+    created_at = None
+    
+    # First, check if we have a timestamp field (ISO format with time)
+    if 'timestamp' in t and t['timestamp']:
+        try:
+            created_at = datetime.fromisoformat(str(t['timestamp']).replace('Z', '+00:00'))
+            trade_date = created_at.date()
+        except (ValueError, TypeError):
+            pass
+    
+    # If no timestamp, try to parse date and time separately
+    if not created_at:
+        # Parse date
+        if 'date' in t and t['date']:
+            date_str = str(t['date']).strip()
+            if date_str:  # Only try parsing if we have a non-empty string
+                try:
+                    # First try ISO format
+                    trade_date = datetime.fromisoformat(date_str).date()
+                except (ValueError, TypeError):
+                    try:
+                        # Try parsing as YYYY-MM-DD
+                        trade_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+                    except (ValueError, TypeError):
+                        try:
+                            # Try parsing as MM/DD/YYYY
+                            trade_date = datetime.strptime(date_str, '%m/%d/%Y').date()
+                        except (ValueError, TypeError):
+                            try:
+                                # Try parsing as DD/MM/YYYY
+                                trade_date = datetime.strptime(date_str, '%d/%m/%Y').date()
+                            except (ValueError, TypeError):
+                                pass  # Keep None if all parsing fails
+        
+        # Parse time if available
+        if 'time' in t and t['time']:
+            time_str = str(t['time']).strip()
+            if time_str:
+                try:
+                    # Try parsing as HH:MM:SS or HH:MM
+                    if ':' in time_str:
+                        time_parts = time_str.split(':')
+                        hours = int(time_parts[0])
+                        minutes = int(time_parts[1]) if len(time_parts) > 1 else 0
+                        seconds = int(time_parts[2]) if len(time_parts) > 2 else 0
+                        trade_time = (hours, minutes, seconds)
+                except (ValueError, IndexError):
+                    pass
+    
+    # If we have both date and time, combine them
+    if trade_date and trade_time:
+        try:
+            created_at = datetime.combine(
+                trade_date, 
+                datetime.min.time().replace(
+                    hour=trade_time[0], 
+                    minute=trade_time[1], 
+                    second=trade_time[2] if len(trade_time) > 2 else 0
+                )
+            )
+        except (ValueError, TypeError):
+            pass
+    
+    # If we still don't have a created_at, use the current time
+    if not created_at:
+        if trade_date:
+            created_at = datetime.combine(trade_date, datetime.utcnow().time())
+        else:
+            created_at = datetime.utcnow()
+            trade_date = created_at.date()
+
+    # Extract variables from the trade data and normalize to lowercase
+    variables = {}
+    # Check for common variable fields
+    variable_fields = ['setup', 'mistake', 'emotion', 'strategy', 'market_condition']
+    for field in variable_fields:
+        if field in t and t[field]:
+            # If it's a list, process each item
+            if isinstance(t[field], list):
+                # Filter out empty strings, strip whitespace, and convert to lowercase
+                variables[field] = [
+                    str(item).lower().strip() 
+                    for item in t[field] 
+                    if item and str(item).strip()
+                ]
+            else:
+                value = str(t[field]).strip().lower()
+                if value:  # Only add non-empty values
+                    variables[field] = [value]
+    
+    # Also check for any fields that start with 'var_' as potential variables
+    for key, value in t.items():
+        if key.startswith('var_') and value:
+            var_name = key[4:].lower()  # Remove 'var_' prefix and convert to lowercase
+            if isinstance(value, list):
+                # Process each item in the list
+                variables[var_name] = [
+                    str(item).lower().strip() 
+                    for item in value 
+                    if item is not None and str(item).strip()
+                ]
+            else:
+                value = str(value).strip().lower()
+                if value:  # Only add non-empty values
+                    variables[var_name] = [value]
+                    
+    # Process any additional variables in extra_data
+    if 'extra_data' in t and isinstance(t['extra_data'], dict):
+        for key, value in t['extra_data'].items():
+            if key not in variables:  # Don't overwrite existing variables
+                if isinstance(value, list):
+                    variables[key.lower()] = [
+                        str(item).lower().strip() 
+                        for item in value 
+                        if item is not None and str(item).strip()
+                    ]
+                elif value is not None and str(value).strip():
+                    variables[key.lower()] = [str(value).lower().strip()]
+    
+    # If no variables were found, set to None to avoid storing empty dict
+    variables = variables if variables else None
+    
+    # Get entry and exit prices with proper defaults
+    entry_price = float(t.get('entry_price', 0.0)) if t.get('entry_price') is not None else 0.0
+    exit_price = float(t.get('exit_price', 0.0)) if t.get('exit_price') is not None else 0.0
+    stop_loss = float(t['stop_loss']) if t.get('stop_loss') is not None else None
+    take_profit = float(t['take_profit']) if t.get('take_profit') is not None else None
+    
+    return {
+        'symbol': str(symbol).upper(),
+        'direction': str(direction).lower(),
+        'entry_price': entry_price,
+        'exit_price': exit_price,
+        'stop_loss': stop_loss,
+        'take_profit': take_profit,
+        'quantity': float(t.get('quantity', 1.0)),
+        'contract_size': float(t['contract_size']) if t.get('contract_size') is not None else None,
+        'instrument_type': t.get('instrument_type', 'crypto'),
+        'risk_amount': float(t.get('risk_amount', 0.0)) if t.get('risk_amount') is not None else 0.0,
+        'pnl': pnl,
+        'rr': rr,
+        'notes': notes,
+        'variables': variables,  # Save the extracted variables
+        'extra_data': t.get('extra_data', {}),
+        'date': trade_date,
+        'created_at': created_at,  # Use the parsed timestamp
+    }
+
+
 @journal_bp.route('/import', methods=['POST'])
 @jwt_required()
 def import_trades_json():
@@ -887,7 +750,11 @@ def import_trades_json():
     Accepts a list of trades (JSON‐array).  Each trade must have at least
     'symbol', 'direction' and 'pnl'.  Instead of immediately inserting them,
     we first create an ImportBatch row so that it shows up in /import/history.
+
+    With ?background=1 the trades are inserted by a background job and the
+    response is 202 with the batch id, to be followed on /import/<id>/events.
     """
+    importer = None
     try:
         user_id = int(get_jwt_identity())
         data = request.get_json()
@@ -895,207 +762,68 @@ def import_trades_json():
         if not isinstance(trades, list):
             return jsonify({'error': 'Expected a list of trades'}), 400
 
+        background = request.args.get('background', '').lower() in ('1', 'true', 'yes')
+
         # 1) Create a new ImportBatch record (no file‐upload here, so filepath is blank)
         batch = ImportBatch(
             user_id=user_id,
             filename=data.get('filename', f'manual_import_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}'),
             imported_at=datetime.utcnow(),
-            filepath=''   # no actual file on disk for JSON imports
+            filepath='',  # no actual file on disk for JSON imports
+            status='pending' if background else 'running',
+            started_at=None if background else datetime.utcnow(),
+            byte_size=request.content_length
         )
         db.session.add(batch)
-        db.session.flush()   # so batch.id gets populated
+        bump_data_version(user_id)   # the new batch shows up in /import/history
+        db.session.commit()   # so batch.id gets populated
 
-        inserted_count = 0
-        # 2) Insert each JournalEntry with import_batch_id=batch.id
+        if background:
+            start_import(batch.id, partial(entry_chunks, map(json_trade_entry, trades)))
+            return jsonify({
+                'message': 'Import started',
+                'batch_id': batch.id,
+                'status': 'pending',
+                'status_url': f"/api/journal/import/{batch.id}/status",
+                'events_url': f"/api/journal/import/{batch.id}/events"
+            }), 202
+
+        # 2) Insert the trades in chunks with import_batch_id=batch.id
+        importer = BulkImporter(user_id, batch.id)
         for t in trades:
-            # only insert if required fields exist
-            if not all(k in t for k in ('symbol', 'direction', 'pnl')):
-                continue
-
-            symbol    = t['symbol'].upper()
-            direction = t['direction'].lower()
-            pnl       = float(t['pnl'])
-            rr        = float(t.get('rr', 0.0))
-            notes     = t.get('notes', '')
-
-            # Parse trade date and time if provided
-            trade_date = None
-            trade_time = None
-            created_at = None
-            
-            # First, check if we have a timestamp field (ISO format with time)
-            if 'timestamp' in t and t['timestamp']:
-                try:
-                    created_at = datetime.fromisoformat(str(t['timestamp']).replace('Z', '+00:00'))
-                    trade_date = created_at.date()
-                except (ValueError, TypeError):
-                    pass
-            
-            # If no timestamp, try to parse date and time separately
-            if not created_at:
-                # Parse date
-                if 'date' in t and t['date']:
-                    date_str = str(t['date']).strip()
-                    if date_str:  # Only try parsing if we have a non-empty string
-                        try:
-                            # First try ISO format
-                            trade_date = datetime.fromisoformat(date_str).date()
-                        except (ValueError, TypeError):
-                            try:
-                                # Try parsing as YYYY-MM-DD
-                                trade_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                            except (ValueError, TypeError):
-                                try:
-                                    # Try parsing as MM/DD/YYYY
-                                    trade_date = datetime.strptime(date_str, '%m/%d/%Y').date()
-                                except (ValueError, TypeError):
-                                    try:
-                                        # Try parsing as DD/MM/YYYY
-                                        trade_date = datetime.strptime(date_str, '%d/%m/%Y').date()
-                                    except (ValueError, TypeError):
-                                        pass  # Keep None if all parsing fails
-                
-                # Parse time if available
-                if 'time' in t and t['time']:
-                    time_str = str(t['time']).strip()
-                    if time_str:
-                        try:
-                            # Try parsing as HH:MM:SS or HH:MM
-                            if ':' in time_str:
-                                time_parts = time_str.split(':')
-                                hours = int(time_parts[0])
-                                minutes = int(time_parts[1]) if len(time_parts) > 1 else 0
-                                seconds = int(time_parts[2]) if len(time_parts) > 2 else 0
-                                trade_time = (hours, minutes, seconds)
-                        except (ValueError, IndexError):
-                            pass
-            
-            # If we have both date and time, combine them
-            if trade_date and trade_time:
-                try:
-                    created_at = datetime.combine(
-                        trade_date, 
-                        datetime.min.time().replace(
-                            hour=trade_time[0], 
-                            minute=trade_time[1], 
-                            second=trade_time[2] if len(trade_time) > 2 else 0
-                        )
-                    )
-                except (ValueError, TypeError):
-                    pass
-            
-            # If we still don't have a created_at, use the current time
-            if not created_at:
-                if trade_date:
-                    created_at = datetime.combine(trade_date, datetime.utcnow().time())
-                else:
-                    created_at = datetime.utcnow()
-                    trade_date = created_at.date()
-
-            # Extract variables from the trade data and normalize to lowercase
-            variables = {}
-            # Check for common variable fields
-            variable_fields = ['setup', 'mistake', 'emotion', 'strategy', 'market_condition']
-            for field in variable_fields:
-                if field in t and t[field]:
-                    # If it's a list, process each item
-                    if isinstance(t[field], list):
-                        # Filter out empty strings, strip whitespace, and convert to lowercase
-                        variables[field] = [
-                            str(item).lower().strip() 
-                            for item in t[field] 
-                            if item and str(item).strip()
-                        ]
-                    else:
-                        value = str(t[field]).strip().lower()
-                        if value:  # Only add non-empty values
-                            variables[field] = [value]
-            
-            # Also check for any fields that start with 'var_' as potential variables
-            for key, value in t.items():
-                if key.startswith('var_') and value:
-                    var_name = key[4:].lower()  # Remove 'var_' prefix and convert to lowercase
-                    if isinstance(value, list):
-                        # Process each item in the list
-                        variables[var_name] = [
-                            str(item).lower().strip() 
-                            for item in value 
-                            if item is not None and str(item).strip()
-                        ]
-                    else:
-                        value = str(value).strip().lower()
-                        if value:  # Only add non-empty values
-                            variables[var_name] = [value]
-                            
-            # Process any additional variables in extra_data
-            if 'extra_data' in t and isinstance(t['extra_data'], dict):
-                for key, value in t['extra_data'].items():
-                    if key not in variables:  # Don't overwrite existing variables
-                        if isinstance(value, list):
-                            variables[key.lower()] = [
-                                str(item).lower().strip() 
-                                for item in value 
-                                if item is not None and str(item).strip()
-                            ]
-                        elif value is not None and str(value).strip():
-                            variables[key.lower()] = [str(value).lower().strip()]
-            
-            # If no variables were found, set to None to avoid storing empty dict
-            variables = variables if variables else None
-            
-            # Get entry and exit prices with proper defaults
-            entry_price = float(t.get('entry_price', 0.0)) if t.get('entry_price') is not None else 0.0
-            exit_price = float(t.get('exit_price', 0.0)) if t.get('exit_price') is not None else 0.0
-            stop_loss = float(t['stop_loss']) if t.get('stop_loss') is not None else None
-            take_profit = float(t['take_profit']) if t.get('take_profit') is not None else None
-            
-            entry = JournalEntry(
-                user_id=user_id,
-                symbol=str(symbol).upper(),
-                direction=str(direction).lower(),
-                entry_price=entry_price,
-                exit_price=exit_price,
-                stop_loss=stop_loss,
-                take_profit=take_profit,
-                quantity=float(t.get('quantity', 1.0)),
-                contract_size=float(t['contract_size']) if t.get('contract_size') is not None else None,
-                instrument_type=t.get('instrument_type', 'crypto'),
-                risk_amount=float(t.get('risk_amount', 0.0)) if t.get('risk_amount') is not None else 0.0,
-                pnl=pnl,
-                rr=rr,
-                notes=notes,
-                variables=variables,  # Save the extracted variables
-                extra_data=t.get('extra_data', {}),
-                date=trade_date,
-                created_at=created_at,  # Use the parsed timestamp
-                updated_at=datetime.utcnow(),
-                import_batch_id=batch.id
-            )
-            db.session.add(entry)
-            inserted_count += 1
-
-        # 3) Update the batch’s trade_count before commit
-        batch.trade_count = inserted_count
+            started = time.perf_counter()
+            entry = json_trade_entry(t)
+            importer.parse_duration += time.perf_counter() - started
+            if entry is None:
+                importer.skip()
+            else:
+                importer.add(entry)
 
-        db.session.commit()
+        # 3) Flush the last chunk and report throughput
+        summary = importer.finish()
+        print(f"JSON import batch {batch.id}: {summary['inserted_count']} rows "
+              f"in {summary['duration_seconds']}s ({summary['rows_per_second']} rows/s)")
         return jsonify({
-            'message': f'Imported {inserted_count} trades',
-            'inserted_count': inserted_count,
-            'batch_id': batch.id
+            'message': f"Imported {summary['inserted_count']} trades",
+            'batch_id': batch.id,
+            **summary
         }), 201
 
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': str(e)}), 500
-
-    except Exception as e:
-        db.session.rollback()
+        if importer is not None:
+            importer.abort()
         return jsonify({'error': str(e)}), 500
 
 @journal_bp.route('/market/benchmark', methods=['GET'])
 @jwt_required(optional=True)
 def market_benchmark():
-    """Return daily closing prices for a benchmark symbol between start and end (YYYY-MM-DD)."""
+    """
+    Return daily closing prices for a benchmark symbol between start and end (YYYY-MM-DD).
+
+    Bars come from the local market store; only date ranges that were never
+    fetched before go to the market-data provider.
+    """
     symbol = request.args.get('symbol', 'SPY').upper()
     start = request.args.get('start')
     end = request.args.get('end')
@@ -1107,20 +835,26 @@ def market_benchmark():
     except ValueError:
         return jsonify({'error': 'Invalid date format, expected YYYY-MM-DD'}), 400
     try:
-        data = yf.download(symbol, start=start_dt, end=end_dt, progress=False)
-        close_series = data['Adj Close'] if 'Adj Close' in data else data['Close']
-        result = [{'date': idx.strftime('%Y-%m-%d'), 'price': round(val, 2)} for idx, val in close_series.items() if not pd.isna(val)]
+        bars = daily_bars(symbol, start_dt.date(), end_dt.date())
+        close_series = bars['adj_close'].fillna(bars['close'])
+        result = [{'date': day.strftime('%Y-%m-%d'), 'price': round(val, 2)} for day, val in close_series.items() if not pd.isna(val)]
         return jsonify({'symbol': symbol, 'prices': result})
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 
 @journal_bp.route('/import/history', methods=['GET'])
 @jwt_required()
+@fails_stale_imports
+@conditional_response
 def import_history():
     """
     Return list of past import batches for the current user,
     including id, filename, imported_at, trade_count, and download_url.
+
+    Everything comes from the batch rows' stored summary columns, so this
+    is one query however many batches the user has.
     """
     try:
         user_id_str = get_jwt_identity()
@@ -1135,7 +869,6 @@ def import_history():
 
         result = []
         for b in batches:
-            trade_count = JournalEntry.query.filter_by(import_batch_id=b.id).count()
             # Construct a download URL (front end can hit this)
             download_url = f"/api/journal/import/file/{b.id}"
 
@@ -1143,7 +876,13 @@ def import_history():
                 'id': b.id,
                 'filename': b.filename,
                 'imported_at': b.imported_at.isoformat(),
-                'trade_count': trade_count,
+                'trade_count': b.trade_count,
+                'total_pnl': round(b.total_pnl or 0.0, 2),
+                'first_trade_at': b.first_trade_at.isoformat() if b.first_trade_at else None,
+                'last_trade_at': b.last_trade_at.isoformat() if b.last_trade_at else None,
+                'byte_size': b.byte_size,
+                'parse_duration': b.parse_duration,
+                'status': b.status,
                 'download_url': download_url
             })
 
@@ -1171,8 +910,7 @@ def download_imported_file(batch_id):
         return send_file(
             batch.filepath,
             as_attachment=True,
-            download_name=batch.filename,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            download_name=batch.filename
         )
 
     except Exception as e:
@@ -1191,14 +929,18 @@ def delete_import_batch(batch_id):
         user_id = int(user_id_str)
 
         batch = ImportBatch.query.filter_by(id=batch_id, user_id=user_id).first_or_404()
-
-        # 1) Delete the file from disk (if it still exists)
-        if batch.filepath and os.path.isfile(batch.filepath):
-            os.remove(batch.filepath)
-
-        # 2) Deleting the batch cascades to JournalEntry via relationship
-        db.session.delete(batch)
+        fail_stale_import(batch)   # an interrupted import can be deleted
+        if batch.status in ('pending', 'running'):
+            return jsonify({'error': 'Import is still running'}), 409
+        filepath = batch.filepath
+
+        # 1) Delete the trades, their tags and the batch in a few set-based statements
+        purge_import_batch(batch.id)
+        bump_data_version(user_id)
         db.session.commit()
+
+        # 2) Delete the file from disk (if it still exists)
+        remove_files([filepath] if filepath else [])
         return jsonify({'message': 'Import batch, its file, and trades deleted'}), 200
 
     except Exception as e:
@@ -1213,6 +955,7 @@ def update_entry(id):
     try:
         data = request.get_json()
         entry = JournalEntry.query.get_or_404(id)
+        previous = trade_values(entry)
 
         entry.symbol = data.get('symbol', entry.symbol)
         entry.direction = data.get('direction', entry.direction)
@@ -1222,6 +965,8 @@ def update_entry(id):
             entry.stop_loss = float(data['stop_loss']) if data['stop_loss'] is not None else None
         if 'take_profit' in data:
             entry.take_profit = float(data['take_profit']) if data['take_profit'] is not None else None
+        if 'pnl' in data:
+            adjust_batch_summary(entry.import_batch_id, pnl=float(data['pnl'] or 0.0) - (entry.pnl or 0.0))
         entry.pnl = data.get('pnl', entry.pnl)
         entry.rr = data.get('rr', entry.rr)
         entry.notes = data.get('notes', entry.notes)
@@ -1230,7 +975,13 @@ def update_entry(id):
             entry.extra_data = data['extra_data']
         if 'variables' in data:  
             entry.variables = data['variables']
+        if 'extra_data' in data or 'variables' in data:
+            entry.tags = build_tags(entry.user_id, entry.variables, entry.extra_data)
+        # Prices, levels or exit time may have changed: recompute on the next run
+        entry.excursion = None
+        move_trade(entry.user_id, previous, trade_values(entry))
 
+        bump_data_version(entry.user_id)
         db.session.commit()
         return jsonify({'message': 'Journal entry updated'}), 200
 
@@ -1240,45 +991,11 @@ def update_entry(id):
 
 @journal_bp.route('/strategy-analysis', methods=['GET'])
 @jwt_required()
+@cached_response
 def strategy_analysis():
     try:
         user_id = int(get_jwt_identity())
-        entries = JournalEntry.query.filter_by(user_id=user_id).all()
-
-        strategy_map = {}
-
-        for entry in entries:
-            strategy = entry.strategy or 'Unspecified'
-            stats = strategy_map.setdefault(strategy, {
-                'trades': 0,
-                'wins': 0,
-                'total_rr': 0.0,
-                'total_pnl': 0.0
-            })
-
-            if entry.pnl == 0:
-                continue  # Skip break-even trades
-                
-            stats['trades'] += 1
-            stats['total_rr'] += entry.rr or 0.0
-            stats['total_pnl'] += entry.pnl or 0.0
-            if entry.pnl > 0:
-                stats['wins'] += 1
-
-        result = []
-        for strategy, data in strategy_map.items():
-            total = data['trades']
-            win_rate = (data['wins'] / total * 100) if total else 0.0
-            avg_rr = (data['total_rr'] / total) if total else 0.0
-            result.append({
-                'strategy': strategy,
-                'trades': total,
-                'win_rate': round(win_rate, 1),
-                'avg_rr': round(avg_rr, 2),
-                'pnl': round(data['total_pnl'], 2)
-            })
-
-        return jsonify(result), 200
+        return jsonify(strategy_breakdown(user_id)), 200
 
     except Exception as e:
         print(" strategy_analysis error:", e)
@@ -1286,6 +1003,7 @@ def strategy_analysis():
 
 @journal_bp.route('/variables-analysis', methods=['GET'])
 @jwt_required()
+@cached_response
 def variables_analysis():
     """
     Return performance metrics grouped by variable tags for the current user.
@@ -1296,6 +1014,12 @@ def variables_analysis():
         timeframe: Filter by time period ('30', '90', '365', 'all')
         combine_vars: If 'true', also include variable combinations (default: false)
         combination_level: Number of variables to combine (2-5, default: 2)
+        min_trades: Minimum trades a combination must appear in (default: 3)
+        top_k: Maximum number of combinations returned (default: 1000)
+        sort_by: Rank combinations by pnl, trades, win_rate, profit_factor,
+                 expectancy or avg_rr (default: pnl)
+        max_points: Cap on each variable's cumulative_pnl series (default: all)
+        downsample: 'lttb' (default) or 'minmax'
     
     Returns:
         JSON response with variable statistics and combinations
@@ -1309,16 +1033,25 @@ def variables_analysis():
         timeframe = request.args.get('timeframe', 'all')
         combine_vars = request.args.get('combine_vars', 'false').lower() == 'true'
         combination_level = min(max(int(request.args.get('combination_level', 2)), 2), 5)
-        
-        # Base query
-        query = JournalEntry.query.filter_by(user_id=user_id).order_by(JournalEntry.date.asc())
-        
+        min_trades = max(int(request.args.get('min_trades', 3)), 1)
+        top_k = min(max(int(request.args.get('top_k', 1000)), 1), 1000)
+        sort_by = request.args.get('sort_by', 'pnl')
+        if sort_by not in SORT_FIELDS:
+            return jsonify({'error': f"Invalid sort_by. Use one of: {', '.join(SORT_FIELDS)}"}), 400
+        try:
+            max_points, method = downsample_args()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Date filters shared by the tag aggregates and the trade count
+        filters = []
+
         # Apply timeframe filter if provided
         if timeframe and timeframe != 'all':
             try:
                 days = int(timeframe)
                 cutoff_date = datetime.utcnow() - timedelta(days=days)
-                query = query.filter(JournalEntry.date >= cutoff_date)
+                filters.append(JournalEntry.date >= cutoff_date)
             except ValueError:
                 # If timeframe is not a number, ignore it
                 pass
@@ -1327,22 +1060,22 @@ def variables_analysis():
         if from_date:
             try:
                 from_date = datetime.strptime(from_date, '%Y-%m-%d')
-                query = query.filter(JournalEntry.date >= from_date)
+                filters.append(JournalEntry.date >= from_date)
             except ValueError:
                 return jsonify({'error': 'Invalid from_date format. Use YYYY-MM-DD'}), 400
                 
         if to_date:
             try:
                 to_date = datetime.strptime(to_date, '%Y-%m-%d')
-                query = query.filter(JournalEntry.date <= to_date)
+                filters.append(JournalEntry.date <= to_date)
             except ValueError:
                 return jsonify({'error': 'Invalid to_date format. Use YYYY-MM-DD'}), 400
         
-        # Get all entries that match the filters
-        entries = query.all()
+        query = JournalEntry.query.filter_by(user_id=user_id).filter(*filters).order_by(JournalEntry.date.asc())
+        total_entries = query.count()
         
         # If no entries found, return empty result
-        if not entries:
+        if not total_entries:
             return jsonify({
                 'variables': [],
                 'combinations': [],
@@ -1350,199 +1083,19 @@ def variables_analysis():
                     'total_trades': 0,
                     'total_pnl': 0.0,
                     'avg_win_rate': 0.0
-                }
-            })
-            
-        variable_stats = {}
-        all_variable_names = set()
-        processed_entries = 0
-        skipped_entries = 0
-        
-        # Define system fields that should be excluded from variables analysis
-        system_fields = {
-            'trade_hour', 'trade_day', 'trade_week', 'trade_month', 'trade_year',
-            'entry_time', 'exit_time', 'duration', 'trade_id', 'import_batch_id'
-        }
-        
-        # First pass: collect all unique variable names across all entries
-        for entry in entries:
-            # Skip entries without variables
-            if not entry.variables and not entry.extra_data:
-                continue
-                
-            variables = {}
-            
-            # Primary: Check the variables field
-            if entry.variables and isinstance(entry.variables, dict):
-                # Only include non-system fields and normalize case
-                for k, v in entry.variables.items():
-                    k_lower = k.lower()
-                    # Skip empty values and system fields
-                    if k_lower not in system_fields and v is not None and str(v).strip() != '':
-                        # Store the original key but track by lowercase
-                        variables[k_lower] = v
-                all_variable_names.update(variables.keys())
-            
-            # Fallback: Check extra_data for variable-like fields
-            if entry.extra_data and isinstance(entry.extra_data, dict):
-                # Add all keys from extra_data that aren't core or system fields
-                core_fields = {'id', 'symbol', 'direction', 'entry_price', 'exit_price', 'quantity', 
-                             'date', 'time', 'pnl', 'rr', 'notes', 'created_at', 'updated_at',
-                             'trade_id', 'import_batch_id', 'trade_hour', 'trade_day', 'trade_week',
-                             'trade_month', 'trade_year', 'entry_time', 'exit_time', 'duration'}
-                
-                for key, value in entry.extra_data.items():
-                    key_lower = key.lower()
-                    # Skip core fields, system fields, and common non-variable fields
-                    if (key_lower not in core_fields and 
-                        key_lower not in system_fields and
-                        not key_lower.startswith(('_', 'unused', 'temp', 'meta', 'trade_', 'time_')) and
-                        value is not None and str(value).strip() != ''):
-                        # Use lowercase for consistent naming
-                        all_variable_names.add(key_lower)
-        
-        # Second pass: process entries with the collected variable names
-        for entry in entries:
-            # Skip entries without variables
-            if not entry.variables and not entry.extra_data:
-                skipped_entries += 1
-                continue
-                
-            variables = {}
-            
-            # Primary: Check the variables field
-            if entry.variables and isinstance(entry.variables, dict):
-                # Only include non-system fields and normalize case
-                for k, v in entry.variables.items():
-                    k_lower = k.lower()
-                    # Skip empty values and system fields
-                    if (k_lower not in system_fields and 
-                        v is not None and 
-                        str(v).strip() != '' and
-                        not k_lower.startswith(('_', 'unused', 'temp', 'meta', 'trade_', 'time_'))):
-                        variables[k_lower] = v
-            
-            # Fallback: Check extra_data for variable-like fields
-            if entry.extra_data and isinstance(entry.extra_data, dict):
-                for var_name in all_variable_names:
-                    if (var_name in entry.extra_data and 
-                        entry.extra_data[var_name] and 
-                        var_name not in system_fields and
-                        not var_name.startswith(('_', 'unused', 'temp', 'meta', 'trade_', 'time_'))):
-                        # Only add if not already present from variables field
-                        if var_name not in variables:
-                            value = entry.extra_data[var_name]
-                            # Ensure value is in list format
-                            if isinstance(value, list):
-                                variables[var_name] = [str(v).strip() for v in value if v and str(v).strip()]
-                            else:
-                                value_str = str(value).strip()
-                                if value_str:
-                                    variables[var_name] = [value_str]
-            
-            # Skip entries with no variables found
-            if not variables:
-                skipped_entries += 1
-                continue
-                
-            # Ensure all variables from our set are present in this entry (even if empty)
-            # Convert variable names to lowercase for consistency
-            variables_lower = {k.lower(): v for k, v in variables.items()}
-            
-            processed_entries += 1
-            
-            # Process each variable in this entry
-            for var_name in all_variable_names:
-                # Get the value for this variable (case-insensitive)
-                value = variables_lower.get(var_name, [])
-                
-                # Handle both list and string formats
-                if isinstance(value, list):
-                    tags = [str(v).strip() for v in value if v and str(v).strip()]
-                else:
-                    value_str = str(value).strip()
-                    tags = [value_str] if value_str else []
-
-                for tag in tags:
-                    if not tag:
-                        continue
-                        
-                    # Use lowercase variable name for consistency
-                    group = f"{var_name}: {tag}"
-                    if group not in variable_stats:
-                        variable_stats[group] = {
-                            'trades': 0,
-                            'wins': 0,
-                            'losses': 0,
-                            'total_rr': 0.0,
-                            'total_pnl': 0.0,
-                            'gross_profit': 0.0,
-                            'gross_loss': 0.0,
-                            'win_amounts': [],
-                            'loss_amounts': [],
-                            'pnl_history': [],
-                            'cumulative_pnl': [],
-                            'running_pnl': 0.0,
-                            'peak': 0.0,
-                            'max_drawdown': 0.0,
-                            'first_date': None,
-                            'last_date': None,
-                            'trades_data': []
-                        }
-                    
-                    stats = variable_stats[group]
-                    
-                    # Track trade dates
-                    if entry.date:
-                        if stats['first_date'] is None or entry.date < stats['first_date']:
-                            stats['first_date'] = entry.date
-                        if stats['last_date'] is None or entry.date > stats['last_date']:
-                            stats['last_date'] = entry.date
-                    
-                    # Update trade statistics
-                    stats['trades'] += 1
-                    stats['total_rr'] += entry.rr or 0.0
-                    stats['total_pnl'] += entry.pnl or 0.0
-                    stats['running_pnl'] += entry.pnl or 0.0
-                    
-                    # Track PnL history for drawdown calculation
-                    stats['pnl_history'].append({
-                        'date': entry.date.isoformat() if entry.date else None,
-                        'pnl': entry.pnl or 0.0,
-                        'cumulative': stats['running_pnl']
-                    })
-                    
-                    # Update peak and drawdown
-                    if stats['running_pnl'] > stats['peak']:
-                        stats['peak'] = stats['running_pnl']
-                    else:
-                        drawdown = stats['peak'] - stats['running_pnl']
-                        if drawdown > stats['max_drawdown']:
-                            stats['max_drawdown'] = drawdown
-                    
-                    # Handle win/loss classification (skip zero PnL for win rate calculation)
-                    if entry.pnl and entry.pnl != 0:
-                        if entry.pnl > 0:
-                            stats['wins'] += 1
-                            stats['gross_profit'] += entry.pnl
-                            stats['win_amounts'].append(entry.pnl)
-                        else:
-                            stats['losses'] += 1
-                            loss = abs(entry.pnl)
-                            stats['gross_loss'] += loss
-                            stats['loss_amounts'].append(-loss)
-                    
-                    # Store trade data for later calculations
-                    stats['trades_data'].append({
-                        'date': entry.date.isoformat() if entry.date else None,
-                        'pnl': entry.pnl or 0.0,
-                        'rr': entry.rr or 0.0,
-                        'symbol': entry.symbol,
-                        'direction': entry.direction
-                    })
+                }
+            })
+            
+        # Per-tag measures come from one GROUP BY over trade_variable; the
+        # cumulative series / drawdown from one date-ordered read of the same
+        # rows.  System keys (trade_hour, _var_mapping, …) are not variables here.
+        aggregates = tag_aggregates(user_id, *filters, user_variable_tags())
+        series, processed_entries = tag_series(user_id, *filters, user_variable_tags(),
+                                               max_points=max_points, method=method)
+        skipped_entries = total_entries - processed_entries
         
         print(f"Variables analysis: processed {processed_entries} entries, skipped {skipped_entries} entries without variables")
-        print(f"Found {len(variable_stats)} unique variable combinations")
+        print(f"Found {len(aggregates)} unique variable combinations")
         
         # Calculate additional metrics and format response
         result = []
@@ -1553,7 +1106,8 @@ def variables_analysis():
         total_profit_factor = 0.0
         variable_count = 0
         
-        for label, data in variable_stats.items():
+        for data in aggregates:
+            label = f"{data['key']}: {data['value']}"
             wins = data['wins']
             losses = data['losses']
             total = data['trades']
@@ -1563,7 +1117,7 @@ def variables_analysis():
                 
             # Calculate basic metrics
             win_rate = (wins / (wins + losses) * 100) if (wins + losses) > 0 else 0.0
-            avg_rr = data['total_rr'] / total if total > 0 else 0.0
+            avg_rr = data['rr'] / total if total > 0 else 0.0
             
             # Calculate profit factor
             profit_factor = 0.0
@@ -1572,13 +1126,13 @@ def variables_analysis():
             elif data['gross_profit'] > 0:
                 profit_factor = None  # Using None instead of float('inf') for JSON serialization
             
-            # Calculate average win/loss
-            avg_win = sum(data['win_amounts']) / len(data['win_amounts']) if data['win_amounts'] else 0.0
-            avg_loss = sum(data['loss_amounts']) / len(data['loss_amounts']) if data['loss_amounts'] else 0.0
+            # Average win / loss (losses are kept as negative amounts here)
+            avg_win = data['gross_profit'] / wins if wins else 0.0
+            avg_loss = -data['gross_loss'] / losses if losses else 0.0
             
-            # Calculate max win/loss
-            max_win = max(data['win_amounts'], default=0.0)
-            max_loss = max(data['loss_amounts'], default=0.0)
+            # Largest win / smallest loss
+            max_win = data['max_win'] or 0.0
+            max_loss = -data['min_loss'] if losses else 0.0
             
             # Calculate expectancy
             win_prob = wins / total if total > 0 else 0
@@ -1588,22 +1142,11 @@ def variables_analysis():
             # Calculate consistency score (0-1, higher is more consistent)
             consistency = 0.0
             if wins > 0 and losses > 0:
-                win_std = (sum((x - avg_win) ** 2 for x in data['win_amounts']) / len(data['win_amounts'])) ** 0.5 if data['win_amounts'] else 0
-                loss_std = (sum((x - avg_loss) ** 2 for x in data['loss_amounts']) / len(data['loss_amounts'])) ** 0.5 if data['loss_amounts'] else 0
+                win_std = spread(data['win_sq'], data['gross_profit'], wins)
+                loss_std = spread(data['loss_sq'], data['gross_loss'], losses)
                 consistency = 1 / (1 + (win_std / avg_win if avg_win != 0 else 0) + (loss_std / avg_loss if avg_loss != 0 else 0))
             
-            # Sort PnL history by date
-            sorted_pnl = sorted(data['pnl_history'], key=lambda x: x['date'] or '')
-            
-            # Prepare cumulative PnL data for charting
-            cumulative_pnl = []
-            running_total = 0.0
-            for trade in sorted_pnl:
-                running_total += trade['pnl']
-                cumulative_pnl.append({
-                    'date': trade['date'],
-                    'value': round(running_total, 2)
-                })
+            tag_curve = series.get((data['key'], data['value']), {'points': [], 'max_drawdown': 0.0})
             
             # Create variable stats object
             var_stats = {
@@ -1613,7 +1156,7 @@ def variables_analysis():
                 'losses': losses,
                 'win_rate': round(win_rate, 1),
                 'avg_rr': round(avg_rr, 2),
-                'pnl': round(data['total_pnl'], 2),
+                'pnl': round(data['pnl'], 2),
                 'profit_factor': round(profit_factor, 2) if profit_factor is not None else None,
                 'gross_profit': round(data['gross_profit'], 2),
                 'gross_loss': round(data['gross_loss'], 2),
@@ -1621,10 +1164,10 @@ def variables_analysis():
                 'avg_loss': round(avg_loss, 2),
                 'max_win': round(max_win, 2),
                 'max_loss': round(-max_loss, 2) if max_loss != 0 else 0.0,
-                'max_drawdown': round(abs(data['max_drawdown']), 2) if data['max_drawdown'] is not None else 0.0,
+                'max_drawdown': round(abs(tag_curve['max_drawdown']), 2),
                 'expectancy': round(expectancy, 2),
                 'consistency_score': round(consistency, 2),
-                'cumulative_pnl': cumulative_pnl,
+                'cumulative_pnl': tag_curve['points'],
                 'first_trade_date': data['first_date'].strftime('%Y-%m-%d') if data['first_date'] else None,
                 'latest_date': data['last_date'].strftime('%Y-%m-%d') if data['last_date'] else None,
                 'is_combination': False,
@@ -1641,7 +1184,7 @@ def variables_analysis():
             
             # Update summary stats
             total_trades += total
-            total_pnl += data['total_pnl']
+            total_pnl += data['pnl']
             total_win_rate += win_rate
             total_profit_factor += profit_factor if profit_factor is not None else 0
             variable_count += 1
@@ -1657,9 +1200,15 @@ def variables_analysis():
         
         # Analyze variable combinations if requested
         combinations_result = []
-        if combine_vars and len(entries) > 0:
+        if combine_vars:
             try:
-                combinations_result = analyze_variable_combinations(entries, combination_level)
+                combinations_result = variable_combinations(
+                    user_id, *filters, user_variable_tags(),
+                    combination_level=combination_level,
+                    min_trades=min_trades,
+                    top_k=top_k,
+                    sort_by=sort_by,
+                )
                 print(f"Generated {len(combinations_result)} variable combinations")
                 
                 # Add combination stats to the result
@@ -1684,6 +1233,8 @@ def variables_analysis():
                         total_profit_factor += combo['profit_factor']
                         variable_count += 1
                 
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
             except Exception as e:
                 print(f"Error analyzing variable combinations: {str(e)}")
                 import traceback
@@ -1692,7 +1243,7 @@ def variables_analysis():
         # Prepare final response
         response = {
             'variables': result,
-            'combinations': combinations_result[:1000],  # Limit to top 1000 combinations
+            'combinations': combinations_result,
             'best_performing': best_metric,
             'stats_summary': {
                 'total_trades': total_trades,
@@ -1701,10 +1252,10 @@ def variables_analysis():
                 'avg_profit_factor': round(avg_profit_factor, 2) if variable_count > 0 else 0.0
             },
             'debug_info': {
-                'total_entries_checked': len(entries),
+                'total_entries_checked': total_entries,
                 'entries_with_variables': processed_entries,
                 'entries_without_variables': skipped_entries,
-                'unique_variable_combinations': len(variable_stats),
+                'unique_variable_combinations': len(aggregates),
                 'variable_combinations_generated': len(combinations_result)
             }
         }
@@ -1720,73 +1271,12 @@ def variables_analysis():
         
 @journal_bp.route('/symbol-analysis', methods=['GET'])
 @jwt_required()
+@cached_response
 def symbol_analysis():
     """Return performance metrics grouped by symbol/pair for the current user"""
     try:
         user_id = int(get_jwt_identity())
-        entries = (
-            JournalEntry.query
-            .filter_by(user_id=user_id)
-            .all()
-        )
-        symbol_map = {}
-        for e in entries:
-            sym = (e.symbol or '').upper()
-            if not sym:
-                continue
-            stats = symbol_map.setdefault(sym, {
-                'trades': 0,
-                'wins': 0,
-                'losses': 0,
-                'total_rr': 0.0,
-                'total_pnl': 0.0,
-                'gross_profit': 0.0,
-                'gross_loss': 0.0,
-                'first_date': None,
-                'last_date': None
-            })
-            # Track earliest and latest trade dates for this symbol
-            if e.date:
-                if stats['first_date'] is None or e.date < stats['first_date']:
-                    stats['first_date'] = e.date
-                if stats['last_date'] is None or e.date > stats['last_date']:
-                    stats['last_date'] = e.date
-            if e.pnl == 0:
-                # treat as break-even (ignore for win/loss pct but count trade)
-                stats['trades']+=1
-                continue
-            stats['trades']+=1
-            stats['total_rr']+= e.rr or 0.0
-            stats['total_pnl'] += e.pnl or 0.0
-            if e.pnl > 0:
-                stats['wins']+=1
-                stats['gross_profit'] += e.pnl
-            else:
-                stats['losses']+=1
-                stats['gross_loss'] += abs(e.pnl)
- 
-        result = []
-        for sym,d in symbol_map.items():
-            wins = d['wins']
-            losses = d['losses']
-            total = d['trades']
-            win_rate = (wins / (wins + losses) * 100) if (wins + losses) else 0.0
-            avg_rr = d['total_rr'] / total if total else 0.0
-            profit_factor = (d['gross_profit'] / d['gross_loss']) if d['gross_loss'] else (float('inf') if d['gross_profit'] else 0.0)
-            result.append({
-                'symbol': sym,
-                'trades': total,
-                'win_rate': round(win_rate, 1),
-                'avg_rr': round(avg_rr, 2),
-                'pnl': round(d['total_pnl'], 2),
-                'profit_factor': None if not math.isfinite(profit_factor) else round(profit_factor, 2),
-                'gross_profit': round(d['gross_profit'], 2),
-                'gross_loss': round(d['gross_loss'], 2),
-                'first_trade_date': d['first_date'].strftime('%Y-%m-%d') if d['first_date'] else None,
-                'latest_date': d['last_date'].strftime('%Y-%m-%d') if d['last_date'] else None
-            })
- 
-        return jsonify(result), 200
+        return jsonify(symbol_breakdown(user_id)), 200
     except Exception as e:
         print(' symbol_analysis error:', e)
         return jsonify({'error': str(e)}), 500
@@ -1795,6 +1285,7 @@ def symbol_analysis():
 # ─── Risk Summary ───────────────────────────────────────────────────────────
 @journal_bp.route('/risk-summary', methods=['GET'])
 @jwt_required()
+@cached_response
 def risk_summary():
     """Return distribution of R-multiples and risk stats for the current user.
 
@@ -1814,15 +1305,10 @@ def risk_summary():
         user_id = int(get_jwt_identity())
         max_allowed = float(request.args.get('max_allowed', 1.0))
 
-        # Fetch only the columns we need for performance
-        trades = (
-            JournalEntry.query
-            .with_entities(JournalEntry.rr, JournalEntry.risk_amount)
-            .filter_by(user_id=user_id)
-            .all()
-        )
+        # Fetch only the columns we need, straight into numpy arrays
+        trades = load_columns(('rr', 'risk_amount'), user_id=user_id)
 
-        if not trades:
+        if not len(trades):
             return jsonify({
                 'r_multiples': [],
                 'avg_risk': None,
@@ -1832,16 +1318,16 @@ def risk_summary():
                 'total_trades': 0
             }), 200
 
-        r_multiples = [float(t.rr) for t in trades if t.rr is not None]
-        risks = [float(t.risk_amount) for t in trades if t.risk_amount is not None]
+        r_multiples = trades['rr'][~np.isnan(trades['rr'])]
+        risks = trades['risk_amount'][~np.isnan(trades['risk_amount'])]
 
-        avg_risk = sum(risks) / len(risks) if risks else None
-        avg_r_multiple = sum(r_multiples) / len(r_multiples) if r_multiples else None
-        max_risk = max(risks) if risks else None
-        over_risk_count = sum(1 for r in risks if r > max_allowed)
+        avg_risk = float(risks.mean()) if risks.size else None
+        avg_r_multiple = float(r_multiples.mean()) if r_multiples.size else None
+        max_risk = float(risks.max()) if risks.size else None
+        over_risk_count = int((risks > max_allowed).sum())
 
         return jsonify({
-            'r_multiples': r_multiples,
+            'r_multiples': r_multiples.tolist(),
             'avg_risk': round(avg_risk, 4) if avg_risk is not None else None,
             'avg_r_multiple': round(avg_r_multiple, 4) if avg_r_multiple is not None else None,
             'max_risk': max_risk,
@@ -1856,6 +1342,7 @@ def risk_summary():
 # ─── Performance Highlights ────────────────────────────────────────────────
 @journal_bp.route('/performance-highlights', methods=['GET'])
 @jwt_required()
+@cached_response
 def performance_highlights():
     """
     Return key performance highlights including best setup, best instrument, and best time of day.
@@ -1928,12 +1415,14 @@ def performance_highlights():
     try:
         user_id = int(get_jwt_identity())
         print(f"\n=== Processing performance highlights for user {user_id} ===")
-        
-        # Get all trades for the user
-        entries = JournalEntry.query.filter_by(user_id=user_id).all()
-        print(f"Found {len(entries)} trades for user {user_id}")
-        
-        if not entries:
+
+        # Buckets come from the precomputed time columns (trade date in the
+        # user's timezone), grouped in SQL
+        overall = bucket_totals(user_id)
+        total_trades = overall[0]['trades'] if overall else 0
+        print(f"Found {total_trades} trades for user {user_id}")
+
+        if not total_trades:
             print("No trades found for user, returning empty response")
             return jsonify({
                 'best_setup': {'name': 'No data', 'pnl': 0, 'win_rate': 0, 'trades': 0},
@@ -1945,221 +1434,98 @@ def performance_highlights():
                 'monthly_performance': [],
                 'weekly_performance': []
             })
-        
-        # Helper function to calculate win rate
-        def calculate_win_rate(trades):
-            if not trades:
-                return 0.0
-            wins = sum(1 for t in trades if t.pnl > 0)
-            return (wins / len(trades)) * 100
-        
-        # Initialize data structures
-        setup_stats = {}
-        instrument_stats = {}
-        hourly_stats = {hour: [] for hour in range(24)}
-        weekly_stats = {}
-        monthly_stats = {}
-        
-        # Analyze trades
-        for entry in entries:
-            # Setup analysis
-            setup = (entry.variables or {}).get('setup', 'No Setup')
-            if setup not in setup_stats:
-                setup_stats[setup] = []
-            setup_stats[setup].append(entry)
-            
-            # Instrument analysis
-            symbol = entry.symbol
-            if symbol not in instrument_stats:
-                instrument_stats[symbol] = []
-            instrument_stats[symbol].append(entry)
-            
-            # Hourly analysis
-            hour = entry.created_at.hour
-            hourly_stats[hour].append(entry)
-            
-            # Weekly analysis
-            week_key = f"{entry.created_at.isocalendar().year}-{entry.created_at.isocalendar().week:02d}"
-            if week_key not in weekly_stats:
-                weekly_stats[week_key] = {'trades': [], 'pnl': 0, 'wins': 0}
-            weekly_stats[week_key]['trades'].append(entry)
-            weekly_stats[week_key]['pnl'] += entry.pnl or 0
-            if (entry.pnl or 0) > 0:
-                weekly_stats[week_key]['wins'] += 1
-            
-            # Monthly analysis
-            month_key = entry.created_at.strftime('%Y-%m')
-            if month_key not in monthly_stats:
-                monthly_stats[month_key] = {'trades': [], 'pnl': 0, 'wins': 0, 'weeks': {}}
-            
-            # Track weekly data within month
-            if week_key not in monthly_stats[month_key]['weeks']:
-                monthly_stats[month_key]['weeks'][week_key] = {'trades': [], 'pnl': 0, 'wins': 0}
-                
-            monthly_stats[month_key]['trades'].append(entry)
-            monthly_stats[month_key]['pnl'] += entry.pnl or 0
-            monthly_stats[month_key]['weeks'][week_key]['trades'].append(entry)
-            monthly_stats[month_key]['weeks'][week_key]['pnl'] += entry.pnl or 0
-            if (entry.pnl or 0) > 0:
-                monthly_stats[month_key]['wins'] += 1
-                monthly_stats[month_key]['weeks'][week_key]['wins'] += 1
-        
-        # Find best setup
-        best_setup = None
-        for setup, trades in setup_stats.items():
-            total_pnl = sum(t.pnl or 0 for t in trades)
-            win_rate = calculate_win_rate(trades)
-            if best_setup is None or total_pnl > best_setup['pnl']:
-                best_setup = {
-                    'name': setup,
-                    'pnl': round(total_pnl, 2),
-                    'win_rate': round(win_rate, 1),
-                    'trades': len(trades)
-                }
-        
-        # Find best instrument
-        best_instrument = None
-        for symbol, trades in instrument_stats.items():
-            total_pnl = sum(t.pnl or 0 for t in trades)
-            win_rate = calculate_win_rate(trades)
-            if best_instrument is None or total_pnl > best_instrument['pnl']:
-                best_instrument = {
-                    'symbol': symbol,
-                    'pnl': round(total_pnl, 2),
-                    'win_rate': round(win_rate, 1),
-                    'trades': len(trades)
-                }
-        
-        # Process hourly performance
-        hourly_performance = []
-        best_hour = None
-        for hour, trades in hourly_stats.items():
-            if not trades:
-                hourly_performance.append({
-                    'hour': hour,
-                    'formatted_time': f"{hour:02d}:00",
-                    'pnl': 0,
-                    'win_rate': 0,
-                    'trades': 0
-                })
-                continue
-                
-            total_pnl = sum(t.pnl or 0 for t in trades)
-            win_rate = calculate_win_rate(trades)
-            
-            hour_data = {
+
+        def win_rate(group):
+            return (group['wins'] / group['trades'] * 100) if group['trades'] else 0.0
+
+        def best_of(groups, name_key, group_key):
+            """Summary of the group with the highest PnL (first one on ties)."""
+            best = max(groups, key=lambda group: group['pnl'], default=None)
+            if best is None:
+                return None
+            return {
+                name_key: best[group_key],
+                'pnl': round(best['pnl'], 2),
+                'win_rate': round(win_rate(best), 1),
+                'trades': best['trades']
+            }
+
+        # Best setup: the 'setup' variable tag; trades without one count as 'No Setup'
+        setups = [{'label': agg['value'], 'trades': agg['trades'], 'wins': agg['wins'], 'pnl': agg['pnl']}
+                  for agg in tag_aggregates(user_id, key='setup')]
+        tagged = select(TradeVariable.entry_id).where(
+            TradeVariable.user_id == user_id, TradeVariable.key == 'setup'
+        )
+        setups += [{'label': 'No Setup', **group}
+                   for group in bucket_totals(user_id, (), JournalEntry.id.not_in(tagged))]
+        best_setup = best_of(setups, 'name', 'label')
+
+        best_instrument = best_of(bucket_totals(user_id, (JournalEntry.symbol,)), 'symbol', 'symbol')
+
+        # Hourly performance (every hour, empty ones included)
+        by_hour = {group['local_hour']: group
+                   for group in bucket_totals(user_id, (JournalEntry.local_hour,))
+                   if group['local_hour'] is not None}
+        hourly_performance = [
+            {
                 'hour': hour,
                 'formatted_time': f"{hour:02d}:00",
-                'pnl': round(total_pnl, 2),
-                'win_rate': round(win_rate, 1),
-                'trades': len(trades)
+                'pnl': round(by_hour[hour]['pnl'], 2) if hour in by_hour else 0,
+                'win_rate': round(win_rate(by_hour[hour]), 1) if hour in by_hour else 0,
+                'trades': by_hour[hour]['trades'] if hour in by_hour else 0
             }
-            hourly_performance.append(hour_data)
-            
-            if best_hour is None or total_pnl > best_hour['pnl']:
-                best_hour = hour_data
-        
-        # Process weekly performance
-        weekly_performance = []
-        best_week = None
-        for week_key, week_data in weekly_stats.items():
-            year, week_num = map(int, week_key.split('-'))
-            week_start = datetime.strptime(f"{year}-{week_num}-1", "%Y-%W-%w")
-            week_end = week_start + timedelta(days=6.9)
-            
-            week_trades = week_data['trades']
-            total_pnl = week_data['pnl']
-            win_rate = (week_data['wins'] / len(week_trades) * 100) if week_trades else 0
-            
-            week_metrics = {
-                'week': week_key,
-                'week_num': week_num,
-                'year': year,
-                'start_date': week_start.strftime('%Y-%m-%d'),
-                'end_date': week_end.strftime('%Y-%m-%d'),
-                'formatted_range': f"{week_start.strftime('%b %d')} - {week_end.strftime('%b %d, %Y')}",
-                'pnl': round(total_pnl, 2),
-                'win_rate': round(win_rate, 1),
-                'trades': len(week_trades)
+            for hour in range(24)
+        ]
+        best_hour = None
+        if by_hour:
+            best_hour = hourly_performance[max(by_hour, key=lambda hour: by_hour[hour]['pnl'])]
+
+        def week_metrics(year_week, group):
+            start, end = week_range(year_week)
+            return {
+                'week': f"{year_week // 100}-{year_week % 100:02d}",
+                'week_num': year_week % 100,
+                'year': year_week // 100,
+                'start_date': start.strftime('%Y-%m-%d'),
+                'end_date': end.strftime('%Y-%m-%d'),
+                'formatted_range': f"{start.strftime('%b %d')} - {end.strftime('%b %d, %Y')}",
+                'pnl': round(group['pnl'], 2),
+                'win_rate': round(win_rate(group), 1),
+                'trades': group['trades']
             }
-            weekly_performance.append(week_metrics)
-            
-            if best_week is None or total_pnl > best_week['pnl']:
-                best_week = week_metrics
-        
-        # Sort weekly performance by date (newest first)
-        weekly_performance.sort(key=lambda x: x['start_date'], reverse=True)
-        
-        # Process monthly performance
-        monthly_performance = []
-        best_month = None
-        print(f"\nProcessing monthly stats. Found {len(monthly_stats)} months of data")
-        
-        for month_key, month_data in sorted(monthly_stats.items(), reverse=True):
-            print(f"\nProcessing month: {month_key}")
-            print(f"Month data: {month_data}")
-            
-            try:
-                month_date = datetime.strptime(month_key + '-01', '%Y-%m-%d')
-                month_name = month_date.strftime('%B %Y')
-                print(f"Formatted month name: {month_name}")
-            except Exception as e:
-                print(f"Error parsing month {month_key}: {str(e)}")
+
+        # Weeks and months from one GROUP BY (year_month, year_week); a week
+        # spanning two months shows up in both with that month's trades
+        weeks, months = {}, {}
+        for group in bucket_totals(user_id, (JournalEntry.year_month, JournalEntry.year_week)):
+            if group['year_week'] is None:
                 continue
-            
-            month_trades = month_data['trades']
-            total_pnl = month_data['pnl']
-            win_rate = (month_data['wins'] / len(month_trades) * 100) if month_trades else 0
-            
-            # Process weekly data for this month
-            weekly_data = []
-            print(f"  Found {len(month_data.get('weeks', {}))} weeks in month {month_key}")
-            
-            for week_key, week_data in month_data.get('weeks', {}).items():
-                print(f"  Processing week: {week_key}")
-                print(f"  Week data: {week_data}")
-                
-                try:
-                    year, week_num = map(int, week_key.split('-'))
-                    week_start = datetime.strptime(f"{year}-{week_num}-1", "%Y-%W-%w")
-                    week_end = week_start + timedelta(days=6.9)
-                    print(f"  Week range: {week_start.date()} to {week_end.date()}")
-                except Exception as e:
-                    print(f"  Error processing week {week_key}: {str(e)}")
-                    continue
-                
-                week_trades = week_data['trades']
-                week_pnl = week_data['pnl']
-                week_win_rate = (week_data['wins'] / len(week_trades) * 100) if week_trades else 0
-                
-                weekly_data.append({
-                    'week': week_key,
-                    'week_num': week_num,
-                    'year': year,
-                    'start_date': week_start.strftime('%Y-%m-%d'),
-                    'end_date': week_end.strftime('%Y-%m-%d'),
-                    'formatted_range': f"{week_start.strftime('%b %d')} - {week_end.strftime('%b %d, %Y')}",
-                    'pnl': round(week_pnl, 2),
-                    'win_rate': round(week_win_rate, 1),
-                    'trades': len(week_trades)
-                })
-            
-            # Sort weekly data by date (newest first)
-            weekly_data.sort(key=lambda x: x['start_date'], reverse=True)
-            
-            month_metrics = {
-                'id': month_key,
-                'name': month_name,
-                'trades': len(month_trades),
-                'return': round(total_pnl, 2),
-                'win_rate': round(win_rate, 1),
-                'weeklyData': weekly_data
+            for bucket in (weeks.setdefault(group['year_week'], {'trades': 0, 'wins': 0, 'pnl': 0.0}),
+                           months.setdefault(group['year_month'], {'trades': 0, 'wins': 0, 'pnl': 0.0, 'weeks': []})):
+                for name in ('trades', 'wins', 'pnl'):
+                    bucket[name] += group[name]
+            months[group['year_month']]['weeks'].append(week_metrics(group['year_week'], group))
+
+        week_rows = {year_week: week_metrics(year_week, group)
+                     for year_week, group in sorted(weeks.items(), reverse=True)}
+        weekly_performance = list(week_rows.values())
+        best_week = week_rows[max(sorted(weeks), key=lambda week: weeks[week]['pnl'])] if weeks else None
+
+        print(f"Processing monthly stats. Found {len(months)} months of data")
+        month_rows = {
+            year_month: {
+                'id': f"{year_month // 100}-{year_month % 100:02d}",
+                'name': date(year_month // 100, year_month % 100, 1).strftime('%B %Y'),
+                'trades': group['trades'],
+                'return': round(group['pnl'], 2),
+                'win_rate': round(win_rate(group), 1),
+                'weeklyData': group['weeks'][::-1]
             }
-            monthly_performance.append(month_metrics)
-            
-            if best_month is None or total_pnl > best_month['return']:
-                best_month = month_metrics
-        
+            for year_month, group in sorted(months.items(), reverse=True)
+        }
+        monthly_performance = list(month_rows.values())
+        best_month = month_rows[max(sorted(months), key=lambda month: months[month]['pnl'])] if months else None
+
         # Prepare the response
         response = {
             'best_setup': best_setup or {
@@ -2209,179 +1575,120 @@ def performance_highlights():
 
 @journal_bp.route('/report-data', methods=['GET'])
 @jwt_required()
+@cached_response
 def report_data():
     """Return a JSON payload with all analytics needed for report generation.
     Combines overall stats, symbol, strategy and tag breakdown in one call so the
     frontend can fetch once and build a PDF/HTML report.
     """
     try:
-        # Reuse existing helper endpoints internally (call their functions) instead
-        # of making HTTP requests.
         user_id = int(get_jwt_identity())
+        return jsonify({**report_breakdown(user_id), 'tags': tag_breakdown(user_id)}), 200
 
-        entries = (
-            JournalEntry.query
-            .filter_by(user_id=user_id)
-            .order_by(JournalEntry.created_at.asc())
-            .all()
-        )
-
-        # Overall stats (reuse logic from stats() but simplify)
-        total_trades = len(entries)
-        total_pnl = sum(e.pnl or 0.0 for e in entries)
-        wins = [e for e in entries if (e.pnl or 0.0) > 0]
-        losses = [e for e in entries if (e.pnl or 0.0) < 0]
-        win_rate = (len(wins) / total_trades * 100) if total_trades else 0.0
-        avg_rr = (sum(e.rr or 0.0 for e in entries) / total_trades) if total_trades else 0.0
-
-        # Symbol, strategy, tag breakdowns by calling internal funcs directly
-        symbol_json, _ = symbol_analysis().__wrapped__(symbol_analysis) if False else (None, None)
-
-        # Instead of hack, we'll replicate small logic quickly using earlier stats_map
-        # Symbol map
-        sym_map = {}
-        for e in entries:
-            sym = (e.symbol or '').upper()
-            if not sym:
-                continue
-            d = sym_map.setdefault(sym, {'trades':0,'wins':0,'total_rr':0.0,'total_pnl':0.0})
-            d['trades']+=1
-            d['total_rr']+= e.rr or 0.0
-            d['total_pnl'] += e.pnl or 0.0
-            if (e.pnl or 0.0)>0:
-                d['wins']+=1
-        symbol_stats=[]
-        for sym,d in sym_map.items():
-            total=d['trades']; win_rate_s=(d['wins']/total*100) if total else 0.0
-            symbol_stats.append({
-                'symbol':sym,
-                'trades':total,
-                'win_rate':round(win_rate_s,1),
-                'avg_rr':round(d['total_rr']/total if total else 0.0,2),
-                'pnl':round(d['total_pnl'],2)
-            })
+    except Exception as e:
+        print(' report_data error:', e)
+        return jsonify({'error': str(e)}), 500
 
-        # Strategy map
-        strat_map={}
-        for e in entries:
-            strat=e.strategy or 'Unspecified'
-            d=strat_map.setdefault(strat,{'trades':0,'wins':0,'total_rr':0.0,'total_pnl':0.0})
-            d['trades']+=1
-            d['total_rr']+= e.rr or 0.0
-            d['total_pnl']+= e.pnl or 0.0
-            if (e.pnl or 0.0)>0:
-                d['wins']+=1
-        strategy_stats=[]
-        for strat,d in strat_map.items():
-            total=d['trades']; win_rate_s=(d['wins']/total*100) if total else 0.0
-            strategy_stats.append({
-                'strategy':strat,
-                'trades':total,
-                'win_rate':round(win_rate_s,1),
-                'avg_rr':round(d['total_rr']/total if total else 0.0,2),
-                'pnl':round(d['total_pnl'],2)
-            })
+# ─── Trade Cube ──────────────────────────────────────────────────────────────
+@journal_bp.route('/cube', methods=['GET'])
+@jwt_required()
+@cached_response
+def trade_cube():
+    """
+    Roll the pre-aggregated trade cube up to any set of dimensions.
 
-        # Tag breakdown reuse logic from tag_breakdown above
-        tag_data = tag_breakdown().__wrapped__(tag_breakdown) if False else None
-        # We'll replicate quickly
-        tag_stats_ret = []
-        tag_map={}
-        for e in entries:
-            vars = e.variables or {}
-            pnl_val = e.pnl or 0.0
-            rr_val = e.rr or 0.0
-            is_win = pnl_val>0
-            for k,v in vars.items():
-                labels = v if isinstance(v,list) else [v]
-                for lab in labels:
-                    t=tag_map.setdefault(k,{}).setdefault(lab,{'trades':0,'wins':0,'total_pnl':0.0,'total_rr':0.0})
-                    t['trades']+=1
-                    t['total_pnl']+=pnl_val
-                    t['total_rr']+=rr_val
-                    if is_win:
-                        t['wins']+=1
-        for k,lab_dict in tag_map.items():
-            items=[]
-            for lab,agg in lab_dict.items():
-                tr=agg['trades']; win=(agg['wins']/tr*100) if tr else 0.0
-                items.append({'label':lab,'trades':tr,'win_rate':round(win,1),'avg_pnl':round(agg['total_pnl']/tr if tr else 0.0,2),'avg_rr':round(agg['total_rr']/tr if tr else 0.0,2)})
-            items.sort(key=lambda x:x['trades'],reverse=True)
-            tag_stats_ret.append({'tag':k,'items':items})
-        tag_stats_ret.sort(key=lambda g:sum(i['trades'] for i in g['items']),reverse=True)
+    Query Parameters:
+        group_by: Comma list of day, symbol, strategy, direction, hour
+                  (empty for the overall totals)
+        from_date / to_date: Inclusive day range (YYYY-MM-DD)
+        symbol / strategy / direction / hour: Equality filters
+
+    Returns ``{'group_by': [...], 'groups': [...]}``; each group has its
+    dimension values, trades, wins, losses, pnl, rr, decided_rr,
+    gross_profit, gross_loss, first_day and last_day.
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        try:
+            group_by, where = cube_query(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
         return jsonify({
-            'overall': {
-                'total_trades': total_trades,
-                'total_pnl': round(total_pnl,2),
-                'win_rate': round(win_rate,1),
-                'avg_rr': round(avg_rr,2)
-            },
-            'symbols': symbol_stats,
-            'strategies': strategy_stats,
-            'tags': tag_stats_ret
+            'group_by': list(group_by),
+            'groups': cube_groups(user_id, group_by, *where),
         }), 200
 
     except Exception as e:
-        print(' report_data error:', e)
+        print(' trade_cube error:', e)
         return jsonify({'error': str(e)}), 500
 
 # ─── Exit Analysis ────────────────────────────────────────────────────────────
 
 @journal_bp.route('/trade/<int:trade_id>/exit-analysis', methods=['GET'])
 @jwt_required()
+@cached_response
 def exit_analysis(trade_id):
     """
     Fetch price data for a specific trade to analyze price movement relative to SL/TP.
-    
+
+    Query params:
+        interval: 1m (default), 5m, 15m or 1h – resampled server-side
+        pad:      minutes of context before entry / after exit (default 60)
+
+    1-minute bars come from the per-(symbol, day) intraday cache, so only
+    days never seen before are downloaded.  The window runs from entry to
+    exit; without a recorded exit time (``extra_data.exit_time``) the exit
+    is estimated as the first bar after entry that traded the exit price.
+
     Returns:
-        JSON with price data, entry/exit points, and SL/TP levels
+        JSON with columnar price data (``timestamp`` in epoch ms plus OHLCV
+        arrays), entry/exit points, and SL/TP levels
     """
     try:
         user_id = int(get_jwt_identity())
-        
+
+        interval = request.args.get('interval', '1m')
+        if interval not in INTRADAY_INTERVALS:
+            return jsonify({"error": f"interval must be one of: {', '.join(INTRADAY_INTERVALS)}"}), 400
+        try:
+            pad = timedelta(minutes=max(int(request.args.get('pad', 60)), 0))
+        except ValueError:
+            return jsonify({"error": "pad must be a number of minutes"}), 400
+
         # Get the trade
         trade = JournalEntry.query.filter_by(id=trade_id, user_id=user_id).first()
         if not trade:
             return jsonify({"error": "Trade not found or access denied"}), 404
-        
+
         # Skip if no symbol or entry/exit dates
         if not trade.symbol or not trade.date or not trade.exit_price:
             return jsonify({"error": "Incomplete trade data for analysis"}), 400
-            
+
         # Convert symbol to yfinance format (e.g., BTC-USD for crypto)
         symbol = trade.symbol.replace('/', '-')
-        if trade.instrument_type == 'crypto':
-            symbol = f"{symbol}"
-        
-        # Set date range (1 day before entry to 1 day after exit)
-        start_date = (trade.date - timedelta(days=1)).strftime('%Y-%m-%d')
-        end_date = (trade.date + timedelta(days=1)).strftime('%Y-%m-%d')
-        
-        # Fetch 1m data for the trade period
-        df = yf.download(
-            tickers=symbol,
-            start=start_date,
-            end=end_date,
-            interval='1m',
-            progress=False
-        )
-        
-        if df.empty:
+
+        # Bars from the day before entry up to the exit (or the day after entry)
+        entry_time = trade.date
+        exit_time = recorded_exit_time(trade.extra_data)
+        last_time = exit_time if exit_time and exit_time > entry_time else entry_time + DEFAULT_HOLD
+        last_time = min(last_time, entry_time + MAX_HOLD)
+        bars = intraday_bars(symbol, (entry_time - timedelta(days=1)).date(), (last_time + pad).date())
+
+        entry_ts = _epoch(entry_time)
+        exit_estimated = False
+        if exit_time is None:
+            exit_ts = exit_time_from_bars(bars, entry_ts, float(trade.exit_price))
+            exit_estimated = exit_ts is not None
+        else:
+            exit_ts = _epoch(exit_time)
+        pad_seconds = int(pad.total_seconds())
+        window_end = (exit_ts if exit_ts is not None else _epoch(last_time)) + pad_seconds
+        bars = resample(trim(bars, entry_ts - pad_seconds, window_end), interval)
+
+        if not len(bars['ts']):
             return jsonify({"error": f"No price data found for {symbol}"}), 404
-        
-        # Convert to list of dicts for JSON response
-        price_data = []
-        for idx, row in df.iterrows():
-            price_data.append({
-                'timestamp': idx.isoformat(),
-                'open': float(row['Open']),
-                'high': float(row['High']),
-                'low': float(row['Low']),
-                'close': float(row['Close']),
-                'volume': int(row['Volume'])
-            })
-        
+
         # Prepare response
         response = {
             'trade': {
@@ -2393,21 +1700,119 @@ def exit_analysis(trade_id):
                 'stop_loss': float(trade.stop_loss) if trade.stop_loss else None,
                 'take_profit': float(trade.take_profit) if trade.take_profit else None,
                 'entry_time': trade.date.isoformat(),
-                'exit_time': trade.updated_at.isoformat() if hasattr(trade, 'updated_at') else None,
+                'exit_time': datetime.utcfromtimestamp(exit_ts).isoformat() if exit_ts is not None else None,
+                'exit_time_estimated': exit_estimated,
                 'pnl': float(trade.pnl) if trade.pnl else 0.0
             },
-            'price_data': price_data
+            'interval': interval,
+            'price_data': {
+                'timestamp': (bars['ts'] * 1000).tolist(),
+                **{column: _json_floats(bars[column]) for column in ('open', 'high', 'low', 'close')},
+                'volume': np.nan_to_num(bars['volume']).astype(np.int64).tolist(),
+            }
         }
-        
+
         return jsonify(response)
-        
+
     except Exception as e:
         print(f"exit_analysis error: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+
+def _epoch(value):
+    """Naive UTC datetime -> epoch seconds."""
+    return int(value.replace(tzinfo=timezone.utc).timestamp())
+
+
+def _json_floats(values):
+    return [None if math.isnan(v) else v for v in values.tolist()]
+
+# ─── Excursion Analysis (MAE / MFE) ──────────────────────────────────────────
+@journal_bp.route('/excursions/compute', methods=['POST'])
+@jwt_required()
+def queue_excursions():
+    """
+    Queue the MAE / MFE batch job for the current user's trades that have a
+    stop loss and a take profit.  ?recompute=1 redoes already stored trades.
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        recompute = request.args.get('recompute') in ('1', 'true')
+        started = start_excursion_job(user_id, recompute)
+        return jsonify({
+            'started': started,
+            'status_url': '/api/journal/excursions/status',
+            **excursion_status(user_id)
+        }), 202 if started else 409
+    except Exception as e:
+        print(f"queue_excursions error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@journal_bp.route('/excursions/status', methods=['GET'])
+@jwt_required()
+def excursions_status():
+    """Eligible / computed / pending trade counts of the excursion job."""
+    try:
+        return jsonify(excursion_status(int(get_jwt_identity())))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@journal_bp.route('/excursions/summary', methods=['GET'])
+@jwt_required()
+@cached_response
+def excursions_summary():
+    """
+    Aggregate MAE / MFE statistics (how often +1R was reached before the
+    stop, stop / target hit rates, capture efficiency …) over the stored
+    excursions.  ?group_by=symbol|direction|strategy|setup|instrument_type
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        group_by = request.args.get('group_by')
+        if group_by and group_by not in EXCURSION_GROUP_FIELDS:
+            return jsonify({'error': f"group_by must be one of: {', '.join(EXCURSION_GROUP_FIELDS)}"}), 400
+        result = excursion_summary(user_id, group_by)
+        return jsonify({'group_by': group_by, 'groups': result} if group_by else result)
+    except Exception as e:
+        print(f"excursions_summary error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@journal_bp.route('/excursions/distribution', methods=['GET'])
+@jwt_required()
+@cached_response
+def excursions_distribution():
+    """
+    Histogram of a stored excursion metric.
+    ?metric=mfe_r (default) | mae_r | capture_efficiency, &bin_size=, &min=, &max=
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        metric = request.args.get('metric', 'mfe_r')
+        if metric not in EXCURSION_DISTRIBUTION_METRICS:
+            return jsonify({'error': f"metric must be one of: {', '.join(EXCURSION_DISTRIBUTION_METRICS)}"}), 400
+        default_min = -1.0 if metric == 'capture_efficiency' else 0.0
+        default_max = 1.0 if metric == 'capture_efficiency' else 5.0
+        try:
+            bin_size = float(request.args.get('bin_size', 0.1 if metric == 'capture_efficiency' else 0.25))
+            minimum = float(request.args.get('min', default_min))
+            maximum = float(request.args.get('max', default_max))
+        except ValueError:
+            return jsonify({'error': 'bin_size, min and max must be numbers'}), 400
+        if bin_size <= 0 or maximum <= minimum or (maximum - minimum) / bin_size > 1000:
+            return jsonify({'error': 'need bin_size > 0, max > min and at most 1000 bins'}), 400
+        return jsonify(excursion_distribution(user_id, metric, bin_size, minimum, maximum))
+    except Exception as e:
+        print(f"excursions_distribution error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
 # ─── Streak Analysis ───────────────────────────────────────────────────────
 @journal_bp.route('/streaks', methods=['GET'])
 @jwt_required()
+@cached_response
 def streak_analysis():
     """
     Calculate and return streak statistics for the current user's trades.
@@ -2420,12 +1825,7 @@ def streak_analysis():
         user_id = int(get_jwt_identity())
         
         # Get all trades ordered by date
-        entries = (
-            JournalEntry.query
-            .filter_by(user_id=user_id)
-            .order_by(JournalEntry.date.asc())
-            .all()
-        )
+        entries = get_entries(user_id, by_date=True)
         
         if not entries:
             return jsonify({
@@ -2569,6 +1969,7 @@ def streak_analysis():
 # ─── Equity Analytics ────────────────────────────────────────────────────────
 @journal_bp.route('/equities', methods=['GET'])
 @jwt_required()
+@cached_response
 def get_equity_curve():
     """
     Return equity curve data and performance metrics for the current user.
@@ -2599,57 +2000,32 @@ def get_equity_curve():
     """
     try:
         user_id = int(get_jwt_identity())
+        try:
+            max_points, method = downsample_args()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Get all trades for the user, ordered by date
-        entries = (
-            JournalEntry.query
-            .filter_by(user_id=user_id)
-            .order_by(JournalEntry.date.asc())
-            .all()
-        )
+        # One daily_pnl ledger row per trading day, in day order
+        ledger = daily_ledger(user_id)
         
-        if not entries:
+        if not ledger:
             return jsonify({
                 'equity_curve': [],
                 'metrics': {},
                 'performance_by_period': {'daily': [], 'weekly': [], 'monthly': []}
             })
         
-        # Initialize data structures
-        equity_curve = []
-        daily_returns = []
-        daily_pnl = []
-        
-        # Calculate cumulative P&L and equity curve
-        cumulative_pnl = 0.0
-        previous_date = None
-        
-        # First pass: group trades by date
-        trades_by_date = {}
-        for entry in entries:
-            trade_date = entry.date.strftime('%Y-%m-%d') if entry.date else entry.created_at.strftime('%Y-%m-%d')
-            if trade_date not in trades_by_date:
-                trades_by_date[trade_date] = []
-            trades_by_date[trade_date].append(entry)
-        
-        # Sort dates
-        sorted_dates = sorted(trades_by_date.keys())
-        
         # Calculate daily returns and build equity curve
         daily_returns = []
         daily_pnl = []
         equity_curve = []
         
         # Get initial equity (first day's closing equity)
-        if trades_by_date:
-            first_day_equity = sum(entry.pnl for entry in trades_by_date[sorted_dates[0]]) if trades_by_date[sorted_dates[0]][0].pnl is not None else 0
-        else:
-            first_day_equity = 0
+        first_day_equity = ledger[0].pnl
             
         cumulative_pnl = 0.0
-        for i, date in enumerate(sorted_dates):
-            # Calculate daily P&L
-            daily_total = sum(entry.pnl for entry in trades_by_date[date] if entry.pnl is not None)
+        for row in ledger:
+            daily_total = row.pnl
             cumulative_pnl += daily_total
             
             # Calculate daily return as percentage of initial equity
@@ -2657,7 +2033,7 @@ def get_equity_curve():
             daily_return = daily_total / first_day_equity if first_day_equity != 0 else 0
             
             equity_curve.append({
-                'date': date,
+                'date': row.day.strftime('%Y-%m-%d'),
                 'equity': cumulative_pnl,
                 'cumulative_pnl': cumulative_pnl,
                 'daily_return': daily_return
@@ -2763,7 +2139,7 @@ def get_equity_curve():
                 })
         
         return jsonify({
-            'equity_curve': equity_curve,
+            'equity_curve': downsample_points(equity_curve, max_points, method, value='equity'),
             'metrics': {
                 'sharpe_ratio': round(float(sharpe_ratio), 2),
                 'sortino_ratio': round(float(sortino_ratio), 2),
@@ -2901,154 +2277,6 @@ Keep up the disciplined effort. You're on the right path to achieving your tradi
         return jsonify({'error': 'An unexpected error occurred while generating the AI summary.'}), 500
 
 
-# ─── Shared import parser ────────────────────────────────────────────────────
-def parse_trades_dataframe(df):
-    """Parse a pandas DataFrame into a list[dict] trade objects.
-    We attempt to map common broker column names to our internal fields.
-    Unknown columns are stored in `extra_data` or as variables.
-    """
-    # Make a copy to avoid modifying the original
-    df = df.copy()
-    
-    # Store original column names for reference
-    original_headers = {col.lower(): col for col in df.columns}
-    
-    # Normalise headers (strip, lower) for processing
-    df.columns = [c.strip().lower() for c in df.columns]
-
-    # Heuristic mapping - only for core fields that we need to identify
-    core_fields = {
-        'symbol': ['symbol', 'pair', 'instrument'],
-        'direction': ['type', 'side', 'direction'],
-        'entry_price': ['entry price', 'open', 'open price', 'price open'],
-        'exit_price': ['exit price', 'close', 'close price', 'price close'],
-        'quantity': ['volume', 'qty', 'size', 'lots', 'quantity'],
-        'date': ['date', 'open time', 'entry time', 'datetime', 'trade time', 'close time'],
-        'time': ['time', 'entry time', 'close time', 'hour', 'trade time'],
-        'pnl': ['pnl', 'profit', 'net profit', 'p&l'],
-        'rr': ['rr', 'r:r', 'riskreward', 'risk reward', 'risk/reward'],
-    }
-    
-    # Fields that should be excluded from variables
-    excluded_from_vars = set()
-    for field, aliases in core_fields.items():
-        excluded_from_vars.update(aliases)
-    excluded_from_vars.update(['id', 'notes', 'tags', 'variables', 'extra_data', 'created_at', 'updated_at'])
-
-    # Build reverse lookup for core fields
-    reverse_lookup = {}
-    for k, aliases in core_fields.items():
-        for alias in aliases:
-            reverse_lookup[alias] = k
-
-    # Try to automatically detect date/time columns
-    date_columns = []
-    time_columns = []
-    datetime_columns = []
-    
-    for col in df.columns:
-        col_lower = col.lower()
-        if any(x in col_lower for x in ['date', 'time', 'datetime']):
-            # Check if column contains datetime strings
-            sample = df[col].dropna().head(10).astype(str)
-            if sample.empty:
-                continue
-                
-            # Check for datetime format (e.g., '2023-01-01 14:30:00')
-            if sample.str.match(r'\d{4}[-/]\d{1,2}[-/]\d{1,2}[T\s]\d{1,2}:\d{2}(?::\d{2})?(?:\.\d+)?(?:[+-]\d{2}:?\d{2}|Z)?').any():
-                datetime_columns.append(col)
-            # Check for date format (e.g., '2023-01-01')
-            elif sample.str.match(r'\d{4}[-/]\d{1,2}[-/]\d{1,2}').any():
-                date_columns.append(col)
-            # Check for time format (e.g., '14:30:00')
-            elif sample.str.match(r'\d{1,2}:\d{2}(?::\d{2})?(?:\.\d+)?').any():
-                time_columns.append(col)
-
-    trades = []
-    for _, row in df.iterrows():
-        trade = {
-            'symbol': None,
-            'direction': None,
-            'entry_price': None,
-            'exit_price': None,
-            'quantity': 1.0,
-            'date': None,
-            'time': None,
-            'datetime': None,
-            'pnl': None,
-            'rr': None,
-            'extra_data': {},
-            'variables': {}
-        }
-        
-        # Map known columns and collect variables
-        for col in df.columns:
-            if pd.isna(row[col]) or row[col] == '':
-                continue
-                
-            col_lower = col.lower()
-            
-            # Check if this is a core field
-            if col_lower in reverse_lookup:
-                field = reverse_lookup[col_lower]
-                trade[field] = row[col]
-            # Only include non-core, non-excluded fields as variables
-            elif col_lower not in excluded_from_vars:
-                # Use the original column name from the import file and convert to lowercase
-                original_col = original_headers.get(col, col).lower()
-                # Convert the value to lowercase if it's a string, or process lists of strings
-                if isinstance(row[col], str):
-                    trade['variables'][original_col] = row[col].lower() if pd.notna(row[col]) and str(row[col]).strip() else row[col]
-                elif isinstance(row[col], list):
-                    # Handle lists of strings
-                    trade['variables'][original_col] = [
-                        str(item).lower().strip() 
-                        for item in row[col] 
-                        if pd.notna(item) and str(item).strip()
-                    ]
-                else:
-                    trade['variables'][original_col] = row[col]
-            else:
-                # Store in extra_data
-                trade['extra_data'][col] = row[col]
-        
-        # Handle date/time parsing
-        if 'datetime' not in trade or not trade['datetime']:
-            # Try to combine separate date and time columns
-            date_val = trade.get('date')
-            time_val = trade.get('time')
-            
-            if date_val and time_val:
-                try:
-                    # Convert to string in case they're pandas Timestamp objects
-                    date_str = str(date_val).strip()
-                    time_str = str(time_val).strip()
-                    
-                    # Handle different date formats
-                    if 'T' in date_str:  # ISO format
-                        trade['datetime'] = date_str
-                    else:
-                        # Combine date and time
-                        trade['datetime'] = f"{date_str} {time_str}"
-                except Exception as e:
-                    print(f"Error combining date and time: {e}")
-                    trade['datetime'] = str(date_val)
-        
-        # If we still don't have a datetime, try to parse the date
-        if 'datetime' not in trade or not trade['datetime']:
-            if 'date' in trade and trade['date']:
-                trade['datetime'] = str(trade['date'])
-        
-        # Clean up the trade dictionary
-        if 'date' in trade and not trade['date']:
-            del trade['date']
-        if 'time' in trade and not trade['time']:
-            del trade['time']
-            
-        trades.append(trade)
-    
-    return trades
-
 # ─── Import preview endpoint ────────────────────────────────────────────────
 @journal_bp.route('/import/preview', methods=['POST'])
 @jwt_required()
@@ -3061,13 +2289,10 @@ def import_preview():
         return jsonify({'error': 'Empty filename'}), 400
 
     try:
-        # Read into pandas depending on extension
-        if file.filename.lower().endswith('.csv'):
-            df = pd.read_csv(file)
-        else:
-            df = pd.read_excel(file)
+        # Only the previewed rows are read from the upload
+        df = read_file_head(file, file.filename, 20)
 
-        preview_df = df.head(20)
+        preview_df = df
         trades = parse_trades_dataframe(preview_df)
         # Replace NaN with None for JSON serialization
         sanitized_df = preview_df.where(pd.notnull(preview_df), None)
@@ -3114,6 +2339,7 @@ def import_preview():
 
 @journal_bp.route('/variable-breakdown', methods=['GET'])
 @jwt_required()
+@cached_response
 def variable_breakdown():
     """
     Return performance metrics grouped by values of a specific variable key.
@@ -3123,6 +2349,8 @@ def variable_breakdown():
         from_date (str, optional): Filter trades on or after this date (YYYY-MM-DD)
         to_date (str, optional): Filter trades on or before this date (YYYY-MM-DD)
         timeframe (str, optional): Filter trades by timeframe ('all', 'month', 'year')
+        max_points (int, optional): Cap on each value's cumulative_pnl series
+        downsample (str, optional): 'lttb' (default) or 'minmax'
         
     Returns:
         JSON response with performance metrics grouped by variable values
@@ -3135,22 +2363,25 @@ def variable_breakdown():
         from_date = request.args.get('from_date')
         to_date = request.args.get('to_date')
         timeframe = request.args.get('timeframe', 'all')
+        try:
+            max_points, method = downsample_args()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Base query
-        query = JournalEntry.query.filter_by(user_id=user_id)
+        filters = []
         
         # Apply date filters
         if from_date:
             try:
                 from_date = datetime.strptime(from_date, '%Y-%m-%d').date()
-                query = query.filter(JournalEntry.date >= from_date)
+                filters.append(JournalEntry.date >= from_date)
             except ValueError:
                 return jsonify({'error': 'Invalid from_date format. Use YYYY-MM-DD'}), 400
                 
         if to_date:
             try:
                 to_date = datetime.strptime(to_date, '%Y-%m-%d').date()
-                query = query.filter(JournalEntry.date <= to_date)
+                filters.append(JournalEntry.date <= to_date)
             except ValueError:
                 return jsonify({'error': 'Invalid to_date format. Use YYYY-MM-DD'}), 400
                 
@@ -3159,89 +2390,14 @@ def variable_breakdown():
             today = date.today()
             if timeframe == 'month':
                 first_day = today.replace(day=1)
-                query = query.filter(JournalEntry.date >= first_day)
+                filters.append(JournalEntry.date >= first_day)
             elif timeframe == 'year':
                 first_day = today.replace(month=1, day=1)
-                query = query.filter(JournalEntry.date >= first_day)
+                filters.append(JournalEntry.date >= first_day)
         
-        # Get all trades
-        entries = query.all()
-        
-        # Group trades by variable value
-        variable_stats = {}
-        
-        for entry in entries:
-            if not entry.variables or variable_key not in entry.variables:
-                continue
-                
-            value = str(entry.variables[variable_key])
-            if not value:  # Skip empty values
-                continue
-                
-            if value not in variable_stats:
-                variable_stats[value] = {
-                    'trades': 0,
-                    'wins': 0,
-                    'losses': 0,
-                    'total_rr': 0.0,
-                    'total_pnl': 0.0,
-                    'gross_profit': 0.0,
-                    'gross_loss': 0.0,
-                    'first_date': None,
-                    'last_date': None,
-                    'win_amounts': [],
-                    'loss_amounts': [],
-                    'pnl_history': [],
-                    'running_pnl': 0.0,
-                    'peak': 0.0,
-                    'max_drawdown': 0.0
-                }
-            
-            stats = variable_stats[value]
-            stats['trades'] += 1
-            
-            # Track dates
-            if entry.date:
-                if stats['first_date'] is None or entry.date < stats['first_date']:
-                    stats['first_date'] = entry.date
-                if stats['last_date'] is None or entry.date > stats['last_date']:
-                    stats['last_date'] = entry.date
-            
-            # Skip trades with no PnL for calculations
-            if entry.pnl is None:
-                continue
-                
-            # Track PnL and RR
-            stats['total_pnl'] += entry.pnl
-            stats['running_pnl'] += entry.pnl
-            if entry.rr:
-                stats['total_rr'] += entry.rr
-            
-            # Track PnL history for drawdown calculation
-            stats['pnl_history'].append({
-                'date': entry.date.isoformat() if entry.date else None,
-                'pnl': entry.pnl or 0.0,
-                'cumulative': stats['running_pnl']
-            })
-            
-            # Update peak and drawdown
-            if stats['running_pnl'] > stats['peak']:
-                stats['peak'] = stats['running_pnl']
-            else:
-                drawdown = stats['peak'] - stats['running_pnl']
-                if drawdown > stats['max_drawdown']:
-                    stats['max_drawdown'] = drawdown
-            
-            # Track wins/losses and amounts
-            if entry.pnl > 0:
-                stats['wins'] += 1
-                stats['gross_profit'] += entry.pnl
-                stats['win_amounts'].append(entry.pnl)
-            else:
-                stats['losses'] += 1
-                loss = abs(entry.pnl)
-                stats['gross_loss'] += loss
-                stats['loss_amounts'].append(loss)
+        # Group trades by variable value in SQL (break-even trades count as losses here)
+        aggregates = tag_aggregates(user_id, *filters, key=variable_key, loss_includes_zero=True)
+        series, _ = tag_series(user_id, *filters, key=variable_key, max_points=max_points, method=method)
         
         # Calculate metrics for each variable value
         result = []
@@ -3252,7 +2408,8 @@ def variable_breakdown():
         total_profit_factor = 0.0
         variable_count = 0
         
-        for value, data in variable_stats.items():
+        for data in aggregates:
+            value = data['value']
             wins = data['wins']
             losses = data['losses']
             total = data['trades']
@@ -3262,7 +2419,7 @@ def variable_breakdown():
                 
             # Calculate basic metrics
             win_rate = (wins / (wins + losses) * 100) if (wins + losses) > 0 else 0.0
-            avg_rr = data['total_rr'] / total if total > 0 else 0.0
+            avg_rr = data['rr'] / total if total > 0 else 0.0
             
             # Calculate profit factor
             profit_factor = None
@@ -3272,12 +2429,12 @@ def variable_breakdown():
                 profit_factor = float('inf')
             
             # Calculate average win/loss
-            avg_win = sum(data['win_amounts']) / len(data['win_amounts']) if data['win_amounts'] else 0.0
-            avg_loss = sum(data['loss_amounts']) / len(data['loss_amounts']) if data['loss_amounts'] else 0.0
+            avg_win = data['gross_profit'] / wins if wins else 0.0
+            avg_loss = data['gross_loss'] / losses if losses else 0.0
             
             # Calculate max win/loss
-            max_win = max(data['win_amounts'], default=0.0)
-            max_loss = max(data['loss_amounts'], default=0.0)
+            max_win = data['max_win'] or 0.0
+            max_loss = data['max_loss'] or 0.0
             
             # Calculate expectancy
             win_prob = wins / total if total > 0 else 0
@@ -3287,22 +2444,11 @@ def variable_breakdown():
             # Calculate consistency score (0-1, higher is more consistent)
             consistency = 0.0
             if wins > 0 and losses > 0:
-                win_std = (sum((x - avg_win) ** 2 for x in data['win_amounts']) / len(data['win_amounts'])) ** 0.5 if data['win_amounts'] else 0
-                loss_std = (sum((x - avg_loss) ** 2 for x in data['loss_amounts']) / len(data['loss_amounts'])) ** 0.5 if data['loss_amounts'] else 0
+                win_std = spread(data['win_sq'], data['gross_profit'], wins)
+                loss_std = spread(data['loss_sq'], data['gross_loss'], losses)
                 consistency = 1 / (1 + (win_std / avg_win if avg_win != 0 else 0) + (loss_std / avg_loss if avg_loss != 0 else 0))
             
-            # Sort PnL history by date
-            sorted_pnl = sorted(data['pnl_history'], key=lambda x: x['date'] or '')
-            
-            # Prepare cumulative PnL data for charting
-            cumulative_pnl = []
-            running_total = 0.0
-            for trade in sorted_pnl:
-                running_total += trade['pnl']
-                cumulative_pnl.append({
-                    'date': trade['date'],
-                    'value': round(running_total, 2)
-                })
+            value_curve = series.get((data['key'], value), {'points': [], 'max_drawdown': 0.0})
             
             # Create stats object for this variable value
             value_stats = {
@@ -3312,7 +2458,7 @@ def variable_breakdown():
                 'losses': losses,
                 'win_rate': round(win_rate, 1),
                 'avg_rr': round(avg_rr, 2),
-                'pnl': round(data['total_pnl'], 2),
+                'pnl': round(data['pnl'], 2),
                 'profit_factor': round(profit_factor, 2) if profit_factor is not None and profit_factor != float('inf') else None,
                 'gross_profit': round(data['gross_profit'], 2),
                 'gross_loss': round(data['gross_loss'], 2),
@@ -3320,10 +2466,10 @@ def variable_breakdown():
                 'avg_loss': round(avg_loss, 2),
                 'max_win': round(max_win, 2),
                 'max_loss': round(-max_loss, 2) if max_loss != 0 else 0.0,
-                'max_drawdown': round(abs(data['max_drawdown']), 2) if data['max_drawdown'] is not None else 0.0,
+                'max_drawdown': round(abs(value_curve['max_drawdown']), 2),
                 'expectancy': round(expectancy, 2),
                 'consistency_score': round(consistency, 2),
-                'cumulative_pnl': cumulative_pnl,
+                'cumulative_pnl': value_curve['points'],
                 'first_trade_date': data['first_date'].strftime('%Y-%m-%d') if data['first_date'] else None,
                 'latest_date': data['last_date'].strftime('%Y-%m-%d') if data['last_date'] else None
             }
@@ -3338,7 +2484,7 @@ def variable_breakdown():
             
             # Update summary stats
             total_trades += total
-            total_pnl += data['total_pnl']
+            total_pnl += data['pnl']
             total_win_rate += win_rate
             if profit_factor is not None and profit_factor != float('inf'):
                 total_profit_factor += profit_factor
@@ -3371,4 +2517,75 @@ def variable_breakdown():
     except Exception as e:
         import traceback
         traceback.print_exc()
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+
+# ─── Dashboard ───────────────────────────────────────────────────────────────
+# Section name -> view.  Each section is the JSON its own endpoint returns,
+# cached under that endpoint's key, so /dashboard and the individual
+# endpoints share cache entries.  Import batches bump the data version on
+# every status and progress change (``BulkImporter._record``), so import
+# history is safe to cache and to answer revalidations with 304 like the rest.
+DASHBOARD_SECTIONS = {
+    'stats': stats,
+    'equities': get_equity_curve,
+    'performance-highlights': performance_highlights,
+    'streaks': streak_analysis,
+    'import-history': import_history,
+    'symbol-analysis': symbol_analysis,
+    'strategy-analysis': strategy_analysis,
+}
+DASHBOARD_SHARED_ARGS = ('downsample', 'max_points')
+
+
+def _render_section(view):
+    response = current_app.make_response(unwrap(view)())
+    if response.status_code != 200:
+        error = response.get_json(silent=True) or {'error': f'status {response.status_code}'}
+        return json.dumps(error).encode(), False
+    return response.get_data(), True
+
+
+@journal_bp.route('/dashboard', methods=['GET'])
+@jwt_required()
+@fails_stale_imports
+@conditional_response
+def dashboard():
+    """
+    Several analytics sections in one response.
+
+    ?sections=stats,equities,… (default: all of ``DASHBOARD_SECTIONS``);
+    max_points / downsample are passed on to the sections.
+    Returns ``{section: <that endpoint's JSON>}``.  The trades are loaded
+    once per request (``get_engine`` / ``get_entries``) and shared by every
+    section that is not already cached.
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        requested = request.args.get('sections')
+        names = [n.strip() for n in requested.split(',') if n.strip()] if requested else list(DASHBOARD_SECTIONS)
+        unknown = [n for n in names if n not in DASHBOARD_SECTIONS]
+        if unknown:
+            return jsonify({
+                'error': f"Unknown section(s): {', '.join(unknown)}",
+                'sections': list(DASHBOARD_SECTIONS),
+            }), 400
+
+        # Chart options every section honours; part of each section's cache key
+        shared_args = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True))
+                               if k in DASHBOARD_SHARED_ARGS)
+
+        parts, hits = [], 0
+        for name in dict.fromkeys(names):
+            view = DASHBOARD_SECTIONS[name]
+            key = url_for(f'journal.{view.__name__}') + '?' + shared_args
+            body, hit = cached_body(user_id, key, partial(_render_section, view))
+            hits += hit
+            parts.append(json.dumps(name).encode() + b':' + body.strip())
+
+        response = current_app.response_class(b'{' + b','.join(parts) + b'}', mimetype='application/json')
+        response.headers['X-Cache-Hits'] = f'{hits}/{len(parts)}'
+        return response
+    except Exception as e:
+        print(" dashboard error:", e)
+        return jsonify({'error': str(e)}), 500
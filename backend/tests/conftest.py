@@ -0,0 +1,56 @@
+# tests/conftest.py
+
+import os
+import sys
+
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import db, User  # noqa: E402
+from migrations import upgrade_database  # noqa: E402
+from routes import journal_routes  # noqa: E402
+from routes.admin_routes import admin_bp  # noqa: E402
+from routes.auth_routes import auth_bp  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """The API blueprints on a fresh SQLite file; uploads go to tmp_path."""
+    monkeypatch.setattr(journal_routes, 'UPLOAD_FOLDER', str(tmp_path))
+    app = Flask(__name__, instance_path=str(tmp_path / 'instance'))
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'journal.db'}",
+        JWT_SECRET_KEY='test-secret-key-of-at-least-32-bytes',
+        ANALYTICS_CACHE='none',
+    )
+    JWTManager(app)
+    db.init_app(app)
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(journal_routes.journal_bp, url_prefix='/api/journal')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    with app.app_context():
+        db.create_all()
+        upgrade_database()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def make_user(app, email, is_admin=False):
+    """Create a user and return ``(user_id, auth headers)``."""
+    with app.app_context():
+        user = User(email=email, password='x')
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity=str(user.id), additional_claims={'is_admin': is_admin})
+        return user.id, {'Authorization': f'Bearer {token}'}
@@ -0,0 +1,134 @@
+# tests/test_rollups.py
+
+"""
+daily_pnl and trade_cube are maintained by incremental deltas on every
+write path.  After each write the tables must hold exactly what
+``rebuild_rollups`` derives from the trades themselves.
+"""
+
+import io
+import time
+
+from conftest import make_user
+from analytics.rollups import rebuild_rollups
+from models import db, DailyPnl, TradeCube
+
+
+def rollup_rows(user_id):
+    """Every daily_pnl / trade_cube row of the user, floats rounded."""
+    rows = {}
+    for model in (DailyPnl, TradeCube):
+        columns = model.__table__.columns.keys()
+        rows[model.__tablename__] = sorted(
+            tuple(round(value, 6) if isinstance(value, float) else value
+                  for value in (getattr(row, column) for column in columns))
+            for row in model.query.filter_by(user_id=user_id)
+        )
+    return rows
+
+
+def assert_rollups_match(app, user_id):
+    with app.app_context():
+        incremental = rollup_rows(user_id)
+        rebuild_rollups(user_id)
+        rebuilt = rollup_rows(user_id)
+        db.session.rollback()
+    assert incremental == rebuilt
+
+
+def wait_for_import(client, headers, batch_id, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = client.get(f'/api/journal/import/{batch_id}/status', headers=headers).get_json()
+        if status['status'] in ('completed', 'failed'):
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f'import {batch_id} did not finish')
+
+
+TRADES = [
+    {'symbol': 'aapl', 'direction': 'Long', 'pnl': 120.5, 'rr': 2.0, 'date': '2024-03-01', 'time': '09:45'},
+    {'symbol': 'aapl', 'direction': 'short', 'pnl': -40.25, 'rr': -1.0, 'date': '2024-03-01', 'time': '23:30'},
+    {'symbol': 'BTC/USD', 'direction': 'long', 'pnl': 0.0, 'rr': 0.0, 'date': '2024-03-02'},
+    {'symbol': 'spy', 'direction': 'long', 'pnl': 310.0, 'timestamp': '2024-03-04T14:05:00Z'},
+]
+
+CSV = (
+    'symbol,direction,entry_price,exit_price,pnl,quantity,rr,notes,date\n'
+    'AAPL,long,100,101,55.5,1,1.5,a,2024-03-01 10:15\n'
+    'ETH,short,3000,2950,50,1,2,,2024-03-03 02:00\n'
+    'SPY,long,500,495,-75,1,-1,b,2024-03-04 21:30\n'
+)
+
+
+def test_incremental_rollups_match_rebuild(app, client):
+    user_id, headers = make_user(app, 'trader@example.com')
+    other_id, other_headers = make_user(app, 'other@example.com')
+    _, admin_headers = make_user(app, 'admin@example.com', is_admin=True)
+
+    # Manual add
+    ids = []
+    for i, (pnl, date) in enumerate([(150.0, '2024-03-01T10:00:00Z'), (-80.0, '2024-03-01T15:30:00Z'),
+                                     (0.0, '2024-03-05T08:00:00Z')]):
+        response = client.post('/api/journal/add', headers=headers, json={
+            'symbol': 'EURUSD', 'direction': 'long' if i % 2 == 0 else 'short',
+            'entry_price': 1.1, 'exit_price': 1.2, 'quantity': 1, 'pnl': pnl, 'rr': 1.5, 'date': date,
+        })
+        assert response.status_code == 201, response.get_json()
+        ids.append(response.get_json()['trade']['id'])
+    assert_rollups_match(app, user_id)
+
+    # Update: pnl, symbol and direction move the trade between rows
+    response = client.put(f'/api/journal/{ids[0]}', headers=headers,
+                          json={'pnl': -20.0, 'symbol': 'GBPUSD', 'direction': 'short', 'rr': -0.5})
+    assert response.status_code == 200, response.get_json()
+    assert_rollups_match(app, user_id)
+
+    # Delete
+    response = client.delete(f'/api/journal/delete/{ids[1]}', headers=headers)
+    assert response.status_code == 200, response.get_json()
+    assert_rollups_match(app, user_id)
+
+    # JSON import, inline and as a background job
+    response = client.post('/api/journal/import', headers=headers, json={'trades': TRADES})
+    assert response.status_code in (200, 201), response.get_json()
+    json_batch = response.get_json()['batch_id']
+    assert_rollups_match(app, user_id)
+
+    response = client.post('/api/journal/import?background=1', headers=headers, json={'trades': TRADES})
+    assert response.status_code == 202, response.get_json()
+    assert wait_for_import(client, headers, response.get_json()['batch_id'])['status'] == 'completed'
+    assert_rollups_match(app, user_id)
+
+    # File import
+    response = client.post('/api/journal/import/excel', headers=headers,
+                           data={'file': (io.BytesIO(CSV.encode()), 'trades.csv')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 202, response.get_json()
+    status = wait_for_import(client, headers, response.get_json()['batch_id'])
+    assert status['status'] == 'completed' and status['rows_inserted'] == 3, status
+    assert_rollups_match(app, user_id)
+
+    # The other user's trades must not leak into this user's rollups
+    response = client.post('/api/journal/import', headers=other_headers, json={'trades': TRADES})
+    assert response.status_code in (200, 201), response.get_json()
+
+    # Batch delete
+    response = client.delete(f'/api/journal/import/{json_batch}', headers=headers)
+    assert response.status_code == 200, response.get_json()
+    assert_rollups_match(app, user_id)
+
+    # Timezone change re-buckets hours and days
+    for zone in ('America/New_York', 'Asia/Tokyo'):
+        response = client.put('/api/auth/profile', headers=headers, json={'timezone': zone})
+        assert response.status_code == 200, response.get_json()
+        assert_rollups_match(app, user_id)
+    assert_rollups_match(app, other_id)
+
+    # Purging a user removes their rows and leaves everyone else's alone
+    response = client.delete(f'/api/admin/users/{user_id}', headers=admin_headers)
+    assert response.status_code == 200, response.get_json()
+    with app.app_context():
+        assert rollup_rows(user_id) == {'daily_pnl': [], 'trade_cube': []}
+        assert rollup_rows(other_id)['daily_pnl']
+    assert_rollups_match(app, other_id)
@@ -1,5 +1,5 @@
 
-import { useEffect, useState, useCallback, useMemo } from 'react';
+import { useEffect, useState, useCallback, useMemo, useRef } from 'react';
 import { fetchWithAuth } from '../utils/fetchUtils';
 
 // Helper formatters
@@ -10,6 +10,40 @@ const toDateKey = (date) => {
   return `${y}-${m}-${d}`;
 };
 
+// Sections of /api/journal/dashboard loaded together on mount
+const DASHBOARD_SECTIONS = ['stats', 'equities', 'performance-highlights', 'import-history'];
+
+const toPerformanceData = (data) => ({
+  best_setup: data.best_setup || { name: 'No data', pnl: 0, win_rate: 0, trades: 0 },
+  best_instrument: data.best_instrument || { symbol: 'No data', pnl: 0, win_rate: 0, trades: 0 },
+  best_time_of_day: data.best_time_of_day || { hour: 0, formatted_time: 'No data', pnl: 0, win_rate: 0, trades: 0 },
+  best_week: data.best_week || { week: 'No data', formatted_range: 'No data', pnl: 0, win_rate: 0, trades: 0 },
+  monthly_performance: data.monthly_performance || [],
+  hourly_performance: data.hourly_performance || Array(24).fill(0).map((_, i) => ({
+    hour: i,
+    formatted_time: `${i.toString().padStart(2, '0')}:00`,
+    pnl: 0,
+    win_rate: 0,
+    trades: 0
+  })),
+  weekly_performance: data.weekly_performance || []
+});
+
+// Convert pnl_by_date from array of arrays to object if needed
+const toStatsData = (data) => {
+  let pnlByDate = {};
+  if (Array.isArray(data?.pnl_by_date)) {
+    data.pnl_by_date.forEach(([date, pnl]) => {
+      if (date) {
+        pnlByDate[date] = pnl;
+      }
+    });
+  } else if (data?.pnl_by_date && typeof data.pnl_by_date === 'object') {
+    pnlByDate = data.pnl_by_date;
+  }
+  return { ...data, pnl_by_date: pnlByDate };
+};
+
 export default function useAnalyticsData() {
   const [stats, setStats] = useState(null);
   const [equityMetrics, setEquityMetrics] = useState(null);
@@ -31,38 +65,56 @@ export default function useAnalyticsData() {
   const [importHistory, setImportHistory] = useState([]);
   const [selectedBatch, setSelectedBatch] = useState('');
   const [referenceDate, setReferenceDate] = useState(new Date());
+  // Set once the mount-time /dashboard request has settled
+  const [dashboardLoaded, setDashboardLoaded] = useState(false);
+  const dashboardSections = useRef({});
+
+  // One round-trip for every section this hook needs on mount; the
+  // individual fetchers below only run for sections it could not provide.
+  useEffect(() => {
+    (async () => {
+      try {
+        const url = new URL('http://localhost:5000/api/journal/dashboard');
+        url.searchParams.set('sections', DASHBOARD_SECTIONS.join(','));
+        const data = await fetchWithAuth(url.toString());
+        dashboardSections.current = Object.fromEntries(
+          Object.entries(data || {}).filter(([, section]) => section && !section.error)
+        );
+      } catch (err) {
+        console.error('❌ Failed to load dashboard, falling back to separate requests:', err);
+      } finally {
+        setDashboardLoaded(true);
+      }
+    })();
+  }, []);
+
+  // Hand out a mount-time section once; later refreshes hit the endpoint
+  const takeSection = (name) => {
+    const section = dashboardSections.current[name];
+    delete dashboardSections.current[name];
+    return section;
+  };
 
   useEffect(() => {
+    if (!dashboardLoaded) return;
     (async () => {
       try {
-        const data = await fetchWithAuth('http://localhost:5000/api/journal/import/history');
+        const data = takeSection('import-history') ||
+          await fetchWithAuth('http://localhost:5000/api/journal/import/history');
         setImportHistory(data || []);
       } catch (err) {
         console.error('❌ Failed to load import history:', err);
       }
     })();
-  }, []);
+  }, [dashboardLoaded]);
 
   const fetchPerformanceData = useCallback(async () => {
     setPerformanceLoading(true);
     setPerformanceError('');
     try {
-      const data = await fetchWithAuth('http://localhost:5000/api/journal/performance-highlights');
-      setPerformanceData({
-        best_setup: data.best_setup || { name: 'No data', pnl: 0, win_rate: 0, trades: 0 },
-        best_instrument: data.best_instrument || { symbol: 'No data', pnl: 0, win_rate: 0, trades: 0 },
-        best_time_of_day: data.best_time_of_day || { hour: 0, formatted_time: 'No data', pnl: 0, win_rate: 0, trades: 0 },
-        best_week: data.best_week || { week: 'No data', formatted_range: 'No data', pnl: 0, win_rate: 0, trades: 0 },
-        monthly_performance: data.monthly_performance || [],
-        hourly_performance: data.hourly_performance || Array(24).fill(0).map((_, i) => ({
-          hour: i,
-          formatted_time: `${i.toString().padStart(2, '0')}:00`,
-          pnl: 0,
-          win_rate: 0,
-          trades: 0
-        })),
-        weekly_performance: data.weekly_performance || []
-      });
+      const data = takeSection('performance-highlights') ||
+        await fetchWithAuth('http://localhost:5000/api/journal/performance-highlights');
+      setPerformanceData(toPerformanceData(data));
     } catch (err) {
       console.error('❌ Failed to load performance data:', err);
       setPerformanceError('Failed to load performance data. Please try again later.');
@@ -72,13 +124,19 @@ export default function useAnalyticsData() {
   }, []);
 
   useEffect(() => {
-    fetchPerformanceData();
-  }, [fetchPerformanceData]);
+    if (dashboardLoaded) fetchPerformanceData();
+  }, [dashboardLoaded, fetchPerformanceData]);
 
   const fetchStats = useCallback(async () => {
     setLoading(true);
     setError('');
     try {
+      const section = !selectedBatch && takeSection('stats');
+      if (section) {
+        setStats(toStatsData(section));
+        return;
+      }
+
       const token = localStorage.getItem('token');
       console.log('🔑 Token from localStorage:', token ? 'Token found' : 'No token found');
       
@@ -119,23 +177,8 @@ export default function useAnalyticsData() {
       const data = await response.json();
       console.log('📥 Raw API response:', data);
       
-      // Convert pnl_by_date from array of arrays to object if needed
-      let pnlByDate = {};
-      if (Array.isArray(data?.pnl_by_date)) {
-        console.log('Converting pnl_by_date from array to object format');
-        data.pnl_by_date.forEach(([date, pnl]) => {
-          if (date) {
-            pnlByDate[date] = pnl;
-          }
-        });
-      } else if (data?.pnl_by_date && typeof data.pnl_by_date === 'object') {
-        pnlByDate = data.pnl_by_date;
-      }
-      
-      const processedData = {
-        ...data,
-        pnl_by_date: pnlByDate
-      };
+      const processedData = toStatsData(data);
+      const pnlByDate = processedData.pnl_by_date;
       
       console.log('📥 Processed stats data:', {
         hasTrades: !!processedData?.trades,
@@ -171,8 +214,8 @@ export default function useAnalyticsData() {
   }, [selectedBatch, fetchPerformanceData]);
 
   useEffect(() => {
-    fetchStats();
-  }, [fetchStats]);
+    if (dashboardLoaded) fetchStats();
+  }, [dashboardLoaded, fetchStats]);
 
   const calendarStats = useMemo(() => {
     console.log('Calculating calendar stats...');
@@ -319,7 +362,7 @@ export default function useAnalyticsData() {
       setEquityMetricsError('');
       
       const startTime = Date.now();
-      const data = await fetchWithAuth(endpoint);
+      const data = takeSection('equities') || await fetchWithAuth(endpoint);
       const duration = Date.now() - startTime;
       
       console.log(`[Equity] Successfully fetched equity metrics in ${duration}ms`, data);
@@ -356,11 +399,12 @@ export default function useAnalyticsData() {
 
   // Fetch equity metrics on mount and set up auto-refresh
   useEffect(() => {
+    if (!dashboardLoaded) return;
     fetchEquityMetrics();
     
     const interval = setInterval(fetchEquityMetrics, 30000); // Refresh every 30 seconds
     return () => clearInterval(interval);
-  }, [fetchEquityMetrics]);
+  }, [dashboardLoaded, fetchEquityMetrics]);
 
   return {
     stats: {
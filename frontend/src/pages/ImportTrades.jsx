@@ -235,6 +235,42 @@ const SummaryMetrics = ({ stats }) => {
   );
 };
 
+// Read a text/event-stream response until the import's "done" event.
+// fetch (unlike EventSource) can send the Authorization header; the server
+// closes each stream after a while, so reconnect until the job finishes.
+const followImportEvents = async (url, token, onProgress) => {
+  for (;;) {
+    const res = await fetch(url, {
+      headers: { Authorization: `Bearer ${token}` },
+    });
+    if (!res.ok) {
+      throw new Error(`Progress stream responded with status ${res.status}`);
+    }
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const messages = buffer.split("\n\n");
+      buffer = messages.pop();
+      for (const message of messages) {
+        let event = "message";
+        let data = "";
+        for (const line of message.split("\n")) {
+          if (line.startsWith("event:")) event = line.slice(6).trim();
+          else if (line.startsWith("data:")) data += line.slice(5).trim();
+        }
+        if (!data) continue;
+        const progress = JSON.parse(data);
+        onProgress(progress);
+        if (event === "done") return progress;
+      }
+    }
+  }
+};
+
 export default function ImportTrades() {
   const [csvData, setCsvData] = useState([]);
   const [headers, setHeaders] = useState([]);
@@ -271,6 +307,7 @@ export default function ImportTrades() {
   const [validationErrors, setValidationErrors] = useState([]);
   const [summaryStats, setSummaryStats] = useState(null);
   const [success, setSuccess] = useState("");
+  const [importProgress, setImportProgress] = useState(null);
   const navigate = useNavigate();
 
   const fieldLabels = {
@@ -915,7 +952,7 @@ export default function ImportTrades() {
         trades: transformedTrades,
       };
       
-      const res = await fetch("http://localhost:5000/api/journal/import", {
+      const res = await fetch("http://localhost:5000/api/journal/import?background=1", {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -938,12 +975,23 @@ export default function ImportTrades() {
         return;
       }
       
-      const data = await res.json();
+      const job = await res.json();
+      setImportProgress({ status: job.status, rows_parsed: 0, rows_inserted: 0 });
+      const progress = await followImportEvents(
+        `http://localhost:5000${job.events_url}`,
+        token,
+        setImportProgress
+      );
+      if (progress.status !== "completed") {
+        setError(progress.error || "Import failed");
+        return;
+      }
+      const data = { inserted_count: progress.rows_inserted };
       
       // Update UI to show success
       setStep(4);
       setAnalysis({
-        totalTrades: data.inserted_count || transformedTrades.length,
+        totalTrades: data.inserted_count,
         totalPnL: transformedTrades.reduce((sum, t) => sum + (t.pnl || 0), 0),
         winRate: transformedTrades.length > 0 
           ? (transformedTrades.filter(t => (t.pnl || 0) > 0).length / transformedTrades.length) * 100
@@ -954,13 +1002,14 @@ export default function ImportTrades() {
       });
       
       // Show success message and reset form after a delay
-      setSuccess(`${data.inserted_count || transformedTrades.length} trades imported successfully!`);
+      setSuccess(`${data.inserted_count} trades imported successfully!`);
       
     } catch (err) {
       console.error("Error importing trades:", err);
       setError(err.message || "Failed to import trades. Please try again.");
     } finally {
       setLoading(false);
+      setImportProgress(null);
     }
   };
 
@@ -1382,6 +1431,30 @@ export default function ImportTrades() {
                 {loading ? "Importing..." : "Import to Database"}
               </button>
             </div>
+
+            {importProgress && (
+              <div className="max-w-md mx-auto text-sm text-gray-600 text-center space-y-2">
+                <div className="w-full bg-gray-200 rounded-full h-2">
+                  <div
+                    className="bg-green-600 h-2 rounded-full transition-all"
+                    style={{
+                      width: `${Math.min(
+                        100,
+                        (importProgress.rows_parsed / Math.max(csvData.length, 1)) * 100
+                      )}%`,
+                    }}
+                  />
+                </div>
+                <p>
+                  {importProgress.rows_parsed} / {csvData.length} rows processed ·{" "}
+                  {importProgress.rows_inserted} inserted
+                  {importProgress.rows_skipped || importProgress.rows_failed
+                    ? ` · ${(importProgress.rows_skipped || 0) + (importProgress.rows_failed || 0)} errors`
+                    : ""}
+                  {importProgress.rows_per_second ? ` · ${Math.round(importProgress.rows_per_second)} rows/s` : ""}
+                </p>
+              </div>
+            )}
           </div>
         )}
 
@@ -425,7 +425,7 @@ export default function ProfessionalTradingJournal() {
               📂 Import
               <input
                 type="file"
-                accept=".xlsx"
+                accept=".xlsx,.csv"
                 className="hidden"
                 onChange={(e) => {
                   if (e.target.files[0]) {
@@ -433,6 +433,26 @@ export default function ProfessionalTradingJournal() {
                     const formData = new FormData();
                     formData.append("file", file);
                     const token = localStorage.getItem("token");
+                    // The upload returns 202 right away; the trades are
+                    // imported in the background, so poll the batch status
+                    const pollStatus = (batchId) =>
+                      fetch(
+                        `http://localhost:5000/api/journal/import/${batchId}/status`,
+                        { headers: { Authorization: `Bearer ${token}` } }
+                      )
+                        .then((res) => res.json())
+                        .then((status) => {
+                          if (status.status === "completed") {
+                            fetchTrades();
+                            fetchImportHistory();
+                            setError("");
+                          } else if (status.status === "failed" || status.error) {
+                            fetchImportHistory();
+                            setError(status.error || "❌ Import failed");
+                          } else {
+                            setTimeout(() => pollStatus(batchId), 1000);
+                          }
+                        });
                     fetch("http://localhost:5000/api/journal/import/excel", {
                       method: "POST",
                       headers: { Authorization: `Bearer ${token}` },
@@ -440,13 +460,11 @@ export default function ProfessionalTradingJournal() {
                     })
                       .then((res) => res.json())
                       .then((data) => {
-                        if (data.imported != null) {
-                          fetchTrades();
+                        if (data.batch_id != null) {
                           fetchImportHistory();
-                          setError("");
-                        } else {
-                          setError(data.error || "❌ Import failed");
+                          return pollStatus(data.batch_id);
                         }
+                        setError(data.error || "❌ Import failed");
                       })
                       .catch((err) => {
                         console.error("Import error:", err);
@@ -11,19 +11,24 @@ import {
   Camera,
   Check,
   X,
-  AlertCircle
+  AlertCircle,
+  Globe
 } from 'lucide-react';
 
+// IANA zones offered for the analytics timezone (hour / weekday / week / month buckets)
+const TIME_ZONES = typeof Intl.supportedValuesOf === 'function' ? Intl.supportedValuesOf('timeZone') : ['UTC'];
+
 export default function Settings() {
   const [email, setEmail] = useState('');
   const [password, setPassword] = useState('');
   const [profileImage, setProfileImage] = useState('');
+  const [timezone, setTimezone] = useState('UTC');
   const [previewImage, setPreviewImage] = useState('');
   const [msg, setMsg] = useState('');
   const [loading, setLoading] = useState(false);
   const [showPassword, setShowPassword] = useState(false);
   const [hasChanges, setHasChanges] = useState(false);
-  const [originalData, setOriginalData] = useState({ email: '', profileImage: '' });
+  const [originalData, setOriginalData] = useState({ email: '', profileImage: '', timezone: 'UTC' });
 
   // ─── 1. On mount: fetch current profile ────────────────────────────────────────
   useEffect(() => {
@@ -57,9 +62,11 @@ export default function Settings() {
         setEmail(data.email || '');
         setProfileImage(data.profile_image || '');
         setPreviewImage(data.profile_image || '');
+        setTimezone(data.timezone || 'UTC');
         setOriginalData({
           email: data.email || '',
-          profileImage: data.profile_image || ''
+          profileImage: data.profile_image || '',
+          timezone: data.timezone || 'UTC'
         });
         setMsg('');
       } catch (err) {
@@ -76,9 +83,10 @@ export default function Settings() {
     const changed =
       email !== originalData.email ||
       password.trim() !== '' ||
-      profileImage !== originalData.profileImage;
+      profileImage !== originalData.profileImage ||
+      timezone !== originalData.timezone;
     setHasChanges(changed);
-  }, [email, password, profileImage, originalData]);
+  }, [email, password, profileImage, timezone, originalData]);
 
   // ─── 3. Handle form submission (update profile) ───────────────────────────────
   const handleSave = async (e) => {
@@ -104,7 +112,8 @@ export default function Settings() {
       const payload = {
         email: email.trim().toLowerCase(),
         ...(password.trim() ? { password: password.trim() } : {}),
-        ...(profileImage.trim() ? { profile_image: profileImage.trim() } : {})
+        ...(profileImage.trim() ? { profile_image: profileImage.trim() } : {}),
+        ...(timezone !== originalData.timezone ? { timezone } : {})
       };
 
       const res = await fetch('http://localhost:5000/api/auth/profile', {
@@ -126,7 +135,8 @@ export default function Settings() {
         setPassword('');
         setOriginalData({
           email: payload.email,
-          profileImage: payload.profile_image || originalData.profileImage
+          profileImage: payload.profile_image || originalData.profileImage,
+          timezone: data.timezone || timezone
         });
         // Clear success message after 3 seconds
         setTimeout(() => setMsg(''), 3000);
@@ -269,6 +279,24 @@ export default function Settings() {
               </div>
             </div>
 
+            {/* Timezone */}
+            <div className="space-y-2">
+              <label className="flex items-center gap-2 text-sm font-medium text-gray-700">
+                <Globe className="w-4 h-4" />
+                Timezone
+              </label>
+              <select
+                value={timezone}
+                onChange={(e) => setTimezone(e.target.value)}
+                className="w-full pl-4 pr-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-blue-500 focus:border-blue-500 transition-colors bg-white"
+              >
+                {(TIME_ZONES.includes(timezone) ? TIME_ZONES : [timezone, ...TIME_ZONES]).map((zone) => (
+                  <option key={zone} value={zone}>{zone}</option>
+                ))}
+              </select>
+              <p className="text-xs text-gray-500">Used for hour-of-day, weekday, weekly and monthly analytics</p>
+            </div>
+
             {/* Password */}
             <div className="space-y-2">
               <label className="flex items-center gap-2 text-sm font-medium text-gray-700">
@@ -76,7 +76,9 @@ export default function Trades() {
 
       try {
         // 2. Fetch from /api/journal/list instead of /api/trades/list
-        const res = await fetch('http://localhost:5000/api/journal/list', {
+        //    (only the columns this table shows, without the JSON blobs)
+        const fields = 'symbol,direction,entry_price,exit_price,pnl,rr,notes,date';
+        const res = await fetch(`http://localhost:5000/api/journal/list?fields=${fields}`, {
           headers: {
             Authorization: `Bearer ${token}`
           }
@@ -74,6 +74,9 @@ import {
   MoreHorizontal
 } from 'lucide-react';
 
+// Server-side cap on each variable's cumulative_pnl series
+const MAX_SERIES_POINTS = 200;
+
 // ─── Format helpers ─────────────────────────────────────────────────────────────
 const formatCurrency = (val) => {
   if (val == null) return 'N/A';
@@ -723,6 +726,7 @@ export default function VariablesAnalysis() {
         if (fromDate) params.append('from_date', fromDate);
         if (toDate) params.append('to_date', toDate);
         if (selectedTimeframe !== 'all') params.append('timeframe', selectedTimeframe);
+        params.append('max_points', MAX_SERIES_POINTS.toString());
         
         const queryString = params.toString();
         if (queryString) url += `?${queryString}`;
@@ -796,6 +800,7 @@ export default function VariablesAnalysis() {
         if (fromDate) params.append('from_date', fromDate);
         if (toDate) params.append('to_date', toDate);
         if (selectedTimeframe !== 'all') params.append('timeframe', selectedTimeframe);
+        params.append('max_points', MAX_SERIES_POINTS.toString());
         
         const queryString = params.toString();
         if (queryString) url += `?${queryString}`;